@@ -16,10 +16,7 @@
 
 from automationclient.openstack.common import version
 
+# There is no __version__ anymore: looking the version up imports
+# pkg_resources and may even run git, so it is only done on demand, with
+# version_info.version_string(), as the --version option of the shell does.
 version_info = version.VersionInfo('python-automationclient')
-# We have a circular import problem when we first run python setup.py sdist
-# It's harmless, so deflect it.
-try:
-    __version__ = version_info.version_string()
-except AttributeError:
-    __version__ = None
@@ -0,0 +1,289 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Background agent running the commands of the shell with warm clients.
+
+``automation agent`` listens on a Unix socket and keeps an authenticated
+client, with its token, cache and connections, for every set of
+credentials it is used with. The ``automation`` command forwards its
+arguments to the agent when its socket exists and runs them in process
+otherwise.
+
+Every request is one JSON line with the 'argv', 'env' and 'cwd' of the
+command. The agent answers with JSON lines carrying the 'out' and 'err'
+output as it is written and ends with the 'exit' status.
+"""
+
+import json
+import logging
+import os
+import socket
+import sys
+
+import six
+
+from automationclient import exceptions
+from automationclient import utils
+
+logger = logging.getLogger(__name__)
+
+# Environment variables forwarded to the agent, by prefix.
+ENV_PREFIXES = ('OS_', 'AUTOMATION', 'CLIENT_UUID_CACHE_DIR')
+
+# Commands reading from the terminal, or debugging, always run in process,
+# and so do the ones that may run for long, to keep the agent available.
+LOCAL_COMMANDS = ('agent', 'session', 'zone-watch', 'role-deploy-rolling',
+                  'device-onboard')
+
+
+def socket_path():
+    """Return the path of the socket of the agent."""
+    path = utils.env('AUTOMATIONCLIENT_AGENT_SOCKET')
+    if not path:
+        base_dir = utils.env('CLIENT_UUID_CACHE_DIR',
+                             default="~/.automationclient")
+        path = os.path.join(base_dir, 'agent.sock')
+    return os.path.expanduser(path)
+
+
+def _forwarded_env():
+    return dict((key, value) for key, value in os.environ.items()
+                if key.startswith(ENV_PREFIXES))
+
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def _write(stream, text):
+    if six.PY2 and isinstance(text, six.text_type):
+        text = text.encode('utf-8')
+    stream.write(text)
+    stream.flush()
+
+
+def forward(argv, path=None):
+    """Run ``argv`` in the agent, if one is running.
+
+    :rtype: the exit status of the command, or None when it must run in
+            process.
+    """
+    if utils.env('AUTOMATIONCLIENT_NO_AGENT', 'AUTOMATIONCLIENT_DEBUG'):
+        return None
+    if '-' in argv or '--debug' in argv or \
+            [arg for arg in argv if arg in LOCAL_COMMANDS]:
+        return None
+
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error:
+        # A stale socket, the agent is gone.
+        sock.close()
+        return None
+
+    try:
+        _send(sock, {'argv': list(argv), 'env': _forwarded_env(),
+                     'cwd': os.getcwd()})
+        for line in sock.makefile('rb'):
+            message = json.loads(line.decode('utf-8'))
+            if 'out' in message:
+                _write(sys.stdout, message['out'])
+            elif 'err' in message:
+                _write(sys.stderr, message['err'])
+            elif 'exit' in message:
+                return message['exit']
+    finally:
+        sock.close()
+
+    # The command may have been run already, do not run it again.
+    _write(sys.stderr, "ERROR: the automation agent closed the connection\n")
+    return 1
+
+
+def stop(path=None):
+    """Ask the agent to exit.
+
+    :rtype: whether an agent was running.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or socket_path())
+        _send(sock, {'stop': True})
+        sock.makefile('rb').readline()
+    except socket.error:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+class ClientGone(KeyboardInterrupt):
+    """The client forwarding the command went away, as on Ctrl-C.
+
+    Not an :class:`Exception`, so the commands retrying on errors do not
+    swallow it and keep the agent busy.
+    """
+
+
+class _SocketStream(object):
+    """File-like object sending what is written as ``key`` messages."""
+
+    def __init__(self, sock, key):
+        self.sock = sock
+        self.key = key
+
+    def write(self, data):
+        if not data:
+            return
+        if isinstance(data, six.binary_type):
+            data = data.decode('utf-8', 'replace')
+        try:
+            _send(self.sock, {self.key: data})
+        except socket.error:
+            # Nobody reads the output anymore, abort the command.
+            raise ClientGone()
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class Agent(object):
+    """Serve the commands of the shell on a Unix socket.
+
+    The commands run one at a time, as they change the environment, the
+    working directory and the output streams of the process.
+
+    :param path: file of the socket.
+    :param idle_timeout: seconds without commands after which the agent
+                         exits, None to never exit.
+    """
+
+    def __init__(self, path, idle_timeout=None):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        # Warm clients, by credentials, kept by the shell between commands.
+        self.clients = {}
+        self.stopped = False
+
+    def _listen(self):
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except socket.error:
+                # Left behind by an agent that did not exit cleanly.
+                os.remove(self.path)
+            else:
+                raise exceptions.CommandError("An agent is already "
+                                              "listening on %s" % self.path)
+            finally:
+                probe.close()
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the user running the agent can talk to it, commands carry
+        # its credentials.
+        umask = os.umask(0o077)
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(umask)
+        sock.listen(16)
+        sock.settimeout(self.idle_timeout)
+        return sock
+
+    def serve(self):
+        """Serve commands until stopped or idle for too long."""
+        server = self._listen()
+        try:
+            while not self.stopped:
+                try:
+                    conn, address = server.accept()
+                except socket.timeout:
+                    break
+                conn.settimeout(None)
+                try:
+                    self.handle(conn)
+                except Exception as e:
+                    # A broken request must not take the agent down.
+                    logger.debug(e, exc_info=1)
+                finally:
+                    conn.close()
+        finally:
+            server.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def handle(self, conn):
+        """Run the command received on ``conn``."""
+        line = conn.makefile('rb').readline()
+        if not line:
+            return
+        request = json.loads(line.decode('utf-8'))
+        if request.get('stop'):
+            self.stopped = True
+            _send(conn, {'exit': 0})
+            return
+
+        try:
+            status = self.run(request['argv'], request.get('env', {}),
+                              request.get('cwd'),
+                              _SocketStream(conn, 'out'),
+                              _SocketStream(conn, 'err'))
+        except ClientGone:
+            logger.debug("Client gone, command %s aborted" % request['argv'])
+            return
+        try:
+            _send(conn, {'exit': status})
+        except socket.error:
+            pass
+
+    def run(self, argv, env, cwd, stdout, stderr):
+        """Run ``argv`` as the shell would, in the given environment.
+
+        :rtype: the exit status.
+        """
+        from automationclient import shell
+
+        saved_env = _forwarded_env()
+        saved_cwd = os.getcwd()
+        saved_streams = sys.stdout, sys.stderr
+        for key in saved_env:
+            del os.environ[key]
+        for key, value in env.items():
+            if six.PY2:
+                key, value = key.encode('utf-8'), value.encode('utf-8')
+            os.environ[key] = value
+        sys.stdout, sys.stderr = stdout, stderr
+        try:
+            if cwd:
+                os.chdir(cwd)
+            return shell.run(argv, clients=self.clients)
+        finally:
+            sys.stdout, sys.stderr = saved_streams
+            os.chdir(saved_cwd)
+            for key in _forwarded_env():
+                del os.environ[key]
+            os.environ.update(saved_env)
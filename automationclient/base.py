@@ -21,11 +21,14 @@ Base utilities to build API operation managers and objects on top of.
 """
 import abc
 import contextlib
-import hashlib
+import copy
+import json
 import os
+import threading
 
 import six
 
+from automationclient import completion
 from automationclient import exceptions
 from automationclient import utils
 
@@ -38,6 +41,47 @@ except NameError:
         return True not in (not x for x in iterable)
 
 
+# Attributes kept by Manager._list whatever fields are asked for.
+IDENTITY_FIELDS = ('id', 'uuid', 'name')
+
+
+def identity_fields(resource_class=None):
+    """Return the fields identifying the resources of ``resource_class``.
+
+    Besides :data:`IDENTITY_FIELDS` the key of the completion cache is
+    kept, the MAC of the devices for instance.
+    """
+    fields = set(IDENTITY_FIELDS)
+    if resource_class is not None:
+        fields.add(resource_class.COMPLETION_KEY)
+    return fields
+
+
+def fields_opts(search_opts, fields, resource_class=None):
+    """Add the ``fields`` to return to the ``search_opts`` of a listing.
+
+    Servers not supporting the filter ignore it, the listing is pruned on
+    the client anyway.
+    """
+    if not fields:
+        return search_opts
+    opts = dict(search_opts or {})
+    opts['fields'] = ','.join(sorted(set(fields) |
+                                     identity_fields(resource_class)))
+    return opts
+
+
+def query_string(search_opts):
+    """
+    Build the query string for ``search_opts``, skipping empty values.
+    """
+    qparams = dict((k, v) for (k, v) in six.iteritems(search_opts or {})
+                   if v is not None and v != '')
+    if not qparams:
+        return ""
+    return "?%s" % six.moves.urllib.parse.urlencode(sorted(qparams.items()))
+
+
 def getid(obj):
     """
     Abstracts the common pattern of allowing both an object or an object's ID
@@ -59,8 +103,36 @@ class Manager(utils.HookableMixin):
     def __init__(self, api):
         self.api = api
 
+    @property
+    def strict_loading(self):
+        """
+        When the client is built with ``strict_loading=True`` resources
+        raise :exc:`exceptions.LazyLoadDisallowed` instead of issuing a GET
+        for every missing attribute.
+        """
+        return getattr(self.api, 'strict_loading', False)
+
+    def hydrate(self, resources, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Load the details of every resource that has not been loaded yet,
+        using up to ``concurrency`` requests at the same time.
+
+        This is the batched counterpart of the lazy-loading done by
+        `Resource.__getattr__`: call it once on a list of resources before
+        iterating over their attributes instead of paying one serial GET per
+        resource.
+
+        :param resources: list of :class:`Resource` to load.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: the same list of resources.
+        """
+        resources = list(resources)
+        pending = [r for r in resources if not r.is_loaded()]
+        utils.parallel_map(lambda r: r.get(), pending, concurrency)
+        return resources
+
     def _list(self, url, response_key, obj_class=None, body=None,
-              customize=None):
+              customize=None, fields=None):
         resp = None
 
         if customize:
@@ -83,10 +155,33 @@ class Manager(utils.HookableMixin):
             except KeyError:
                 pass
 
+        if fields:
+            # Drop the attributes nobody asked for, besides the ones
+            # identifying the resource, before building the resources.
+            keep = set(fields) | identity_fields(obj_class)
+            data = [dict((key, value) for key, value in six.iteritems(res)
+                         if key in keep)
+                    for res in data if res]
+
         with self.completion_cache('human_id', obj_class, mode="w"):
             with self.completion_cache('uuid', obj_class, mode="w"):
-                return [obj_class(self, res, loaded=True)
-                        for res in data if res]
+                with self.completion_cache('id', obj_class, mode="w"):
+                    return [obj_class(self, res, loaded=True)
+                            for res in data if res]
+
+    def _cache_dir(self):
+        """Return the directory holding the local caches of the client."""
+        cache_dir = completion.cache_dir()
+
+        try:
+            os.makedirs(cache_dir, 0o755)
+        except OSError:
+            # NOTE(kiall): This is typicaly either permission denied while
+            #              attempting to create the directory, or the directory
+            #              already exists. Either way, don't fail.
+            pass
+
+        return cache_dir
 
     @contextlib.contextmanager
     def completion_cache(self, cache_type, obj_class, mode):
@@ -101,49 +196,67 @@ class Manager(utils.HookableMixin):
         Delete is not handled because listings are assumed to be performed
         often enough to keep the cache reasonably up-to-date.
         """
-        base_dir = utils.env('CLIENT_UUID_CACHE_DIR',
-                             default="~/.automationclient")
-
-        # NOTE(sirp): Keep separate UUID caches for each username + endpoint
-        # pair
-        username = utils.env('OS_USERNAME', 'AUTOMATION_USERNAME')
-        url = utils.env('OS_URL', 'AUTOMATION_URL')
-        uniqifier = hashlib.md5(username.encode('utf-8') +
-                                url.encode('utf-8')).hexdigest()
-
-        cache_dir = os.path.expanduser(os.path.join(base_dir, uniqifier))
-
-        try:
-            os.makedirs(cache_dir, 0o755)
-        except OSError:
-            # NOTE(kiall): This is typicaly either permission denied while
-            #              attempting to create the directory, or the directory
-            #              already exists. Either way, don't fail.
-            pass
-
+        cache_dir = self._cache_dir()
         resource = obj_class.__name__.lower()
         filename = "%s-%s-cache" % (resource, cache_type.replace('_', '-'))
         path = os.path.join(cache_dir, filename)
 
-        cache_attr = "_%s_cache" % cache_type
+        caches = self._completion_caches()
+        # Listings run at once are gathered, see `merged_completion_cache`.
+        merged = self.__dict__.get('_merged_completion')
+        if mode != "w":
+            merged = None
 
-        try:
-            setattr(self, cache_attr, open(path, mode))
-        except IOError:
-            # NOTE(kiall): This is typicaly a permission denied while
-            #              attempting to write the cache file.
-            pass
+        if merged is not None:
+            caches[cache_type] = six.StringIO()
+        else:
+            try:
+                caches[cache_type] = open(path, mode)
+            except IOError:
+                # NOTE(kiall): This is typicaly a permission denied while
+                #              attempting to write the cache file.
+                pass
 
         try:
             yield
         finally:
-            cache = getattr(self, cache_attr, None)
+            cache = caches.pop(cache_type, None)
             if cache:
+                if merged is not None:
+                    merged.setdefault(path, []).append(cache.getvalue())
                 cache.close()
-                delattr(self, cache_attr)
+
+    @contextlib.contextmanager
+    def merged_completion_cache(self):
+        """
+        Replace the completion caches with the items of all the listings
+        run inside, from any thread, once they are done. Otherwise every
+        listing truncates and writes the same files while the others are
+        still writing them.
+        """
+        self._merged_completion = merged = {}
+        try:
+            yield
+        finally:
+            del self._merged_completion
+            for path, contents in six.iteritems(merged):
+                try:
+                    with open(path, "w") as cache:
+                        cache.write(''.join(contents))
+                except IOError:
+                    pass
+
+    def _completion_caches(self):
+        # The open cache files of the calling thread: listings of the same
+        # manager may run at once, see `utils.parallel_map`.
+        local = self.__dict__.setdefault('_completion_local',
+                                         threading.local())
+        if not hasattr(local, 'caches'):
+            local.caches = {}
+        return local.caches
 
     def write_to_completion_cache(self, cache_type, val):
-        cache = getattr(self, "_%s_cache" % cache_type, None)
+        cache = self._completion_caches().get(cache_type)
         if cache:
             cache.write("%s\n" % val)
 
@@ -162,7 +275,9 @@ class Manager(utils.HookableMixin):
 
         with self.completion_cache('human_id', self.resource_class, mode="a"):
             with self.completion_cache('uuid', self.resource_class, mode="a"):
-                return self.resource_class(self, body[response_key])
+                with self.completion_cache('id', self.resource_class,
+                                           mode="a"):
+                    return self.resource_class(self, body[response_key])
 
     def _delete(self, url):
         resp, body = self.api.client.delete(url)
@@ -172,12 +287,41 @@ class Manager(utils.HookableMixin):
         resp, body = self.api.client.put(url, body=body)
         return body
 
+    def _properties_body(self, resource, response_key, set=None,
+                         delete=None):
+        """Build the update body of ``resource`` with patched properties.
+
+        The body is built from a copy of the resource document, so the
+        resource itself is left untouched, and without its ``_links``.
+
+        :param response_key: key wrapping the document, e.g. 'zone'
+        :param set: dictionary of property keys to create or update
+        :param delete: list of property keys to remove
+        """
+        info = copy.deepcopy(resource._info)
+        info.pop('_links', None)
+        properties = info.setdefault('properties', {})
+
+        for property_key in delete or []:
+            if property_key not in properties:
+                msg = "No %s property with a key: '%s' exists." % \
+                      (response_key, property_key)
+                raise exceptions.CommandError(msg)
+            del properties[property_key]
+        properties.update(set or {})
+
+        return {response_key: info}
+
 
 class ManagerWithFind(six.with_metaclass(abc.ABCMeta, Manager)):
     """
     Like a `Manager`, but with additional `find()`/`findall()` methods.
     """
 
+    # Attributes the API can filter with a query string. Managers declaring
+    # them must accept a ``search_opts`` dictionary in ``list()``.
+    server_filters = ()
+
     @abc.abstractmethod
     def list(self):
         pass
@@ -186,8 +330,8 @@ class ManagerWithFind(six.with_metaclass(abc.ABCMeta, Manager)):
         """
         Find a single item with attributes matching ``**kwargs``.
 
-        This isn't very efficient: it loads the entire list then filters on
-        the Python side.
+        Attributes listed in ``server_filters`` are sent to the API, the
+        rest are filtered on the Python side.
         """
         matches = self.findall(**kwargs)
         num_matches = len(matches)
@@ -203,21 +347,67 @@ class ManagerWithFind(six.with_metaclass(abc.ABCMeta, Manager)):
         """
         Find all items with attributes matching ``**kwargs``.
 
-        This isn't very efficient: it loads the entire list then filters on
-        the Python side.
+        Attributes listed in ``server_filters`` are also sent to the API as
+        a query string, so it returns fewer items. Servers that reject the
+        filters, or are seen returning non matching items, get the whole
+        list requested from then on. The items are always checked against
+        every attribute on the Python side, since an answer matching by
+        chance does not prove the server filtered it.
         """
-        found = []
-        searches = list(kwargs.items())
+        pushed = dict((attr, value) for (attr, value) in kwargs.items()
+                      if attr in self.server_filters)
+        support = self._filter_support() if pushed else False
 
-        for obj in self.list():
+        objs = None
+        if support is not False:
             try:
-                if all(getattr(obj, attr) == value
-                       for (attr, value) in searches):
-                    found.append(obj)
-            except AttributeError:
-                continue
+                objs = self.list(search_opts=pushed)
+            except exceptions.BadRequest:
+                self._set_filter_support(False)
+
+        if objs is None:
+            objs = self.list()
+        elif not all(self._matches(obj, pushed.items()) for obj in objs):
+            # The query string was ignored.
+            self._set_filter_support(False)
+        elif objs and support is None:
+            self._set_filter_support(True)
+
+        return [obj for obj in objs if self._matches(obj, kwargs.items())]
+
+    @staticmethod
+    def _matches(obj, searches):
+        try:
+            return all(getattr(obj, attr) == value
+                       for (attr, value) in searches)
+        except AttributeError:
+            return False
 
-        return found
+    def _filter_support_path(self):
+        return os.path.join(self._cache_dir(), 'filter-support.json')
+
+    def _filter_support(self):
+        """Return True, False or None (unknown) for server side filters."""
+        try:
+            with open(self._filter_support_path()) as f:
+                support = json.load(f)
+        except (IOError, ValueError):
+            return None
+        return support.get(self.resource_class.__name__.lower())
+
+    def _set_filter_support(self, value):
+        path = self._filter_support_path()
+        try:
+            with open(path) as f:
+                support = json.load(f)
+        except (IOError, ValueError):
+            support = {}
+        support[self.resource_class.__name__.lower()] = value
+        try:
+            with open(path, 'w') as f:
+                json.dump(support, f)
+        except IOError:
+            pass
 
 
 class Resource(object):
@@ -230,6 +420,9 @@ class Resource(object):
     :param loaded: prevent lazy-loading if set to True
     """
     HUMAN_ID = False
+    # Attribute written to the 'id' completion cache, completed by
+    # `automation-complete` for the arguments taking this resource.
+    COMPLETION_KEY = 'id'
 
     def __init__(self, manager, info, loaded=False):
         self.manager = manager
@@ -243,6 +436,11 @@ class Resource(object):
         if 'id' in self.__dict__ and len(str(self.id)) == 36:
             self.manager.write_to_completion_cache('uuid', self.id)
 
+        if (self.manager is not None and
+                self.__dict__.get(self.COMPLETION_KEY) is not None):
+            self.manager.write_to_completion_cache(
+                'id', self.__dict__[self.COMPLETION_KEY])
+
         human_id = self.human_id
         if human_id:
             self.manager.write_to_completion_cache('human_id', human_id)
@@ -268,6 +466,12 @@ class Resource(object):
         if k not in self.__dict__:
             #NOTE(bcwaldon): disallow lazy-loading if already loaded once
             if not self.is_loaded():
+                if getattr(self.manager, 'strict_loading', False):
+                    msg = ("Lazy-loading '%s' of an unloaded %s is not "
+                           "allowed in strict loading mode, use "
+                           "Manager.hydrate() instead."
+                           % (k, self.__class__.__name__))
+                    raise exceptions.LazyLoadDisallowed(msg)
                 self.get()
                 return self.__getattr__(k)
 
@@ -0,0 +1,222 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Persistent local cache of API responses.
+
+Every cached GET is stored as a JSON file named after its (quoted) URL, so
+entries survive between invocations of the client and a whole subtree can be
+dropped by URL prefix when a write touches it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+try:
+    from urllib import quote, unquote
+except ImportError:
+    from urllib.parse import quote, unquote
+
+from automationclient import utils
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response stays fresh, looked up by the innermost collection of
+# the URL. Collections not listed here (tasks, nodes, devices, datastores...)
+# change too often and are never cached.
+DEFAULT_TTLS = {
+    'archs': 300,
+    'profiles': 300,
+    'get_template': 300,
+    'components': 300,
+    'services': 300,
+    'zones': 60,
+    'roles': 60,
+    'properties': 60,
+    'tasks': 0,
+    'nodes': 0,
+    'state': 0,
+    'devices': 0,
+    'datastores': 0,
+    'space': 0,
+    'content': 0,
+}
+
+# Writes on the key subtree also change the listed subtrees: activating a
+# device creates a node in a zone, deactivating a node puts a device back in
+# the pool and applying an architecture creates a zone.
+RELATED_PREFIXES = {
+    'pool': ('/zones',),
+    'zones': ('/pool',),
+    'archs': ('/zones',),
+}
+
+
+def _split(url):
+    return [part for part in url.split('?', 1)[0].split('/') if part]
+
+
+class ResponseCache(object):
+    """Store GET responses on disk with per-resource-type TTLs.
+
+    :param cache_dir: directory where the entries are written.
+    :param ttls: dictionary overriding :data:`DEFAULT_TTLS`.
+    :param offline: serve expired entries when the API is unreachable.
+    """
+
+    def __init__(self, cache_dir, ttls=None, offline=False):
+        self.cache_dir = cache_dir
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stale_hits': 0,
+                       'stores': 0, 'invalidations': 0}
+
+        try:
+            os.makedirs(self.cache_dir, 0o755)
+        except OSError:
+            # Either the directory already exists or it cannot be
+            # created, in which case every lookup is a miss.
+            pass
+
+    @classmethod
+    def for_credentials(cls, username, url, **kwargs):
+        """Build a cache kept apart for each username + endpoint pair."""
+        base_dir = utils.env('CLIENT_UUID_CACHE_DIR',
+                             default="~/.automationclient")
+        uniqifier = hashlib.md5((username or '').encode('utf-8') +
+                                (url or '').encode('utf-8')).hexdigest()
+        cache_dir = os.path.expanduser(os.path.join(base_dir, uniqifier,
+                                                    'http-cache'))
+        return cls(cache_dir, **kwargs)
+
+    def ttl_for(self, url):
+        """Return the TTL of the innermost known collection of ``url``."""
+        for part in reversed(_split(url)):
+            if part in self.ttls:
+                return self.ttls[part]
+        return 0
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, quote(url, safe=''))
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _read(self, url):
+        try:
+            with open(self._path(url)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def get(self, url, allow_stale=False):
+        """Return the cached body for ``url`` or None.
+
+        Expired entries are only returned with ``allow_stale``.
+        """
+        ttl = self.ttl_for(url)
+        if ttl <= 0 and not allow_stale:
+            return None
+
+        entry = self._read(url)
+        if entry is None:
+            self._count('misses')
+            return None
+
+        if time.time() - entry['stored'] < ttl:
+            self._count('hits')
+            return entry['body']
+
+        if allow_stale:
+            self._count('stale_hits')
+            logger.debug("Serving stale cache entry for %s" % url)
+            return entry['body']
+
+        self._count('misses')
+        return None
+
+    def set(self, url, body):
+        """Store ``body`` as the response of ``url``."""
+        if self.ttl_for(url) <= 0 or body is None:
+            return
+
+        entry = {'url': url, 'stored': time.time(), 'body': body}
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.rename(tmp_path, self._path(url))
+        except (IOError, OSError):
+            # The cache is an optimization, never fail a request because
+            # it cannot be written.
+            return
+        self._count('stores')
+
+    def invalidate(self, url):
+        """Drop every entry in the subtree touched by a write on ``url``.
+
+        The subtree is rooted at the first two segments of the URL (for
+        example ``/zones/1234``), so the collection listing and every
+        resource nested below the written one are dropped as well.
+        """
+        parts = _split(url)
+        if not parts:
+            return
+
+        subtrees = ['/' + '/'.join(parts[:2])]
+        subtrees.extend(RELATED_PREFIXES.get(parts[0], ()))
+        # The listing of the collection changes too, not its siblings.
+        listing = '/' + parts[0]
+
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+
+        for name in names:
+            path = unquote(name).split('?', 1)[0]
+            if path == listing or any(path == prefix or
+                                      path.startswith(prefix + '/')
+                                      for prefix in subtrees):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                self._count('invalidations')
+
+    def clear(self):
+        """Drop every cached entry."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def stats(self):
+        """Return a copy of the hit/miss counters."""
+        with self._lock:
+            return dict(self._stats)
@@ -31,11 +31,6 @@ try:
 except ImportError:
     import urllib.parse as urlparse
 
-try:
-    from eventlet import sleep
-except ImportError:
-    from time import sleep
-
 try:
     import json
 except ImportError:
@@ -52,17 +47,46 @@ from automationclient import exceptions
 from automationclient import service_catalog
 from automationclient import utils
 
+_sleep = None
+
+
+def sleep(seconds):
+    """Sleep cooperatively when eventlet is available.
+
+    eventlet is slow to import and only needed between retries, so it is
+    looked up on the first retry.
+    """
+    global _sleep
+    if _sleep is None:
+        try:
+            from eventlet import sleep as _sleep
+        except ImportError:
+            from time import sleep as _sleep
+    _sleep(seconds)
+
+
+# Errors meaning the API could not be reached at all.
+CONNECTION_ERRORS = (exceptions.ConnectionError,
+                     requests.exceptions.ConnectionError)
+
 
 class HTTPClient(object):
 
     USER_AGENT = 'python-automationclient'
 
+    # Optional automationclient.cache.ResponseCache serving GET requests.
+    cache = None
+
+    # Optional requests.Session keeping the connections open between
+    # requests, see open_session().
+    session = None
+
     def __init__(self, user, password, projectid, auth_url,
                  insecure=False, timeout=None, tenant_id=None,
                  proxy_tenant_id=None, proxy_token=None, region_name=None,
                  endpoint_type='publicURL', service_type=None,
                  service_name=None, retries=None,
-                 http_log_debug=False, cacert=None):
+                 http_log_debug=False, cacert=None, cache=None):
         self.user = user
         self.password = password
         self.projectid = projectid
@@ -81,6 +105,7 @@ class HTTPClient(object):
         self.proxy_token = proxy_token
         self.proxy_tenant_id = proxy_tenant_id
         self.timeout = timeout
+        self.cache = cache
 
         if insecure:
             self.verify_cert = False
@@ -138,7 +163,11 @@ class HTTPClient(object):
         if self.timeout:
             kwargs.setdefault('timeout', self.timeout)
         self.http_log_req((url, method,), kwargs)
-        resp = requests.request(
+        if self.session is not None:
+            request = self.session.request
+        else:
+            request = requests.request
+        resp = request(
             method,
             url,
             verify=self.verify_cert,
@@ -159,6 +188,15 @@ class HTTPClient(object):
 
         return resp, body
 
+    def open_session(self):
+        """Reuse the connections to the API for the following requests.
+
+        Worth it when many requests are sent with the same client, as in the
+        session and batch modes of the shell.
+        """
+        if self.session is None:
+            self.session = requests.Session()
+
     def _cs_request(self, url, method, **kwargs):
         auth_attempts = 0
         attempts = 0
@@ -205,16 +243,51 @@ class HTTPClient(object):
             backoff *= 2
 
     def get(self, url, **kwargs):
-        return self._cs_request(url, 'GET', **kwargs)
+        # Requests with their own headers (e.g. conditional GETs) always go
+        # to the server.
+        if self.cache is None or kwargs.get('headers'):
+            return self._cs_request(url, 'GET', **kwargs)
+
+        body = self.cache.get(url)
+        if body is not None:
+            return self._cached_response(), body
+
+        try:
+            resp, body = self._cs_request(url, 'GET', **kwargs)
+        except CONNECTION_ERRORS:
+            if not self.cache.offline:
+                raise
+            body = self.cache.get(url, allow_stale=True)
+            if body is None:
+                raise
+            return self._cached_response(), body
+
+        self.cache.set(url, body)
+        return resp, body
 
     def post(self, url, **kwargs):
-        return self._cs_request(url, 'POST', **kwargs)
+        return self._cs_write(url, 'POST', **kwargs)
 
     def put(self, url, **kwargs):
-        return self._cs_request(url, 'PUT', **kwargs)
+        return self._cs_write(url, 'PUT', **kwargs)
 
     def delete(self, url, **kwargs):
-        return self._cs_request(url, 'DELETE', **kwargs)
+        return self._cs_write(url, 'DELETE', **kwargs)
+
+    def _cs_write(self, url, method, **kwargs):
+        try:
+            return self._cs_request(url, method, **kwargs)
+        finally:
+            # Write-through: whatever the outcome, the subtree may have
+            # changed on the server.
+            if self.cache is not None:
+                self.cache.invalidate(url)
+
+    def _cached_response(self):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.headers['X-Automationclient-Cache'] = 'hit'
+        return resp
 
     def _extract_service_catalog(self, url, resp, body, extract_token=True):
         """See what the auth service told us and process the response.
@@ -0,0 +1,682 @@
+# Generated by "python -m automationclient.completion --generate", do not edit.
+
+COMMANDS = {
+    'agent': {
+        'args': [],
+        'options': ['--idle-timeout', '--socket', '--stop'],
+        'valued': {'--idle-timeout': None, '--socket': None},
+        'variadic': False,
+    },
+    'architecture-create': {
+        'args': [None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'architecture-delete': {
+        'args': ['architecture'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'architecture-export': {
+        'args': ['architecture', None],
+        'options': ['--concurrency'],
+        'valued': {'--concurrency': None},
+        'variadic': False,
+    },
+    'architecture-import': {
+        'args': [None],
+        'options': ['--architecture', '--concurrency'],
+        'valued': {'--architecture': 'architecture', '--concurrency': None},
+        'variadic': False,
+    },
+    'architecture-list': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'architecture-show': {
+        'args': ['architecture'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'architecture-template': {
+        'args': ['architecture'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'bash-completion': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'batch': {
+        'args': [None],
+        'options': ['--keep-going', '--parallel'],
+        'valued': {'--parallel': None},
+        'variadic': False,
+    },
+    'component-list': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'component-services': {
+        'args': [None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'component-show': {
+        'args': [None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-add': {
+        'args': [None, None, None, None],
+        'options': ['--parameters'],
+        'valued': {'--parameters': None},
+        'variadic': False,
+    },
+    'datastore-attach': {
+        'args': ['datastore', 'zone', None],
+        'options': ['--secure'],
+        'valued': {'--secure': None},
+        'variadic': False,
+    },
+    'datastore-content': {
+        'args': ['datastore'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-delete': {
+        'args': ['datastore'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-detach': {
+        'args': ['datastore'],
+        'options': ['--force'],
+        'valued': {'--force': None},
+        'variadic': False,
+    },
+    'datastore-discovery': {
+        'args': [None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-discovery-batch': {
+        'args': [None],
+        'options': ['--concurrency', '--storage-type', '--timeout'],
+        'valued': {'--concurrency': None,
+                   '--storage-type': None,
+                   '--timeout': None},
+        'variadic': False,
+    },
+    'datastore-list': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-show': {
+        'args': ['datastore'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-space': {
+        'args': ['datastore'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-space-all': {
+        'args': [],
+        'options': ['--concurrency',
+                    '--content',
+                    '--json',
+                    '--reverse',
+                    '--sort-by'],
+        'valued': {'--concurrency': None,
+                   '--sort-by': ['free',
+                                 'free_percent',
+                                 'id',
+                                 'identifier',
+                                 'total',
+                                 'used']},
+        'variadic': False,
+    },
+    'datastore-update': {
+        'args': ['datastore', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-validate': {
+        'args': [None, None, None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'datastore-validate-batch': {
+        'args': [None],
+        'options': ['--concurrency', '--timeout'],
+        'valued': {'--concurrency': None, '--timeout': None},
+        'variadic': False,
+    },
+    'device-activate': {
+        'args': ['device', 'zone'],
+        'options': ['--lom-password', '--lom-user'],
+        'valued': {'--lom-password': None, '--lom-user': None},
+        'variadic': False,
+    },
+    'device-delete': {
+        'args': ['device'],
+        'options': ['--action', '--lom-password', '--lom-user'],
+        'valued': {'--action': None,
+                   '--lom-password': None,
+                   '--lom-user': None},
+        'variadic': False,
+    },
+    'device-list': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'device-onboard': {
+        'args': ['zone', 'role', 'device'],
+        'options': ['--checkpoint',
+                    '--interval',
+                    '--lom-password',
+                    '--lom-user',
+                    '--max-activating',
+                    '--max-deploying',
+                    '--retry-failed',
+                    '--timeout'],
+        'valued': {'--checkpoint': None,
+                   '--interval': None,
+                   '--lom-password': None,
+                   '--lom-user': None,
+                   '--max-activating': None,
+                   '--max-deploying': None,
+                   '--timeout': None},
+        'variadic': True,
+    },
+    'device-power-off': {
+        'args': ['device', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'device-power-on': {
+        'args': ['device', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'device-reboot': {
+        'args': ['device', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'device-replace': {
+        'args': ['device', 'zone', 'role', 'node'],
+        'options': ['--lom-password-node-to-add',
+                    '--lom-password-node-to-remove',
+                    '--lom-user-node-to-add',
+                    '--lom-user-node-to-remove'],
+        'valued': {'--lom-password-node-to-add': None,
+                   '--lom-password-node-to-remove': None,
+                   '--lom-user-node-to-add': None,
+                   '--lom-user-node-to-remove': None},
+        'variadic': False,
+    },
+    'device-show': {
+        'args': ['device'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'device-shutdown': {
+        'args': ['device'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'device-soft-reboot': {
+        'args': ['device'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'device-update': {
+        'args': ['device', None, None, None, None, None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'endpoints': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'global-property-apply': {
+        'args': [],
+        'options': ['--file'],
+        'valued': {'--file': None},
+        'variadic': False,
+    },
+    'global-property-create': {
+        'args': [None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'global-property-delete': {
+        'args': [None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'global-property-list': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'global-property-update': {
+        'args': [None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'help': {
+        'args': ['command'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'list-extensions': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'node-deactivate': {
+        'args': ['zone', 'node'],
+        'options': ['--action', '--lom-password', '--lom-user'],
+        'valued': {'--action': None,
+                   '--lom-password': None,
+                   '--lom-user': None},
+        'variadic': False,
+    },
+    'node-list': {
+        'args': ['zone'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'node-show': {
+        'args': ['zone', 'node'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'node-task-cancel': {
+        'args': ['zone', 'node', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'node-task-delete': {
+        'args': ['zone', 'node', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'node-task-state': {
+        'args': ['zone', 'node', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'node-tasks-list': {
+        'args': ['zone', 'node'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-create': {
+        'args': ['architecture', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-delete': {
+        'args': ['architecture', 'profile'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-json': {
+        'args': ['architecture', 'profile'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-list': {
+        'args': ['architecture'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-property-apply': {
+        'args': ['architecture', 'profile'],
+        'options': ['--file'],
+        'valued': {'--file': None},
+        'variadic': False,
+    },
+    'profile-property-create': {
+        'args': ['architecture', 'profile', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-property-delete': {
+        'args': ['architecture', 'profile', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-property-update': {
+        'args': ['architecture', 'profile', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-show': {
+        'args': ['architecture', 'profile'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'profile-update': {
+        'args': ['architecture', 'profile', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'role-component-json': {
+        'args': ['zone', 'role', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'role-component-list': {
+        'args': ['zone', 'role'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'role-component-show': {
+        'args': ['zone', 'role', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'role-component-update': {
+        'args': ['zone', 'role', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'role-deploy': {
+        'args': ['zone', 'role', 'node'],
+        'options': ['--bypass', '--hostname', '--no-dhcp-reload'],
+        'valued': {'--hostname': None},
+        'variadic': False,
+    },
+    'role-deploy-rolling': {
+        'args': ['zone', 'role', 'node'],
+        'options': ['--bypass',
+                    '--interval',
+                    '--max-failures',
+                    '--max-in-flight',
+                    '--no-dhcp-reload',
+                    '--timeout'],
+        'valued': {'--interval': None,
+                   '--max-failures': None,
+                   '--max-in-flight': None,
+                   '--timeout': None},
+        'variadic': True,
+    },
+    'role-list': {
+        'args': ['zone'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'role-show': {
+        'args': ['zone', 'role'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'service-execute': {
+        'args': ['zone', 'role', None, None, 'node'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'service-list': {
+        'args': ['zone', 'role', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'service-show': {
+        'args': ['zone', 'role', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'session': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'task-cancel-bulk': {
+        'args': ['zone'],
+        'options': ['--concurrency',
+                    '--dry-run',
+                    '--name',
+                    '--node',
+                    '--state'],
+        'valued': {'--concurrency': None,
+                   '--name': None,
+                   '--node': 'node',
+                   '--state': None},
+        'variadic': False,
+    },
+    'task-delete-bulk': {
+        'args': ['zone'],
+        'options': ['--concurrency', '--dry-run', '--older-than', '--state'],
+        'valued': {'--concurrency': None,
+                   '--older-than': None,
+                   '--state': None},
+        'variadic': False,
+    },
+    'task-query': {
+        'args': ['zone'],
+        'options': ['--failed',
+                    '--last',
+                    '--no-refresh',
+                    '--node',
+                    '--running',
+                    '--state'],
+        'valued': {'--last': None, '--node': 'node', '--state': None},
+        'variadic': False,
+    },
+    'zone-component-sync': {
+        'args': ['zone', None],
+        'options': ['--concurrency', '--dry-run'],
+        'valued': {'--concurrency': None},
+        'variadic': False,
+    },
+    'zone-create': {
+        'args': ['architecture', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-delete': {
+        'args': ['zone'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-json': {
+        'args': ['zone'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-list': {
+        'args': [],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-property-apply': {
+        'args': ['zone'],
+        'options': ['--file'],
+        'valued': {'--file': None},
+        'variadic': False,
+    },
+    'zone-property-create': {
+        'args': ['zone', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-property-delete': {
+        'args': ['zone', None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-property-update': {
+        'args': ['zone', None, None],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-restore': {
+        'args': ['zone', None],
+        'options': ['--concurrency', '--dry-run'],
+        'valued': {'--concurrency': None},
+        'variadic': False,
+    },
+    'zone-show': {
+        'args': ['zone'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-snapshot': {
+        'args': ['zone', None],
+        'options': ['--concurrency'],
+        'valued': {'--concurrency': None},
+        'variadic': False,
+    },
+    'zone-tasks-list': {
+        'args': ['zone'],
+        'options': [],
+        'valued': {},
+        'variadic': False,
+    },
+    'zone-watch': {
+        'args': ['zone'],
+        'options': ['--interval', '--iterations', '--kinds'],
+        'valued': {'--interval': None, '--iterations': None, '--kinds': None},
+        'variadic': False,
+    },
+}
+
+GLOBAL_OPTIONS = ['--cache',
+                  '--debug',
+                  '--endpoint-type',
+                  '--fields',
+                  '--format',
+                  '--insecure',
+                  '--offline',
+                  '--os-auth-url',
+                  '--os-automation-api-version',
+                  '--os-cacert',
+                  '--os-password',
+                  '--os-region-name',
+                  '--os-tenant-id',
+                  '--os-tenant-name',
+                  '--os-username',
+                  '--profile',
+                  '--retries',
+                  '--service-name',
+                  '--service-type',
+                  '--version',
+                  '--zones']
+
+GLOBAL_VALUED = {'--apikey': None,
+                 '--auth_url': None,
+                 '--endpoint-type': None,
+                 '--endpoint_type': None,
+                 '--fields': None,
+                 '--format': ['csv', 'json', 'ndjson', 'table', 'value'],
+                 '--os-auth-url': None,
+                 '--os-automation-api-version': None,
+                 '--os-cacert': None,
+                 '--os-password': None,
+                 '--os-region-name': None,
+                 '--os-tenant-id': None,
+                 '--os-tenant-name': None,
+                 '--os-username': None,
+                 '--os_auth_url': None,
+                 '--os_automation_api_version': None,
+                 '--os_password': None,
+                 '--os_region_name': None,
+                 '--os_tenant_id': None,
+                 '--os_tenant_name': None,
+                 '--os_username': None,
+                 '--password': None,
+                 '--profile': ['cpu', 'mem'],
+                 '--projectid': None,
+                 '--region_name': None,
+                 '--retries': None,
+                 '--service-name': None,
+                 '--service-type': None,
+                 '--service_name': None,
+                 '--service_type': None,
+                 '--tenant_name': None,
+                 '--url': None,
+                 '--username': None,
+                 '--zones': None}
+
+TABLE = {
+    'commands': COMMANDS,
+    'global_options': GLOBAL_OPTIONS,
+    'global_valued': GLOBAL_VALUED,
+}
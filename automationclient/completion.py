@@ -0,0 +1,258 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Shell completion of commands, options and resource IDs.
+
+Completing must be instant, so neither the parser of the shell nor the API
+are used: the commands come from the static table in
+:mod:`automationclient.command_table` and the IDs from the completion
+caches written by the resource listings.
+
+Regenerate the table after changing the commands with::
+
+    python -m automationclient.completion --generate \\
+        > automationclient/command_table.py
+"""
+
+from __future__ import print_function
+
+import hashlib
+import os
+import pprint
+import sys
+
+# Kind of resource completed for the arguments with these metavars.
+METAVAR_KINDS = {
+    '<zone-id>': 'zone',
+    '<zone>': 'zone',
+    '<node-id>': 'node',
+    '<node>': 'node',
+    '<mac>': 'device',
+    '<architecture-id>': 'architecture',
+    '<profile-id>': 'profile',
+    '<role-id>': 'role',
+    '<datastore-id>': 'datastore',
+    '<subcommand>': 'command',
+}
+
+# Completion cache holding the IDs of every kind of resource.
+ID_CACHE = 'id'
+
+
+def _env(*names, **kwargs):
+    for name in names:
+        value = os.environ.get(name)
+        if value:
+            return value
+    return kwargs.get('default', '')
+
+
+def cache_dir():
+    """Return the directory of the completion caches of the current user."""
+    base_dir = _env('CLIENT_UUID_CACHE_DIR', default="~/.automationclient")
+
+    # NOTE(sirp): Keep separate UUID caches for each username + endpoint
+    # pair
+    username = _env('OS_USERNAME', 'AUTOMATION_USERNAME')
+    url = _env('OS_URL', 'AUTOMATION_URL')
+    uniqifier = hashlib.md5(username.encode('utf-8') +
+                            url.encode('utf-8')).hexdigest()
+
+    return os.path.expanduser(os.path.join(base_dir, uniqifier))
+
+
+def cached_ids(kind):
+    """Return the IDs of the resources of ``kind`` seen in listings."""
+    path = os.path.join(cache_dir(), '%s-%s-cache' % (kind, ID_CACHE))
+    try:
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip()]
+    except IOError:
+        return []
+
+
+def _candidates(kind, table):
+    if isinstance(kind, list):
+        # The choices of the option.
+        return kind
+    if kind == 'command':
+        return sorted(table['commands'])
+    if kind:
+        return cached_ids(kind)
+    return []
+
+
+def complete(words, index, table=None):
+    """Return the completions of ``words[index]``.
+
+    :param words: the words of the command line, without the program name.
+    :param index: position of the word being completed.
+    :param table: the table of commands, by default the static one.
+    """
+    if table is None:
+        from automationclient import command_table
+        table = command_table.TABLE
+
+    words = list(words) + [''] * (index + 1 - len(words))
+    current = words[index]
+
+    # Walk the words before the current one, minding the option values.
+    command = None
+    positional = 0
+    valued = table['global_valued']
+    expects = None
+    for word in words[:index]:
+        if expects is not None:
+            expects = None
+            continue
+        if word.startswith('-'):
+            if word in valued:
+                expects = valued[word]
+            continue
+        if command is None:
+            command = table['commands'].get(word)
+            if command is None:
+                # Unknown command, nothing to complete.
+                return []
+            valued = dict(table['global_valued'], **command['valued'])
+        else:
+            positional += 1
+
+    if expects is not None:
+        candidates = _candidates(expects, table)
+    elif current.startswith('-'):
+        options = table['global_options']
+        if command is not None:
+            options = options + command['options']
+        candidates = options
+    elif command is None:
+        candidates = sorted(table['commands'])
+    else:
+        args = command['args']
+        kind = None
+        if positional < len(args):
+            kind = args[positional]
+        elif args and command['variadic']:
+            kind = args[-1]
+        candidates = _candidates(kind, table)
+
+    return sorted(set(candidate for candidate in candidates
+                      if candidate.startswith(current)))
+
+
+def generate_table(version='1.1'):
+    """Build the table of commands from the parser of the shell."""
+    import argparse
+
+    from automationclient import extension
+    from automationclient import shell
+
+    # Only the extensions shipped with the client, not the installed ones.
+    automation = shell.StackopsAutomationShell()
+    automation.extensions = [
+        extension.Extension(name, module) for name, module
+        in automation._discover_via_contrib_path(version)]
+    parser = automation.get_subcommand_parser(version)
+
+    def kinds(actions):
+        return dict((option, sorted(action.choices) if action.choices
+                     else METAVAR_KINDS.get(action.metavar))
+                    for action in actions if action.nargs != 0
+                    for option in action.option_strings)
+
+    def options(actions):
+        return sorted(option for action in actions
+                      for option in action.option_strings
+                      if action.help != argparse.SUPPRESS)
+
+    base_actions = [action for action in parser._actions
+                    if action.option_strings]
+    commands = {}
+    for name, subparser in automation.subcommands.items():
+        if name == 'bash_completion':
+            continue
+        optionals = [action for action in subparser._actions
+                     if action.option_strings]
+        positionals = [action for action in subparser._actions
+                       if not action.option_strings]
+        commands[name] = {
+            'args': [METAVAR_KINDS.get(action.metavar)
+                     for action in positionals],
+            'variadic': bool(positionals) and
+            positionals[-1].nargs in ('+', '*'),
+            'options': options(optionals),
+            'valued': kinds(optionals),
+        }
+
+    return {
+        'commands': commands,
+        'global_options': options(base_actions),
+        'global_valued': kinds(base_actions),
+    }
+
+
+def _format(prefix, value):
+    # Wrap the value below the end of ``prefix`` and before the comma.
+    text = pprint.pformat(value, width=78 - len(prefix))
+    return prefix + text.replace('\n', '\n' + ' ' * len(prefix))
+
+
+def format_table(table):
+    """Return the source of the module holding ``table``."""
+    lines = ['# Generated by "python -m automationclient.completion '
+             '--generate", do not edit.',
+             '',
+             'COMMANDS = {']
+    for name, command in sorted(table['commands'].items()):
+        lines.append('    %r: {' % name)
+        for key, value in sorted(command.items()):
+            lines.append(_format('        %r: ' % key, value) + ',')
+        lines.append('    },')
+    lines.extend(['}',
+                  '',
+                  _format('GLOBAL_OPTIONS = ', table['global_options']),
+                  '',
+                  _format('GLOBAL_VALUED = ', table['global_valued']),
+                  '',
+                  'TABLE = {',
+                  "    'commands': COMMANDS,",
+                  "    'global_options': GLOBAL_OPTIONS,",
+                  "    'global_valued': GLOBAL_VALUED,",
+                  '}'])
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Print the completions of a command line.
+
+    Usage: automation-complete <index> <word>...
+
+    with the words of the command line after the program name and the
+    position among them of the word being completed, as in
+    ``$((COMP_CWORD - 1)) "${COMP_WORDS[@]:1}"`` in bash.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == '--generate':
+        print(format_table(generate_table()))
+        return
+    if not argv or not argv[0].isdigit():
+        print(main.__doc__, file=sys.stderr)
+        sys.exit(2)
+    print(' '.join(complete(argv[1:], int(argv[0]))))
+
+
+if __name__ == '__main__':
+    main()
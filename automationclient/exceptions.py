@@ -43,6 +43,13 @@ class NoUniqueMatch(Exception):
     pass
 
 
+class LazyLoadDisallowed(Exception):
+    """A resource tried to lazy-load its details while the client was
+       running in strict loading mode.
+    """
+    pass
+
+
 class NoTokenLookupException(Exception):
     """This form of authentication does not support looking up
        endpoints from an existing token.
@@ -120,6 +127,14 @@ class NotFound(ClientException):
     message = "Not found"
 
 
+class PreconditionFailed(ClientException):
+    """
+    HTTP 412 - Precondition failed: the resource changed since it was read.
+    """
+    http_status = 412
+    message = "Precondition failed"
+
+
 class OverLimit(ClientException):
     """
     HTTP 413 - Over limit: you're over the API limits for this time period.
@@ -150,6 +165,7 @@ class HTTPNotImplemented(ClientException):
 # Instead, we have to hardcode it:
 _code_map = dict((c.http_status, c) for c in [BadRequest, Unauthorized,
                                               Forbidden, NotFound,
+                                              PreconditionFailed,
                                               OverLimit, InternalServerError,
                                               HTTPNotImplemented])
 
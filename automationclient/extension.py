@@ -13,9 +13,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import json
+import logging
+import os
+import pkgutil
+import sys
+import tempfile
+
 from automationclient import base
 from automationclient import utils
 
+logger = logging.getLogger(__name__)
+
+# Top level modules with this suffix anywhere in sys.path are extensions.
+EXTENSION_SUFFIX = 'python_automationclient_ext'
+
 
 class Extension(utils.HookableMixin):
     """Extension descriptor."""
@@ -37,3 +50,75 @@ class Extension(utils.HookableMixin):
 
     def __repr__(self):
         return "<Extension '%s'>" % self.name
+
+
+def _path_mtimes(paths):
+    mtimes = []
+    for path in paths:
+        path = os.path.abspath(path or os.curdir)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        mtimes.append([path, mtime])
+    return mtimes
+
+
+def _manifest_path():
+    """Return the manifest file of the running interpreter."""
+    base_dir = utils.env('CLIENT_UUID_CACHE_DIR',
+                         default="~/.automationclient")
+    interpreter = hashlib.md5((sys.executable + sys.version).encode(
+        'utf-8')).hexdigest()
+    return os.path.expanduser(os.path.join(base_dir,
+                                           'extensions-%s.json' % interpreter))
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _write_manifest(path, manifest):
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o755)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        # Without a manifest sys.path is just scanned again next time.
+        pass
+
+
+def find_python_path_extensions(manifest_path=None):
+    """Return the names of the extension modules found in sys.path.
+
+    Scanning every entry of sys.path is slow with large site-packages, so
+    the names found are kept in a manifest of the interpreter. It is used
+    as long as sys.path lists the same entries and none of them has been
+    modified since, as installing or removing a module changes the
+    modification time of its directory.
+
+    :param manifest_path: file of the manifest, by default one per
+                          interpreter in the client cache directory.
+    """
+    if manifest_path is None:
+        manifest_path = _manifest_path()
+    mtimes = _path_mtimes(sys.path)
+
+    manifest = _read_manifest(manifest_path)
+    if manifest and manifest.get('path') == mtimes:
+        return manifest['modules']
+
+    logger.debug("Scanning sys.path for extensions")
+    modules = sorted(name for (module_loader, name, ispkg)
+                     in pkgutil.iter_modules()
+                     if name.endswith(EXTENSION_SUFFIX))
+    _write_manifest(manifest_path, {'path': mtimes, 'modules': modules})
+    return modules
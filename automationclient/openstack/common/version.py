@@ -18,8 +18,6 @@
 Utilities for consuming the version from pkg_resources.
 """
 
-import pkg_resources
-
 
 class VersionInfo(object):
 
@@ -44,6 +42,7 @@ class VersionInfo(object):
     def _get_version_from_pkg_resources(self):
         """Get the version of the package from the pkg_resources record
         associated with the package."""
+        import pkg_resources
         try:
             requirement = pkg_resources.Requirement.parse(self.package)
             provider = pkg_resources.get_provider(requirement)
@@ -0,0 +1,289 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+CPU and memory profiling of the commands.
+
+The command runs under cProfile or tracemalloc, the raw statistics are
+written to a file of the working directory and a summary is printed on the
+standard error, telling apart the time (or memory) spent in the HTTP
+requests, the JSON encoding, the resources and the printing of the output.
+Without tracemalloc, before Python 3.4, the memory summary is the growth of
+the peak resident set size instead.
+"""
+
+from __future__ import print_function
+
+import dis
+import inspect
+import os
+import sys
+import threading
+import time
+
+from automationclient import exceptions
+
+PROFILE_MODES = ('cpu', 'mem')
+
+# Number of functions, or lines, of the summary.
+TOP = 10
+
+
+def _last_line(code):
+    # Nested functions and comprehensions have code objects of their own.
+    lines = [line for offset, line in dis.findlinestarts(code)
+             if line is not None]
+    lines.extend(_last_line(const) for const in code.co_consts
+                 if inspect.iscode(const))
+    return max(lines + [code.co_firstlineno])
+
+
+class _Category(object):
+    """Code, by file and line ranges, whose cost is summed together."""
+
+    def __init__(self, label, functions=(), directory=None):
+        self.label = label
+        self.directory = directory
+        self.spans = []
+        for function in functions:
+            # Properties are measured through their getters.
+            function = getattr(function, 'fget', function)
+            code = getattr(function, '__func__', function).__code__
+            self.spans.append((code.co_filename, code.co_firstlineno,
+                               _last_line(code) + 1))
+
+    def __contains__(self, location):
+        filename, lineno = location[:2]
+        if self.directory and filename.startswith(self.directory):
+            return True
+        return any(filename == span_file and first <= lineno < last
+                   for span_file, first, last in self.spans)
+
+
+def _methods(cls):
+    return [value for value in vars(cls).values()
+            if inspect.isfunction(value) or isinstance(value, property)]
+
+
+def categories():
+    """Return the categories of the summaries."""
+    from automationclient import base
+    from automationclient import client
+    from automationclient import utils
+
+    printers = [value for name, value in vars(utils).items()
+                if name.startswith('print_') and inspect.isfunction(value)]
+    json_dir = os.path.dirname(client.json.loads.__code__.co_filename)
+    json_dir += os.sep
+    return [
+        _Category('HTTP requests', [client.HTTPClient.request]),
+        _Category('JSON', directory=json_dir),
+        _Category('Resources', _methods(base.Resource)),
+        _Category('Output', printers),
+    ]
+
+
+def _find(location, cats):
+    for category in cats:
+        if location in category:
+            return category
+    return None
+
+
+def _cpu_times(stats, cats):
+    """Return the seconds spent in each category, by label.
+
+    The time of a category includes the functions it calls, but not the
+    ones of other categories it calls directly: the JSON decoding of a
+    reply is counted apart from the HTTP request that receives it.
+    """
+    inclusive = dict((category.label, 0.0) for category in cats)
+    nested = dict(inclusive)
+    for location, (cc, nc, tt, ct, callers) in stats.stats.items():
+        category = _find(location, cats)
+        if category is None:
+            continue
+        for caller, caller_stats in callers.items():
+            caller_category = _find(caller, cats)
+            if caller_category is category:
+                continue
+            inclusive[category.label] += caller_stats[3]
+            if caller_category is not None:
+                nested[caller_category.label] += caller_stats[3]
+    return dict((label, inclusive[label] - nested[label])
+                for label in inclusive)
+
+
+def _mem_sizes(snapshot, cats):
+    """Return the bytes still allocated by each category, by label.
+
+    Every allocation is counted in the innermost category of its traceback.
+    """
+    sizes = dict((category.label, 0) for category in cats)
+    for stat in snapshot.statistics('traceback'):
+        frames = list(stat.traceback)
+        if sys.version_info >= (3, 7):
+            # Sorted from the oldest frame to the most recent one.
+            frames.reverse()
+        for frame in frames:
+            category = _find((frame.filename, frame.lineno), cats)
+            if category is not None:
+                sizes[category.label] += stat.size
+                break
+    return sizes
+
+
+def _stats_path(mode, extension):
+    return os.path.join(os.getcwd(), 'automation-%s-%s-%d.%s' % (
+        mode, time.strftime('%Y%m%d-%H%M%S'), os.getpid(), extension))
+
+
+def _profile_cpu(func):
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        path = _stats_path('cpu', 'prof')
+        profiler.dump_stats(path)
+        stats = pstats.Stats(path, stream=sys.stderr)
+        cats = categories()
+        times = _cpu_times(stats, cats)
+
+        print("CPU profile written to %s" % path, file=sys.stderr)
+        print("Total: %.3fs" % stats.total_tt, file=sys.stderr)
+        for category in cats:
+            seconds = times[category.label]
+            share = 100.0 * seconds / stats.total_tt if stats.total_tt else 0
+            print("  %-15s %8.3fs %5.1f%%" % (category.label, seconds, share),
+                  file=sys.stderr)
+        stats.sort_stats('cumulative').print_stats(TOP)
+
+
+def _max_rss(resource):
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes, but bytes on OS X.
+    if sys.platform == 'darwin':
+        rss /= 1024
+    return rss
+
+
+def _rss_growth(func, cats, resource, growth):
+    """Call ``func``, adding to ``growth`` the KiB the peak resident set size
+    grew by in each category, by label.
+
+    The peak is read every time a function of a category is entered or
+    left, its growth since the previous reading is counted in the innermost
+    category running.
+    """
+    last = [_max_rss(resource)]
+    local = threading.local()
+
+    def account(stack):
+        rss = _max_rss(resource)
+        if stack:
+            growth[stack[-1][1].label] += rss - last[0]
+        last[0] = rss
+
+    def tracer(frame, event, arg):
+        stack = local.__dict__.setdefault('stack', [])
+        if event == 'call':
+            category = _find((frame.f_code.co_filename,
+                              frame.f_code.co_firstlineno), cats)
+            if category is not None:
+                account(stack)
+                stack.append((frame, category))
+        elif event == 'return' and stack and stack[-1][0] is frame:
+            account(stack)
+            stack.pop()
+
+    threading.setprofile(tracer)
+    sys.setprofile(tracer)
+    try:
+        return func()
+    finally:
+        sys.setprofile(None)
+        threading.setprofile(None)
+
+
+def _profile_rss(func):
+    try:
+        import resource
+    except ImportError:
+        raise exceptions.CommandError("Memory profiling needs Python 3.4 "
+                                      "or later, or the resource module")
+
+    cats = categories()
+    start = _max_rss(resource)
+    growth = dict((category.label, 0) for category in cats)
+    try:
+        return _rss_growth(func, cats, resource, growth)
+    finally:
+        peak = _max_rss(resource)
+        print("No tracemalloc, measuring the peak resident set size",
+              file=sys.stderr)
+        print("Peak: %.1f KiB, grown by %.1f KiB"
+              % (peak, peak - start), file=sys.stderr)
+        for category in cats:
+            print("  %-15s %8.1f KiB" % (category.label,
+                                         growth[category.label]),
+                  file=sys.stderr)
+
+
+def _profile_mem(func):
+    try:
+        import tracemalloc
+    except ImportError:
+        return _profile_rss(func)
+
+    tracemalloc.start(25)
+    try:
+        return func()
+    finally:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)])
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        path = _stats_path('mem', 'snapshot')
+        snapshot.dump(path)
+        cats = categories()
+        sizes = _mem_sizes(snapshot, cats)
+
+        print("Memory snapshot written to %s" % path, file=sys.stderr)
+        print("Peak: %.1f KiB, still allocated: %.1f KiB"
+              % (peak / 1024.0, current / 1024.0), file=sys.stderr)
+        for category in cats:
+            print("  %-15s %8.1f KiB"
+                  % (category.label, sizes[category.label] / 1024.0),
+                  file=sys.stderr)
+        for stat in snapshot.statistics('lineno')[:TOP]:
+            print("  %s" % stat, file=sys.stderr)
+
+
+def profile(mode, func):
+    """Call ``func`` under the ``mode`` profiler and return its result.
+
+    :param mode: 'cpu' to measure the time with cProfile, 'mem' to measure
+                 the memory with tracemalloc, or the peak resident set
+                 size where tracemalloc is missing.
+    """
+    if mode == 'cpu':
+        return _profile_cpu(func)
+    elif mode == 'mem':
+        return _profile_mem(func)
+    raise exceptions.CommandError("Unknown profile '%s', use one of: %s"
+                                  % (mode, ', '.join(PROFILE_MODES)))
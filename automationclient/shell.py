@@ -22,22 +22,21 @@ Command-line interface to the Stackops Automation API.
 from __future__ import print_function
 
 import argparse
-import glob
-import imp
 import itertools
-import os
 import pkgutil
+import shlex
 import sys
+import threading
 import logging
 
 import six
 
-from automationclient import client
 from automationclient import exceptions as exc
 import automationclient.extension
+from automationclient.openstack.common import importutils
 from automationclient.openstack.common import strutils
+from automationclient import profiling
 from automationclient import utils
-from automationclient.v1_1 import shell as shell_v1
 
 DEFAULT_OS_AUTOMATION_API_VERSION = "1.1"
 DEFAULT_AUTOMATION_ENDPOINT_TYPE = 'publicURL'
@@ -68,8 +67,31 @@ class AutomationClientArgumentParser(argparse.ArgumentParser):
                       'subp': progparts[2]})
 
 
+class VersionAction(argparse.Action):
+    """Print the version of the client and exit.
+
+    Unlike the 'version' action of argparse the version is only looked up
+    when the option is given, as that is slow.
+    """
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS,
+                 default=argparse.SUPPRESS, help=None):
+        super(VersionAction, self).__init__(option_strings=option_strings,
+                                            dest=dest, default=default,
+                                            nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.exit(message="%s\n"
+                    % automationclient.version_info.version_string())
+
+
 class StackopsAutomationShell(object):
 
+    def __init__(self, clients=None):
+        # Authenticated clients kept by credentials between commands, by
+        # the agent. None to always build a new one.
+        self.clients = clients
+
     def get_base_parser(self):
         parser = AutomationClientArgumentParser(
             prog='automation',
@@ -86,8 +108,7 @@ class StackopsAutomationShell(object):
                             help=argparse.SUPPRESS)
 
         parser.add_argument('--version',
-                            action='version',
-                            version=automationclient.__version__)
+                            action=VersionAction)
 
         parser.add_argument('--debug',
                             action='store_true',
@@ -196,12 +217,70 @@ class StackopsAutomationShell(object):
                                  'against any certificate authorities. This '
                                  'option should be used with caution.')
 
+        parser.add_argument('--format',
+                            metavar='<format>',
+                            choices=utils.OUTPUT_FORMATS,
+                            default=utils.env('AUTOMATIONCLIENT_FORMAT',
+                                              default='table'),
+                            help='Output format of the commands: %s. '
+                                 'Every format but table is written as the '
+                                 'rows arrive. Defaults to '
+                                 'env[AUTOMATIONCLIENT_FORMAT] or table.'
+                                 % ', '.join(utils.OUTPUT_FORMATS))
+
+        parser.add_argument('--fields',
+                            metavar='<field,...>',
+                            default=None,
+                            help='Comma separated fields to print, in '
+                                 'order, instead of the default columns of '
+                                 'the list and show commands. Listings of '
+                                 'devices and tasks load only these fields.')
+
+        parser.add_argument('--zones',
+                            metavar='<zone-id,...|all>',
+                            default=None,
+                            help="Run a zone listing (node-list, role-list, "
+                                 "zone-tasks-list) for these comma "
+                                 "separated zones, or 'all' of them, at "
+                                 "once and print the results with a zone "
+                                 "column.")
+
         parser.add_argument('--retries',
                             metavar='<retries>',
                             type=int,
                             default=0,
                             help='Number of retries.')
 
+        parser.add_argument('--cache',
+                            default=strutils.bool_from_string(
+                                utils.env('AUTOMATIONCLIENT_CACHE')),
+                            action='store_true',
+                            help='Serve repeated reads of architectures, '
+                                 'profiles, zones, roles and components '
+                                 'from a local cache. Defaults to '
+                                 'env[AUTOMATIONCLIENT_CACHE].')
+
+        parser.add_argument('--offline',
+                            default=strutils.bool_from_string(
+                                utils.env('AUTOMATIONCLIENT_OFFLINE')),
+                            action='store_true',
+                            help='Serve cached responses, even expired '
+                                 'ones, when the API is unreachable. '
+                                 'Implies --cache. Defaults to '
+                                 'env[AUTOMATIONCLIENT_OFFLINE].')
+
+        parser.add_argument('--profile',
+                            metavar='<kind>',
+                            choices=profiling.PROFILE_MODES,
+                            default=utils.env('AUTOMATIONCLIENT_PROFILE')
+                            or None,
+                            help='Profile the command, cpu with cProfile or '
+                                 'mem with tracemalloc (the peak resident '
+                                 'set size without it), write the '
+                                 'statistics to the current directory and '
+                                 'print a summary. Defaults to '
+                                 'env[AUTOMATIONCLIENT_PROFILE].')
+
         # FIXME(dtroyer): The args below are here for diablo compatibility,
         #                 remove them in folsum cycle
 
@@ -230,12 +309,39 @@ class StackopsAutomationShell(object):
 
         return parser
 
-    def get_subcommand_parser(self, version):
+    def get_subcommand_parser(self, version, command=None):
+        """Build the parser of the subcommands.
+
+        Adding a subparser for every command takes most of the startup
+        time, so with ``command`` only the parser of that command is built.
+        The full parser is built when the command is unknown, to let
+        argparse report it.
+        """
         parser = self.get_base_parser()
 
         self.subcommands = {}
         subparsers = parser.add_subparsers(metavar='<subcommand>')
 
+        action_modules = self._get_action_modules(version)
+
+        if command is not None:
+            callback = self._find_action(action_modules, command)
+            if callback is not None:
+                self._add_subparser(subparsers, command, callback)
+                return parser
+
+        for actions_module in action_modules:
+            self._find_actions(subparsers, actions_module)
+
+        self._add_bash_completion_subparser(subparsers)
+
+        return parser
+
+    def _get_action_modules(self, version):
+        # Imported here, with the API modules it depends on, so --version
+        # does not pay for them.
+        from automationclient.v1_1 import shell as shell_v1
+
         try:
             actions_module = {
                 '1.1': shell_v1,
@@ -243,15 +349,8 @@ class StackopsAutomationShell(object):
         except KeyError:
             actions_module = shell_v1
 
-        self._find_actions(subparsers, actions_module)
-        self._find_actions(subparsers, self)
-
-        for extension in self.extensions:
-            self._find_actions(subparsers, extension.module)
-
-        self._add_bash_completion_subparser(subparsers)
-
-        return parser
+        return ([actions_module, self] +
+                [extension.module for extension in self.extensions])
 
     def _discover_extensions(self, version):
         extensions = []
@@ -265,29 +364,23 @@ class StackopsAutomationShell(object):
         return extensions
 
     def _discover_via_python_path(self, version):
-        for (module_loader, name, ispkg) in pkgutil.iter_modules():
-            if name.endswith('python_automationclient_ext'):
-                if not hasattr(module_loader, 'load_module'):
-                    # Python 2.6 compat: actually get an ImpImporter obj
-                    module_loader = module_loader.find_module(name)
-
-                module = module_loader.load_module(name)
-                yield name, module
+        for name in automationclient.extension.find_python_path_extensions():
+            yield name, importutils.import_module(name)
 
     def _discover_via_contrib_path(self, version):
-        module_path = os.path.dirname(os.path.abspath(__file__))
         version_str = "v%s" % version.replace('.', '_')
-        ext_path = os.path.join(module_path, version_str, 'contrib')
-        ext_glob = os.path.join(ext_path, "*.py")
-
-        for ext_path in glob.iglob(ext_glob):
-            name = os.path.basename(ext_path)[:-3]
+        package = 'automationclient.%s.contrib' % version_str
+        try:
+            contrib = importutils.import_module(package)
+        except ImportError:
+            return
 
-            if name == "__init__":
+        # Imported as submodules of the package so their bytecode is cached.
+        for (module_loader, name, ispkg) in pkgutil.iter_modules(
+                contrib.__path__):
+            if ispkg:
                 continue
-
-            module = imp.load_source(name, ext_path)
-            yield name, module
+            yield name, importutils.import_module('%s.%s' % (package, name))
 
     def _add_bash_completion_subparser(self, subparsers):
         subparser = subparsers.add_parser(
@@ -303,25 +396,53 @@ class StackopsAutomationShell(object):
             # I prefer to be hypen-separated instead of underscores.
             command = attr[3:].replace('_', '-')
             callback = getattr(actions_module, attr)
-            desc = callback.__doc__ or ''
-            help = desc.strip().split('\n')[0]
-            arguments = getattr(callback, 'arguments', [])
-
-            subparser = subparsers.add_parser(
-                command,
-                help=help,
-                description=desc,
-                add_help=False,
-                formatter_class=StackopsHelpFormatter)
-
-            subparser.add_argument('-h', '--help',
-                                   action='help',
-                                   help=argparse.SUPPRESS,)
-
-            self.subcommands[command] = subparser
-            for (args, kwargs) in arguments:
-                subparser.add_argument(*args, **kwargs)
-            subparser.set_defaults(func=callback)
+            self._add_subparser(subparsers, command, callback)
+
+    def _find_action(self, action_modules, command):
+        """Return the callback of ``command``, or None if it is unknown.
+
+        As with the full parser, the last module defining the command wins.
+        """
+        callback = None
+        attr = 'do_%s' % command.replace('-', '_')
+        for actions_module in action_modules:
+            callback = getattr(actions_module, attr, callback)
+        return callback
+
+    def _add_subparser(self, subparsers, command, callback):
+        desc = callback.__doc__ or ''
+        help = desc.strip().split('\n')[0]
+        arguments = getattr(callback, 'arguments', [])
+
+        subparser = subparsers.add_parser(
+            command,
+            help=help,
+            description=desc,
+            add_help=False,
+            formatter_class=StackopsHelpFormatter)
+
+        subparser.add_argument('-h', '--help',
+                               action='help',
+                               help=argparse.SUPPRESS,)
+
+        self.subcommands[command] = subparser
+        for (args, kwargs) in arguments:
+            subparser.add_argument(*args, **kwargs)
+        subparser.set_defaults(func=callback)
+
+    def _get_command(self, args):
+        """Return the subcommand invoked, if it can be built on its own.
+
+        :param args: the arguments left after parsing the global options.
+        """
+        for arg in args:
+            if arg.startswith('-'):
+                continue
+            if arg in ('help', 'bash-completion', 'bash_completion'):
+                # They need every subcommand.
+                return None
+            return arg
+        return None
 
     def setup_debugging(self, debug):
         if not debug:
@@ -337,15 +458,25 @@ class StackopsAutomationShell(object):
         # Parse args once to find version and debug settings
         parser = self.get_base_parser()
         (options, args) = parser.parse_known_args(argv)
+        if options.profile:
+            return profiling.profile(
+                options.profile, lambda: self._main(argv, options, args))
+        return self._main(argv, options, args)
+
+    def _main(self, argv, options, args):
         self.setup_debugging(options.debug)
+        self.api_version = options.os_automation_api_version
 
         # build available subcommands based on version
         self.extensions = self._discover_extensions(
             options.os_automation_api_version)
         self._run_extension_hooks('__pre_parse_args__')
 
+        command = None
+        if not options.help:
+            command = self._get_command(args)
         subcommand_parser = self.get_subcommand_parser(
-            options.os_automation_api_version)
+            options.os_automation_api_version, command=command)
         self.parser = subcommand_parser
 
         if options.help or not argv:
@@ -354,6 +485,11 @@ class StackopsAutomationShell(object):
 
         args = subcommand_parser.parse_args(argv)
         self._run_extension_hooks('__post_parse_args__', args)
+        output_format, fields = self._command_options(args)
+        utils.set_output_format(output_format)
+        utils.set_output_fields(fields)
+        # The defaults of the global options of session and batch lines.
+        self.options = args
 
         # Short-circuit and deal with help right away.
         if args.func == self.do_help:
@@ -362,6 +498,9 @@ class StackopsAutomationShell(object):
         elif args.func == self.do_bash_completion:
             self.do_bash_completion(args)
             return 0
+        elif args.func == self.do_agent:
+            self.do_agent(args)
+            return 0
 
         (os_username, os_password, os_tenant_name, os_auth_url,
          os_region_name, os_tenant_id, endpoint_type, insecure,
@@ -431,6 +570,19 @@ class StackopsAutomationShell(object):
                 "You must provide an auth url "
                 "via either --os-auth-url or env[OS_AUTH_URL]")
 
+        # Only the commands talking to the API need requests.
+        from automationclient import client
+
+        credentials = (options.os_automation_api_version, os_username,
+                       os_password, os_tenant_name, os_tenant_id, os_auth_url,
+                       insecure, os_region_name, endpoint_type, service_type,
+                       service_name, options.retries, args.debug, cacert,
+                       args.cache, args.offline)
+        if self.clients is not None and credentials in self.clients:
+            self.cs = self.clients[credentials]
+            self._run(args)
+            return
+
         self.cs = client.Client(options.os_automation_api_version, os_username,
                                 os_password, os_tenant_name, os_auth_url,
                                 insecure, region_name=os_region_name,
@@ -441,8 +593,11 @@ class StackopsAutomationShell(object):
                                 service_name=service_name,
                                 retries=options.retries,
                                 http_log_debug=args.debug,
-                                cacert=cacert)
+                                cacert=cacert,
+                                cache=args.cache or args.offline,
+                                offline=args.offline)
 
+        reachable = True
         try:
             if not utils.isunauthenticated(args.func):
                 self.cs.authenticate()
@@ -450,18 +605,38 @@ class StackopsAutomationShell(object):
             raise exc.CommandError("Invalid OpenStack Automation credentials.")
         except exc.AuthorizationFailure:
             raise exc.CommandError("Unable to authorize user")
-
-        endpoint_api_version = \
-            self.cs.get_automation_api_version_from_endpoint()
-        if endpoint_api_version != options.os_automation_api_version:
-            msg = (("Automation API version is set to %s "
-                    "but you are accessing a %s endpoint. "
-                    "Change its value via either --os-automation-api-version "
-                    "or env[OS_AUTOMATION_API_VERSION]")
-                   % (options.os_automation_api_version, endpoint_api_version))
-            raise exc.InvalidAPIVersion(msg)
-
-        args.func(self.cs, args)
+        except client.CONNECTION_ERRORS:
+            if not args.offline:
+                raise
+            logger.debug("API unreachable, serving cached responses")
+            reachable = False
+
+        if reachable:
+            endpoint_api_version = \
+                self.cs.get_automation_api_version_from_endpoint()
+            if endpoint_api_version != options.os_automation_api_version:
+                msg = (("Automation API version is set to %s "
+                        "but you are accessing a %s endpoint. "
+                        "Change its value via either "
+                        "--os-automation-api-version "
+                        "or env[OS_AUTOMATION_API_VERSION]")
+                       % (options.os_automation_api_version,
+                          endpoint_api_version))
+                raise exc.InvalidAPIVersion(msg)
+
+            if self.clients is not None:
+                self.cs.client.open_session()
+                self.clients[credentials] = self.cs
+
+        self._run(args)
+
+    def _run(self, args):
+        try:
+            args.func(self.cs, args)
+        finally:
+            cache = getattr(self.cs.client, 'cache', None)
+            if cache is not None:
+                logger.debug("Cache stats: %s" % cache.stats())
 
     def _run_extension_hooks(self, hook_type, *args, **kwargs):
         """Run hooks for all registered extensions."""
@@ -500,6 +675,224 @@ class StackopsAutomationShell(object):
         else:
             self.parser.print_help()
 
+    @utils.arg('--socket', metavar='<path>',
+               default=None,
+               help='Socket to listen on. Defaults to '
+                    'env[AUTOMATIONCLIENT_AGENT_SOCKET] or agent.sock in '
+                    'the client cache directory.')
+    @utils.arg('--idle-timeout', metavar='<seconds>',
+               type=float, default=3600,
+               help='Exit after this number of seconds without commands, '
+                    '0 to never exit (Default=3600).')
+    @utils.arg('--stop',
+               default=False,
+               action='store_true',
+               help='Stop the running agent.')
+    def do_agent(self, args):
+        """
+        Run commands sent by the automation command with warm clients.
+
+        While the agent runs, the automation command forwards its arguments
+        to it instead of starting, authenticating and connecting again.
+        Set env[AUTOMATIONCLIENT_NO_AGENT] to bypass it.
+        """
+        from automationclient import agent
+
+        path = args.socket or agent.socket_path()
+        if args.stop:
+            if not agent.stop(path):
+                raise exc.CommandError("No agent is listening on %s" % path)
+            return
+        agent.Agent(path, idle_timeout=args.idle_timeout or None).serve()
+
+    def _command_options(self, args):
+        """Check the global options of the parsed command line ``args``.
+
+        :rtype: tuple with its output format and fields.
+        """
+        if args.zones and not utils.fans_out_zones(args.func):
+            raise exc.CommandError("--zones is not supported by the %s "
+                                   "command" % args.func.__name__[3:]
+                                   .replace('_', '-'))
+        return args.format, args.fields.split(',') if args.fields else None
+
+    def _run_line(self, line, label):
+        """Run one subcommand line with the client of the session.
+
+        Errors are printed, prefixed with ``label``, instead of ending the
+        session.
+
+        :rtype: whether the command succeeded.
+        """
+        try:
+            argv = shlex.split(line)
+            # The output options not given in the line are the ones of
+            # the session.
+            args = self.parser.parse_args(argv, argparse.Namespace(
+                format=self.options.format, fields=self.options.fields))
+            self._run_extension_hooks('__post_parse_args__', args)
+            if args.func in (self.do_session, self.do_batch,
+                             self.do_agent):
+                raise exc.CommandError("Sessions can not be nested")
+            with utils.output_options(*self._command_options(args)):
+                if args.func in (self.do_help, self.do_bash_completion):
+                    args.func(args)
+                else:
+                    args.func(self.cs, args)
+        except SystemExit as e:
+            # Raised by argparse, for which 0 is a printed help, and by the
+            # commands rejecting their input files.
+            if e.code == 0:
+                return True
+            print("ERROR: %s: command exited" % label, file=sys.stderr)
+            return False
+        except Exception as e:
+            logger.debug(e, exc_info=1)
+            print("ERROR: %s: %s" % (label, e), file=sys.stderr)
+            return False
+        return True
+
+    def _start_session(self, cs):
+        # Every subcommand is available from now on, and the connections
+        # to the API are kept open between them.
+        self.parser = self.get_subcommand_parser(self.api_version)
+        cs.client.open_session()
+
+    @utils.service_type('automation')
+    def do_session(self, cs, args):
+        """
+        Run subcommands typed interactively with a single authenticated
+        client, until 'exit' or end of file.
+        """
+        self._start_session(cs)
+        try:
+            # Line editing and history, where available.
+            import readline  # noqa
+        except ImportError:
+            pass
+
+        prompt = 'automation> ' if sys.stdin.isatty() else ''
+        number = 0
+        while True:
+            try:
+                line = six.moves.input(prompt)
+            except EOFError:
+                break
+            except KeyboardInterrupt:
+                print()
+                continue
+            number += 1
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line in ('exit', 'quit'):
+                break
+            self._run_line(line, 'line %d' % number)
+
+    @utils.arg('file', metavar='<file>',
+               help="File with a subcommand per line, '-' to read them from "
+                    "the standard input. Empty lines and lines starting "
+                    "with '#' are skipped.")
+    @utils.arg('--parallel', metavar='<count>',
+               type=int, default=1,
+               help="Run up to this number of lines at once. Lines between "
+                    "two 'wait' lines must not depend on each other "
+                    "(Default=1).")
+    @utils.arg('--keep-going',
+               default=False,
+               action='store_true',
+               help='Run the remaining lines after a failed one.')
+    @utils.service_type('automation')
+    def do_batch(self, cs, args):
+        """
+        Run the subcommands of a file with a single authenticated client.
+        """
+        if args.file == '-':
+            lines = sys.stdin.readlines()
+        else:
+            try:
+                with open(args.file) as f:
+                    lines = f.readlines()
+            except IOError as e:
+                raise exc.CommandError("Unable to read %s: %s"
+                                       % (args.file, e))
+
+        # Groups of (number, line) that can run at the same time.
+        groups = [[]]
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line == 'wait':
+                groups.append([])
+            elif args.parallel > 1:
+                groups[-1].append((number, line))
+            else:
+                groups.append([(number, line)])
+
+        self._start_session(cs)
+        total = sum(len(group) for group in groups)
+        failed = []
+        for group in groups:
+            if not group:
+                continue
+            if len(group) == 1:
+                number, line = group[0]
+                results = [self._run_line(line, 'line %d' % number)]
+            else:
+                results = self._run_lines(group, args.parallel)
+            failed.extend(number for (number, line), ok
+                          in zip(group, results) if not ok)
+            if failed and not args.keep_going:
+                break
+
+        if failed:
+            raise exc.CommandError("%d of %d commands failed, on lines %s"
+                                   % (len(failed), total,
+                                      ', '.join(str(number)
+                                                for number in failed)))
+
+    def _run_lines(self, group, concurrency):
+        """Run the lines of ``group`` at once, printing their output in
+        order once they all finished.
+        """
+        output = _ThreadOutput(sys.stdout)
+
+        def run(item):
+            number, line = item
+            output.local.buffer = six.StringIO()
+            try:
+                ok = self._run_line(line, 'line %d' % number)
+                return ok, output.local.buffer.getvalue()
+            finally:
+                del output.local.buffer
+
+        sys.stdout = output
+        try:
+            results = utils.parallel_map(run, group, concurrency)
+        finally:
+            sys.stdout = output.stream
+
+        for ok, text in results:
+            sys.stdout.write(text)
+        return [ok for ok, text in results]
+
+
+class _ThreadOutput(object):
+    """Stand-in for sys.stdout writing the output of every thread with a
+    buffer set to that buffer.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, data):
+        getattr(self.local, 'buffer', self.stream).write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
 
 # I'm picky about my shell help.
 class StackopsHelpFormatter(argparse.HelpFormatter):
@@ -509,23 +902,50 @@ class StackopsHelpFormatter(argparse.HelpFormatter):
         super(StackopsHelpFormatter, self).start_section(heading)
 
 
-def main():
+def run(argv, clients=None):
+    """Run the command line ``argv`` and return its exit status.
+
+    :param clients: dictionary of the clients kept between commands, see
+                    :class:`StackopsAutomationShell`.
+    """
     try:
-        if sys.version_info >= (3, 0):
-            StackopsAutomationShell().main(sys.argv[1:])
-        else:
-            StackopsAutomationShell().main(map(strutils.safe_decode,
-                                               sys.argv[1:]))
+        StackopsAutomationShell(clients=clients).main(argv)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
     except KeyboardInterrupt:
         print("... terminating automation client", file=sys.stderr)
-        sys.exit(130)
+        return 130
     except Exception as e:
         logger.debug(e, exc_info=1)
         message = e.message
         if not isinstance(message, six.string_types):
             message = str(message)
         print("ERROR: %s" % strutils.safe_encode(message), file=sys.stderr)
-        sys.exit(1)
+        return 1
+    return 0
+
+
+def main():
+    if sys.version_info >= (3, 0):
+        argv = sys.argv[1:]
+    else:
+        argv = [strutils.safe_decode(arg) for arg in sys.argv[1:]]
+
+    # Imported here, it is only a socket away from the running agent.
+    from automationclient import agent
+
+    try:
+        status = agent.forward(argv)
+    except KeyboardInterrupt:
+        # The agent aborts the command once it sees the socket closed.
+        print("... terminating automation client", file=sys.stderr)
+        status = 130
+    if status is None:
+        status = run(argv)
+    sys.exit(status)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import socket
+import threading
+
+import fixtures
+import mock
+from six import moves
+
+from automationclient import agent
+from automationclient.tests import utils
+from automationclient.tests.v1_1 import fakes
+
+
+FAKE_ENV = {
+    'OS_USERNAME': 'username',
+    'OS_PASSWORD': 'password',
+    'OS_TENANT_NAME': 'tenant_name',
+    'OS_AUTH_URL': 'http://no.where',
+}
+
+
+def _messages(sock):
+    return [json.loads(line.decode('utf-8'))
+            for line in sock.makefile('rb')]
+
+
+class AgentTest(utils.TestCase):
+
+    def setUp(self):
+        super(AgentTest, self).setUp()
+        for var in FAKE_ENV:
+            self.useFixture(fixtures.EnvironmentVariable(var, FAKE_ENV[var]))
+        self.useFixture(fixtures.MonkeyPatch(
+            'automationclient.client.get_client_class',
+            lambda *_: fakes.FakeClient))
+        self.agent = agent.Agent('unused')
+
+    def _request(self, message):
+        ours, theirs = socket.socketpair()
+        agent._send(ours, message)
+        self.agent.handle(theirs)
+        theirs.close()
+        try:
+            return _messages(ours)
+        finally:
+            ours.close()
+
+    def test_command_output_and_status(self):
+        messages = self._request({'argv': ['zone-show', '1234'],
+                                  'env': FAKE_ENV, 'cwd': os.getcwd()})
+        self.assertEqual(messages[-1], {'exit': 0})
+        output = ''.join(message.get('out', '') for message in messages)
+        self.assertIn('fake_zone', output)
+
+    def test_clients_are_reused(self):
+        request = {'argv': ['zone-list'], 'env': FAKE_ENV}
+        self._request(request)
+        self._request(request)
+        self.assertEqual(len(self.agent.clients), 1)
+
+        other = dict(FAKE_ENV, OS_USERNAME='other')
+        self._request({'argv': ['zone-list'], 'env': other})
+        self.assertEqual(len(self.agent.clients), 2)
+
+    def test_command_error(self):
+        messages = self._request({'argv': ['zone-show', 'foo'],
+                                  'env': FAKE_ENV})
+        self.assertEqual(messages[-1], {'exit': 2})
+        self.assertTrue([message for message in messages if 'err' in message])
+
+    def test_environment_is_restored(self):
+        self._request({'argv': ['zone-list'],
+                       'env': dict(FAKE_ENV, OS_REGION_NAME='elsewhere')})
+        self.assertNotIn('OS_REGION_NAME', os.environ)
+        self.assertEqual(os.environ['OS_USERNAME'], 'username')
+
+    def test_client_gone(self):
+        ours, theirs = socket.socketpair()
+        agent._send(ours, {'argv': ['zone-list'], 'env': FAKE_ENV})
+        # The client went away before any output.
+        ours.close()
+        with mock.patch('automationclient.shell.run') as run:
+            def write_forever(argv, clients):
+                while True:
+                    print('still running')
+            run.side_effect = write_forever
+            self.agent.handle(theirs)
+        theirs.close()
+        self.assertFalse(self.agent.stopped)
+
+    def test_stop(self):
+        self.assertEqual(self._request({'stop': True}), [{'exit': 0}])
+        self.assertTrue(self.agent.stopped)
+
+
+class ForwardTest(utils.TestCase):
+
+    def setUp(self):
+        super(ForwardTest, self).setUp()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'AUTOMATIONCLIENT_NO_AGENT'))
+        self.useFixture(fixtures.EnvironmentVariable(
+            'AUTOMATIONCLIENT_DEBUG'))
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'agent.sock')
+
+    def _serve_once(self, replies):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen(1)
+        received = []
+
+        def serve():
+            conn, address = server.accept()
+            received.append(json.loads(
+                conn.makefile('rb').readline().decode('utf-8')))
+            for reply in replies:
+                agent._send(conn, reply)
+            conn.close()
+            server.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        self.addCleanup(thread.join)
+        return received
+
+    def test_forward(self):
+        received = self._serve_once([{'out': 'hello\n'}, {'exit': 3}])
+        stdout = moves.StringIO()
+        with mock.patch('sys.stdout', stdout):
+            self.assertEqual(agent.forward(['zone-list'], path=self.path), 3)
+        self.assertEqual(stdout.getvalue(), 'hello\n')
+        self.assertEqual(received[0]['argv'], ['zone-list'])
+        self.assertEqual(received[0]['cwd'], os.getcwd())
+
+    def test_no_agent(self):
+        self.assertEqual(agent.forward(['zone-list'], path=self.path), None)
+
+    def test_stale_socket(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        sock.close()
+        self.assertEqual(agent.forward(['zone-list'], path=self.path), None)
+
+    def test_local_commands(self):
+        self._serve_once([{'exit': 0}])
+        self.assertEqual(agent.forward(['session'], path=self.path), None)
+        self.assertEqual(agent.forward(['zone-watch', '1234'],
+                                       path=self.path), None)
+        self.assertEqual(agent.forward(['batch', '-'], path=self.path), None)
+        self.assertEqual(agent.forward(['--debug', 'zone-list'],
+                                       path=self.path), None)
+        # Let the server go.
+        self.assertEqual(agent.forward(['zone-list'], path=self.path), 0)
+
+    def test_closed_connection(self):
+        self._serve_once([{'out': 'partial'}])
+        stdout = moves.StringIO()
+        with mock.patch('sys.stdout', stdout):
+            with mock.patch('sys.stderr', moves.StringIO()):
+                self.assertEqual(agent.forward(['zone-list'],
+                                               path=self.path), 1)
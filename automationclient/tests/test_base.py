@@ -14,9 +14,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
+import fixtures
+
 from automationclient import base
 from automationclient import exceptions
+from automationclient import utils as client_utils
 from automationclient.v1_1 import devices
+from automationclient.v1_1 import zones
 from automationclient.tests import utils
 from automationclient.tests.v1_1 import fakes
 
@@ -62,3 +68,107 @@ class BaseTest(utils.TestCase):
         self.assertRaises(exceptions.NotFound,
                           cs.devices.find,
                           vegetable='carrot')
+
+    def test_hydrate(self):
+        resources = [zones.Zone(cs.zones, {'id': 1234}),
+                     zones.Zone(cs.zones, {'id': 1234, 'name': 'loaded'},
+                                loaded=True)]
+        cs.clear_callstack()
+        hydrated = cs.zones.hydrate(resources, concurrency=4)
+        self.assertEqual(hydrated, resources)
+        self.assertEqual(cs.client.callstack,
+                         [('GET', '/zones/1234', None)])
+        self.assertTrue(resources[0].is_loaded())
+        self.assertEqual(resources[0].name, 'fake_zone')
+        self.assertEqual(resources[1].name, 'loaded')
+
+    def test_strict_loading(self):
+        strict_cs = fakes.FakeClient()
+        strict_cs.strict_loading = True
+        zone = zones.Zone(strict_cs.zones, {'id': 1234})
+        self.assertRaises(exceptions.LazyLoadDisallowed, getattr, zone,
+                          'name')
+        self.assertEqual(strict_cs.client.callstack, [])
+
+        strict_cs.zones.hydrate([zone])
+        self.assertEqual(zone.name, 'fake_zone')
+
+    def _isolated_cache(self):
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('CLIENT_UUID_CACHE_DIR',
+                                                     cache_dir))
+
+    def test_merged_completion_cache(self):
+        self._isolated_cache()
+        cache_dir = cs.zones._cache_dir()
+        with cs.zones.merged_completion_cache():
+            client_utils.parallel_map(lambda zone: cs.zones.list(),
+                                      range(4), concurrency=4)
+            self.assertEqual(os.listdir(cache_dir), [])
+
+        with open(os.path.join(cache_dir, 'zone-id-cache')) as cache:
+            self.assertEqual(sorted(cache.read().split()),
+                             ['1234'] * 4 + ['5678'] * 4)
+
+        # Listings outside of it write the cache themselves again.
+        cs.zones.list()
+        with open(os.path.join(cache_dir, 'zone-id-cache')) as cache:
+            self.assertEqual(cache.read().split(), ['1234', '5678'])
+
+    def test_query_string(self):
+        self.assertEqual(base.query_string(None), '')
+        self.assertEqual(base.query_string({'name': None}), '')
+        self.assertEqual(base.query_string({'status': 'NEW', 'name': 'a b'}),
+                         '?name=a+b&status=NEW')
+
+    def test_findall_server_ignores_filters(self):
+        self._isolated_cache()
+        filter_cs = fakes.FakeClient()
+        found = filter_cs.devices.findall(name='sample-device1')
+        filter_cs.assert_called('GET', '/pool/devices?name=sample-device1')
+        self.assertEqual([d.id for d in found], [1234])
+
+        # The server returned unfiltered results, so ask for everything
+        # from now on.
+        found = filter_cs.devices.findall(name='sample-device2')
+        filter_cs.assert_called('GET', '/pool/devices')
+        self.assertEqual([d.id for d in found], [5678])
+
+    def test_findall_server_ignores_filters_matching_by_chance(self):
+        self._isolated_cache()
+        filter_cs = fakes.FakeClient()
+        get_pool_devices = filter_cs.client.get_pool_devices
+
+        def one_device_pool(**kw):
+            status, headers, body = get_pool_devices()
+            return status, headers, {'devices': body['devices'][:1]}
+
+        filter_cs.client.get_pool_devices = one_device_pool
+        found = filter_cs.devices.findall(name='sample-device1')
+        self.assertEqual([d.id for d in found], [1234])
+
+        # The first answer matched by chance, the filters are still
+        # checked locally.
+        self.assertEqual(filter_cs.devices.findall(name='zzz'), [])
+        self.assertEqual(filter_cs.devices.findall(status='ACTIVE'), [])
+
+    def test_findall_server_filters(self):
+        self._isolated_cache()
+        filter_cs = fakes.FakeClient()
+        get_pool_devices = filter_cs.client.get_pool_devices
+
+        def filtering_get_pool_devices(**kw):
+            status, headers, body = get_pool_devices()
+            body = {'devices': [d for d in body['devices']
+                                if d['name'] == kw['name']]}
+            return status, headers, body
+
+        filter_cs.client.get_pool_devices = filtering_get_pool_devices
+        found = filter_cs.devices.findall(name='sample-device2', id=5678)
+        filter_cs.assert_called('GET', '/pool/devices?name=sample-device2')
+        self.assertEqual([d.id for d in found], [5678])
+        self.assertTrue(filter_cs.devices._filter_support())
+
+        found = filter_cs.devices.findall(name='sample-device2', id=1)
+        filter_cs.assert_called('GET', '/pool/devices?name=sample-device2')
+        self.assertEqual(found, [])
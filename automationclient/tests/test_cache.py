@@ -0,0 +1,118 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import fixtures
+import mock
+import requests
+
+from automationclient import cache
+from automationclient import client
+from automationclient.tests import utils
+
+
+fake_response = utils.TestResponse({
+    "status_code": 200,
+    "text": '{"zone": {"id": 1234}}',
+})
+
+
+class ResponseCacheTest(utils.TestCase):
+
+    def setUp(self):
+        super(ResponseCacheTest, self).setUp()
+        self.cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.cache = cache.ResponseCache(self.cache_dir)
+
+    def test_ttl_for(self):
+        self.assertEqual(self.cache.ttl_for('/archs/1/profiles'), 300)
+        self.assertEqual(self.cache.ttl_for('/zones/1'), 60)
+        self.assertEqual(self.cache.ttl_for('/zones/1/tasks'), 0)
+        self.assertEqual(
+            self.cache.ttl_for('/zones/1/roles/2/components/mysql'), 300)
+
+    def test_set_and_get(self):
+        self.cache.set('/zones/1', {'zone': {'id': 1}})
+        self.assertEqual(self.cache.get('/zones/1'), {'zone': {'id': 1}})
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_uncacheable_resources_are_not_stored(self):
+        self.cache.set('/zones/1/tasks', {'tasks': []})
+        self.assertEqual(self.cache.get('/zones/1/tasks'), None)
+        self.assertEqual(self.cache.stats()['stores'], 0)
+
+    def test_expired_entries(self):
+        self.cache.set('/zones/1', {'zone': {'id': 1}})
+        with mock.patch('time.time', mock.Mock(return_value=2 ** 40)):
+            self.assertEqual(self.cache.get('/zones/1'), None)
+            self.assertEqual(self.cache.get('/zones/1', allow_stale=True),
+                             {'zone': {'id': 1}})
+
+    def test_invalidate_subtree(self):
+        self.cache.set('/zones', {'zones': []})
+        self.cache.set('/zones/1', {'zone': {}})
+        self.cache.set('/zones/1/roles', {'roles': []})
+        self.cache.set('/zones/2', {'zone': {}})
+        self.cache.set('/archs', {'architectures': []})
+
+        self.cache.invalidate('/zones/1/roles/3/components/mysql')
+
+        self.assertEqual(self.cache.get('/zones'), None)
+        self.assertEqual(self.cache.get('/zones/1'), None)
+        self.assertEqual(self.cache.get('/zones/1/roles'), None)
+        self.assertEqual(self.cache.get('/zones/2'), {'zone': {}})
+        self.assertEqual(self.cache.get('/archs'), {'architectures': []})
+
+    def test_invalidate_related_subtree(self):
+        self.cache.set('/zones/1', {'zone': {}})
+        self.cache.invalidate('/pool/devices/1234/activate')
+        self.assertEqual(self.cache.get('/zones/1'), None)
+
+
+class CachedHTTPClientTest(utils.TestCase):
+
+    def setUp(self):
+        super(CachedHTTPClientTest, self).setUp()
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.cl = client.HTTPClient("username", "password", "project_id",
+                                    "auth_test",
+                                    cache=cache.ResponseCache(cache_dir))
+        self.cl.management_url = "http://example.com"
+        self.cl.auth_token = "token"
+
+    def test_get_is_cached(self):
+        mock_request = mock.Mock(return_value=fake_response)
+        with mock.patch.object(requests, "request", mock_request):
+            self.cl.get("/zones/1234")
+            resp, body = self.cl.get("/zones/1234")
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(body, {"zone": {"id": 1234}})
+
+    def test_write_invalidates(self):
+        mock_request = mock.Mock(return_value=fake_response)
+        with mock.patch.object(requests, "request", mock_request):
+            self.cl.get("/zones/1234")
+            self.cl.put("/zones/1234", body={"zone": {}})
+            self.cl.get("/zones/1234")
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_offline_serves_stale(self):
+        self.cl.cache.set("/zones/1234", {"zone": {"id": 1234}})
+        self.cl.cache.offline = True
+        mock_request = mock.Mock(
+            side_effect=requests.exceptions.ConnectionError())
+        with mock.patch.object(requests, "request", mock_request):
+            with mock.patch('time.time', mock.Mock(return_value=2 ** 40)):
+                resp, body = self.cl.get("/zones/1234")
+        self.assertEqual(body, {"zone": {"id": 1234}})
+        self.assertEqual(self.cl.cache.stats()['stale_hits'], 1)
@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
 
 import automationclient.client
 import automationclient.v1_1.client
@@ -29,3 +30,18 @@ class ClientTest(utils.TestCase):
     def test_get_client_class_unknown(self):
         self.assertRaises(automationclient.exceptions.UnsupportedVersion,
                           automationclient.client.get_client_class, '0')
+
+    def test_client_cache(self):
+        cs = automationclient.v1_1.client.Client('username', 'password',
+                                                 'project_id', 'auth_url')
+        self.assertIsNone(cs.client.cache)
+        cache = mock.Mock(spec=['get', 'set', 'invalidate'])
+        cs = automationclient.v1_1.client.Client('username', 'password',
+                                                 'project_id', 'auth_url',
+                                                 cache=cache)
+        self.assertIs(cs.client.cache, cache)
+
+    def test_client_cache_invalid(self):
+        self.assertRaises(TypeError, automationclient.v1_1.client.Client,
+                          'username', 'password', 'project_id', 'auth_url',
+                          cache='1')
@@ -0,0 +1,94 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import fixtures
+
+from automationclient import command_table
+from automationclient import completion
+from automationclient.tests import utils
+from automationclient.tests.v1_1 import fakes
+
+
+class CompletionTest(utils.TestCase):
+
+    def setUp(self):
+        super(CompletionTest, self).setUp()
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('CLIENT_UUID_CACHE_DIR',
+                                                     cache_dir))
+        os.makedirs(completion.cache_dir())
+        self._write_cache('zone', ['1234', '5678'])
+        self._write_cache('node', ['1234'])
+        self._write_cache('device', ['00:11:22:33:44:55'])
+        self._write_cache('profile', ['4321'])
+
+    def _write_cache(self, kind, ids):
+        path = os.path.join(completion.cache_dir(), '%s-id-cache' % kind)
+        with open(path, 'w') as f:
+            f.write(''.join('%s\n' % i for i in ids))
+
+    def test_table_is_up_to_date(self):
+        # Regenerate automationclient/command_table.py if this fails.
+        self.assertEqual(completion.generate_table(), command_table.TABLE)
+
+    def test_commands(self):
+        self.assertEqual(completion.complete(['zone-s'], 0),
+                         ['zone-show', 'zone-snapshot'])
+        self.assertEqual(completion.complete(['--debug', 'zone-l'], 1),
+                         ['zone-list'])
+        self.assertEqual(completion.complete(['help', 'zone-l'], 1),
+                         ['zone-list'])
+
+    def test_options(self):
+        self.assertEqual(completion.complete(['--form'], 0), ['--format'])
+        self.assertIn('--dry-run',
+                      completion.complete(['task-delete-bulk', '--'], 1))
+        self.assertEqual(completion.complete(['--format', 'nd'], 1),
+                         ['ndjson'])
+
+    def test_ids(self):
+        self.assertEqual(completion.complete(['zone-show'], 1),
+                         ['1234', '5678'])
+        self.assertEqual(completion.complete(['zone-show', '5'], 1),
+                         ['5678'])
+        self.assertEqual(completion.complete(['node-show', '1234', ''], 2),
+                         ['1234'])
+        self.assertEqual(completion.complete(['device-show', '00:'], 1),
+                         ['00:11:22:33:44:55'])
+        self.assertEqual(completion.complete(['profile-show', '', ''], 1),
+                         [])
+
+    def test_option_values(self):
+        self.assertEqual(
+            completion.complete(['task-query', '--zone', ''], 2),
+            ['1234', '5678'])
+        # The option value is not taken for a positional argument.
+        self.assertEqual(
+            completion.complete(['zone-tasks-list', '--format', 'json',
+                                 ''], 3),
+            ['1234', '5678'])
+
+    def test_unknown_command(self):
+        self.assertEqual(completion.complete(['foo', ''], 1), [])
+
+    def test_listings_fill_the_cache(self):
+        self._write_cache('zone', ['9999'])
+        cs = fakes.FakeClient()
+        cs.zones.list()
+        cs.devices.list()
+        self.assertEqual(completion.cached_ids('zone'), ['1234', '5678'])
+        # The devices are completed by MAC.
+        self.assertEqual(completion.cached_ids('device'), ['1234', '5678'])
@@ -0,0 +1,83 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+
+import fixtures
+import mock
+
+from automationclient import extension
+import automationclient.shell
+from automationclient.tests import utils
+
+
+class ExtensionManifestTest(utils.TestCase):
+
+    def setUp(self):
+        super(ExtensionManifestTest, self).setUp()
+        self.ext_dir = self.useFixture(fixtures.TempDir()).path
+        self.manifest = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                     'extensions.json')
+        self.useFixture(fixtures.MonkeyPatch('sys.path', [self.ext_dir]))
+
+    def _add_module(self, name):
+        with open(os.path.join(self.ext_dir, name + '.py'), 'w') as f:
+            f.write('')
+        # Make sure the change is seen on filesystems with coarse mtimes.
+        stat = os.stat(self.ext_dir)
+        os.utime(self.ext_dir, (stat.st_atime, stat.st_mtime + 10))
+
+    def test_scan_is_cached(self):
+        self._add_module('foo_python_automationclient_ext')
+        self._add_module('unrelated')
+        self.assertEqual(extension.find_python_path_extensions(self.manifest),
+                         ['foo_python_automationclient_ext'])
+
+        with mock.patch('pkgutil.iter_modules') as iter_modules:
+            self.assertEqual(
+                extension.find_python_path_extensions(self.manifest),
+                ['foo_python_automationclient_ext'])
+        self.assertFalse(iter_modules.called)
+
+    def test_manifest_invalidated_by_new_module(self):
+        self.assertEqual(extension.find_python_path_extensions(self.manifest),
+                         [])
+        self._add_module('bar_python_automationclient_ext')
+        self.assertEqual(extension.find_python_path_extensions(self.manifest),
+                         ['bar_python_automationclient_ext'])
+
+    def test_manifest_invalidated_by_sys_path(self):
+        extension.find_python_path_extensions(self.manifest)
+        other_dir = self.useFixture(fixtures.TempDir()).path
+        with open(os.path.join(other_dir,
+                               'baz_python_automationclient_ext.py'),
+                  'w') as f:
+            f.write('')
+        sys.path.append(other_dir)
+        self.assertEqual(extension.find_python_path_extensions(self.manifest),
+                         ['baz_python_automationclient_ext'])
+
+
+class ContribDiscoveryTest(utils.TestCase):
+
+    def test_contrib_imported_as_package_modules(self):
+        _shell = automationclient.shell.StackopsAutomationShell()
+        found = dict(_shell._discover_via_contrib_path('1.1'))
+        self.assertEqual(found['list_extensions'].__name__,
+                         'automationclient.v1_1.contrib.list_extensions')
+
+    def test_contrib_of_unknown_version(self):
+        _shell = automationclient.shell.StackopsAutomationShell()
+        self.assertEqual(list(_shell._discover_via_contrib_path('9.9')), [])
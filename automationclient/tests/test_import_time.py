@@ -0,0 +1,68 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+import sys
+
+import testtools
+
+from automationclient.tests import utils
+
+# Modules that --version, help and bash-completion must not import.
+HEAVY_MODULES = ('requests', 'prettytable', 'pkg_resources', 'eventlet',
+                 'automationclient.client', 'automationclient.v1_1.shell')
+
+# Microseconds the import of the shell module may take, including every
+# module it imports, measured in a fresh interpreter. Wall clock time
+# depends on the load of the machine, so it is only checked on demand.
+IMPORT_BUDGET = 200000
+CHECK_IMPORT_TIME = os.environ.get('AUTOMATIONCLIENT_CHECK_IMPORT_TIME') in (
+    'True', '1')
+
+
+def _run(code, *options):
+    process = subprocess.Popen([sys.executable] + list(options) +
+                               ['-c', code],
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    out, err = process.communicate()
+    return out.decode('utf-8'), err.decode('utf-8')
+
+
+class ImportTimeTest(utils.TestCase):
+
+    def test_heavy_modules_are_deferred(self):
+        out, err = _run("import sys\n"
+                        "import automationclient.shell\n"
+                        "print(' '.join(sorted(sys.modules)))")
+        loaded = out.split()
+        self.assertIn('automationclient.shell', loaded)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, loaded)
+
+    @testtools.skipUnless(CHECK_IMPORT_TIME,
+                          'set AUTOMATIONCLIENT_CHECK_IMPORT_TIME=1 to run')
+    def test_import_time_budget(self):
+        # The best of a few runs, the first one may have to compile the
+        # modules or read them from a cold disk.
+        timings = []
+        for attempt in range(3):
+            out, err = _run("import time\n"
+                            "start = time.time()\n"
+                            "import automationclient.shell\n"
+                            "print(int((time.time() - start) * 1000000))")
+            timings.append(int(out))
+        self.assertTrue(min(timings) < IMPORT_BUDGET,
+                        "importing the shell took %d us" % min(timings))
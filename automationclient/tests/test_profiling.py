@@ -0,0 +1,122 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cProfile
+import json
+import os
+import pstats
+
+import fixtures
+import mock
+import requests
+import six
+import testtools
+
+from automationclient import client
+from automationclient import exceptions
+from automationclient import profiling
+from automationclient.tests import utils
+from automationclient.tests.v1_1 import fakes
+from automationclient import utils as client_utils
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+class ProfilingTest(utils.TestCase):
+
+    def setUp(self):
+        super(ProfilingTest, self).setUp()
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('CLIENT_UUID_CACHE_DIR',
+                                                     cache_dir))
+        self.stats_dir = self.useFixture(fixtures.TempDir()).path
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.stats_dir)
+        self.stderr = six.StringIO()
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr', self.stderr))
+
+    def _list_zones(self):
+        cs = fakes.FakeClient()
+        with mock.patch('sys.stdout', six.StringIO()):
+            client_utils.print_list(cs.zones.list(), ['Id', 'Name'])
+        return 'done'
+
+    def test_cpu(self):
+        self.assertEqual(profiling.profile('cpu', self._list_zones), 'done')
+        [name] = os.listdir(self.stats_dir)
+        self.assertTrue(name.startswith('automation-cpu-'))
+        pstats.Stats(os.path.join(self.stats_dir, name))
+
+        summary = self.stderr.getvalue()
+        for label in ('HTTP requests', 'JSON', 'Resources', 'Output'):
+            self.assertIn(label, summary)
+        self.assertIn('print_list', summary)
+
+    def test_cpu_json_is_counted_apart(self):
+        body = {'zones': [{'id': i, 'name': 'zone%d' % i}
+                          for i in range(1000)]}
+        response = utils.TestResponse({'status_code': 200,
+                                       'text': json.dumps(body)})
+        cl = client.HTTPClient('username', 'password', 'project_id',
+                               'auth_test')
+        cl.management_url = 'http://example.com'
+        cl.auth_token = 'token'
+
+        profiler = cProfile.Profile()
+        with mock.patch.object(requests, 'request',
+                               mock.Mock(return_value=response)):
+            profiler.runcall(cl.get, '/zones')
+        times = profiling._cpu_times(pstats.Stats(profiler),
+                                     profiling.categories())
+
+        self.assertTrue(times['JSON'] > 0)
+        self.assertTrue(times['HTTP requests'] >= 0)
+        self.assertEqual(times['Output'], 0)
+
+    @testtools.skipIf(tracemalloc is None, 'needs tracemalloc')
+    def test_mem(self):
+        self.assertEqual(profiling.profile('mem', self._list_zones), 'done')
+        [name] = os.listdir(self.stats_dir)
+        self.assertTrue(name.startswith('automation-mem-'))
+        self.assertIn('Resources', self.stderr.getvalue())
+
+    @testtools.skipIf(tracemalloc is not None, 'tracemalloc is available')
+    def test_mem_without_tracemalloc(self):
+        self.assertEqual(profiling.profile('mem', self._list_zones), 'done')
+        self.assertEqual(os.listdir(self.stats_dir), [])
+        summary = self.stderr.getvalue()
+        self.assertIn('resident set size', summary)
+        for label in ('HTTP requests', 'JSON', 'Resources', 'Output'):
+            self.assertIn(label, summary)
+
+    def test_rss_growth_by_category(self):
+        resource = mock.Mock(RUSAGE_SELF=0)
+        rss = iter(range(0, 10000, 100))
+        resource.getrusage.side_effect = \
+            lambda who: mock.Mock(ru_maxrss=next(rss))
+        growth = dict((category.label, 0)
+                      for category in profiling.categories())
+
+        self.assertEqual(profiling._rss_growth(self._list_zones,
+                                               profiling.categories(),
+                                               resource, growth), 'done')
+        self.assertTrue(growth['Resources'] > 0)
+        self.assertTrue(growth['Output'] > 0)
+
+    def test_unknown_mode(self):
+        self.assertRaises(exceptions.CommandError, profiling.profile, 'io',
+                          self._list_zones)
@@ -18,6 +18,7 @@ import re
 import sys
 
 import fixtures
+import mock
 from six import moves
 from testtools import matchers
 
@@ -82,3 +83,46 @@ class ShellTest(utils.TestCase):
         for r in required:
             self.assertThat(help_text,
                             matchers.MatchesRegex(r, re.DOTALL | re.MULTILINE))
+
+    def test_version(self):
+        self.useFixture(fixtures.MonkeyPatch(
+            'automationclient.version_info.version_string',
+            lambda: '1.2.3'))
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr',
+                                             moves.StringIO()))
+        self.shell('--version')
+        self.assertEqual(sys.stderr.getvalue(), '1.2.3\n')
+
+    def test_forwarded_command_interrupted(self):
+        self.useFixture(fixtures.MonkeyPatch(
+            'automationclient.agent.forward',
+            mock.Mock(side_effect=KeyboardInterrupt)))
+        self.useFixture(fixtures.MonkeyPatch('sys.argv',
+                                             ['automation', 'zone-list']))
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr',
+                                             moves.StringIO()))
+        e = self.assertRaises(SystemExit, automationclient.shell.main)
+        self.assertEqual(e.code, 130)
+        self.assertIn('terminating automation client',
+                      sys.stderr.getvalue())
+
+    def test_subcommand_parser_is_lazy(self):
+        _shell = automationclient.shell.StackopsAutomationShell()
+        _shell.extensions = []
+        _shell.get_subcommand_parser('1.1', command='zone-list')
+        self.assertEqual(list(_shell.subcommands), ['zone-list'])
+
+    def test_subcommand_parser_unknown_command(self):
+        _shell = automationclient.shell.StackopsAutomationShell()
+        _shell.extensions = []
+        _shell.get_subcommand_parser('1.1', command='foofoo')
+        self.assertIn('zone-list', _shell.subcommands)
+        self.assertIn('bash_completion', _shell.subcommands)
+
+    def test_get_command(self):
+        _shell = automationclient.shell.StackopsAutomationShell()
+        self.assertEqual(_shell._get_command(['zone-show', '1234']),
+                         'zone-show')
+        self.assertEqual(_shell._get_command(['help', 'zone-show']), None)
+        self.assertEqual(_shell._get_command(['bash-completion']), None)
+        self.assertEqual(_shell._get_command([]), None)
@@ -138,3 +138,161 @@ class PrintListTestCase(test_utils.TestCase):
 | 3 | 4 |
 +---+---+
 """)
+
+
+class OutputFormatTestCase(test_utils.TestCase):
+
+    def setUp(self):
+        super(OutputFormatTestCase, self).setUp()
+        self.addCleanup(utils.set_output_format, 'table')
+        Row = collections.namedtuple('Row', ['a', 'b'])
+        self.rows = [Row(a=3, b={'x': [1]}), Row(a=1, b=None)]
+
+    def _print_list(self, output_format):
+        utils.set_output_format(output_format)
+        with CaptureStdout() as cso:
+            utils.print_list(iter(self.rows), ['a', 'b'])
+        return cso.read()
+
+    def test_json(self):
+        self.assertEqual(self._print_list('json'),
+                         '[{"a": 3, "b": {"x": [1]}}\n'
+                         ',{"a": 1, "b": null}\n'
+                         ']\n')
+
+    def test_json_empty(self):
+        self.rows = []
+        self.assertEqual(self._print_list('json'), '[]\n')
+
+    def test_ndjson(self):
+        self.assertEqual(self._print_list('ndjson'),
+                         '{"a": 3, "b": {"x": [1]}}\n'
+                         '{"a": 1, "b": null}\n')
+
+    def test_csv(self):
+        self.assertEqual(self._print_list('csv'),
+                         'a,b\n'
+                         '3,"{""x"": [1]}"\n'
+                         '1,\n')
+
+    def test_value(self):
+        self.assertEqual(self._print_list('value'),
+                         '3 {"x": [1]}\n'
+                         '1 \n')
+
+    def test_print_dict(self):
+        utils.set_output_format('json')
+        with CaptureStdout() as cso:
+            utils.print_dict({'name': 'zone', 'properties': {'a': 1}})
+        self.assertEqual(cso.read(),
+                         '{"name": "zone", "properties": {"a": 1}}\n')
+
+        utils.set_output_format('csv')
+        with CaptureStdout() as cso:
+            utils.print_dict({'name': 'zone', 'id': 1})
+        self.assertEqual(cso.read(), 'Property,Value\nid,1\nname,zone\n')
+
+    def test_nested_values_are_kept(self):
+        utils.set_output_format('ndjson')
+        data = {'properties': {'a': 1}}
+        self.assertEqual(utils.check_json_pretty_value_for_dict(data), data)
+
+    def test_fields(self):
+        self.addCleanup(utils.set_output_fields, None)
+        Row = collections.namedtuple('Row', ['a', 'b', 'c'])
+        self.rows = [Row(a=1, b=2, c=3)]
+        utils.set_output_fields(['c', ' a'])
+        self.assertEqual(self._print_list('csv'), 'c,a\n3,1\n')
+
+        utils.set_output_fields(['b'])
+        utils.set_output_format('json')
+        with CaptureStdout() as cso:
+            utils.print_dict({'a': 1, 'b': {'x': 2}})
+        self.assertEqual(cso.read(), '{"b": {"x": 2}}\n')
+
+    def test_fields_table(self):
+        self.addCleanup(utils.set_output_fields, None)
+        utils.set_output_fields(['b'])
+        self.assertEqual(self._print_list('table'), """\
++------------+
+|     b      |
++------------+
+|    None    |
+| {"x": [1]} |
++------------+
+""")
+
+    def test_unknown_format(self):
+        self.assertRaises(exceptions.CommandError, utils.set_output_format,
+                          'yaml')
+
+    def test_output_options_of_a_thread(self):
+        seen = []
+        with utils.output_options('csv', ['a']):
+            self.assertEqual(utils.get_output_format(), 'csv')
+            self.assertEqual(utils.get_output_fields(), ['a'])
+            # Other threads keep the options of the process.
+            utils.parallel_map(lambda item: seen.append(
+                (utils.get_output_format(), utils.get_output_fields())),
+                [1, 2], concurrency=2)
+        self.assertEqual(seen, [('table', None), ('table', None)])
+        self.assertEqual(utils.get_output_format(), 'table')
+
+
+class ParallelMapTestCase(test_utils.TestCase):
+
+    def test_parallel_map_keeps_order(self):
+        output = utils.parallel_map(lambda x: x * 2, range(20), concurrency=4)
+        self.assertEqual(output, [x * 2 for x in range(20)])
+
+    def test_parallel_map_raises_first_error(self):
+        def _fail(x):
+            if x in (3, 7):
+                raise ValueError(x)
+            return x
+        exc = self.assertRaises(ValueError, utils.parallel_map, _fail,
+                                range(10), concurrency=4)
+        self.assertEqual(exc.args, (3,))
+
+    def test_parallel_map_return_exceptions(self):
+        def _fail(x):
+            if x == 1:
+                raise ValueError(x)
+            return x
+        output = utils.parallel_map(_fail, range(3), concurrency=2,
+                                    return_exceptions=True)
+        self.assertEqual(output[0], 0)
+        self.assertIsInstance(output[1], ValueError)
+        self.assertEqual(output[2], 2)
+
+
+class StructuralDiffTestCase(test_utils.TestCase):
+
+    def test_equal(self):
+        self.assertEqual(utils.structural_diff({'a': [1, {'b': 2}]},
+                                               {'a': [1, {'b': 2}]}), [])
+
+    def test_nested_changes(self):
+        old = {'a': {'b': 1, 'c': 2}, 'l': [1, 2], 'gone': True}
+        new = {'a': {'b': 1, 'c': 3}, 'l': [1, 4], 'new': False}
+        self.assertEqual(utils.structural_diff(old, new),
+                         [('a.c', 2, 3), ('gone', True, None),
+                          ('l[1]', 2, 4), ('new', None, False)])
+
+    def test_list_length_change(self):
+        self.assertEqual(utils.structural_diff({'l': [1]}, {'l': [1, 2]}),
+                         [('l', [1], [1, 2])])
+
+    def test_partial(self):
+        old = {'a': {'b': 1, 'c': 2}, 'l': [{'x': 1, 'y': 2}], 'kept': True}
+        new = {'a': {'c': 3}, 'l': [{'x': 1}], 'new': False}
+        self.assertEqual(utils.structural_diff(old, new, partial=True),
+                         [('a.c', 2, 3), ('new', None, False)])
+
+    def test_merge(self):
+        old = {'a': {'b': 1, 'c': 2}, 'l': [1, 2], 'kept': True}
+        new = {'a': {'c': 3}, 'l': [4], 'new': False}
+        self.assertEqual(utils.structural_merge(old, new),
+                         {'a': {'b': 1, 'c': 3}, 'l': [4], 'kept': True,
+                          'new': False})
+        self.assertEqual(old['a'], {'b': 1, 'c': 2})
@@ -20,6 +20,7 @@ except ImportError:
     import urllib.parse as urlparse
 
 from automationclient import client as base_client
+from automationclient import exceptions
 from automationclient.tests import fakes
 import automationclient.tests.utils as utils
 from automationclient.v1_1 import client
@@ -713,6 +714,14 @@ class FakeHTTPClient(base_client.HTTPClient):
         profile.update(kw)
         return (200, {}, {'profile': profile})
 
+    def get_archs_1234_profiles_5678(self, **kw):
+        return (200, {}, {'profile': _stub_template(id='5678',
+                                                    name='sample-profile2')})
+
+    def put_archs_1234_profiles_5678(self, **kw):
+        return (200, {}, {'profile': _stub_template(id='5678',
+                                                    name='sample-profile2')})
+
     def get_archs_1234_profiles_1234_json(self, **kw):
         return (200, {}, {_stub_template(id='1234')})
 
@@ -740,8 +749,12 @@ class FakeHTTPClient(base_client.HTTPClient):
 
     def get_zones_1234_tasks(self, **kw):
         return (200, {}, {"tasks": [
-            {'id': 1234, 'name': 'sample-tasks1'},
-            {'id': 5678, 'name': 'sample-tasks2'}
+            {'id': 1234, 'name': 'sample-tasks1', 'uuid': '1234',
+             'node_id': 1234, 'state': 'STARTED',
+             'updated': '2013-09-23 10:00:00'},
+            {'id': 5678, 'name': 'sample-tasks2', 'uuid': '5678',
+             'node_id': 1234, 'state': 'SUCCESS',
+             'updated': '2013-09-20 10:00:00'}
         ]})
 
     def get_zones_1234_tasks_1234(self, **kw):
@@ -762,6 +775,12 @@ class FakeHTTPClient(base_client.HTTPClient):
             {'id': 5678, 'name': 'sample-role2'}
         ]})
 
+    def post_zones_1234_roles_1234_deploy(self, **kw):
+        return (200, {}, {"tasks": [
+            {'id': 1234, 'name': 'sample-tasks1', 'uuid': '1234',
+             'state': 'PENDING'}
+        ]})
+
     def get_zones_1234_roles_1234(self, **kw):
         return (200, {},
                 {'role': _stub_role(id='1234')})
@@ -784,11 +803,20 @@ class FakeHTTPClient(base_client.HTTPClient):
     def put_zones_1234_roles_1234_components_1234(self, **kw):
         return (200, {}, {'component': _stub_component(name='1234')})
 
+    def get_zones_1234_roles_1234_components_rabbitmq(self, **kw):
+        return (200, {}, {'component': _stub_component(name='rabbitmq')})
+
+    def put_zones_1234_roles_1234_components_rabbitmq(self, **kw):
+        return (200, {}, {'component': _stub_component(name='rabbitmq')})
+
+    def get_zones_1234_roles_5678_components(self, **kw):
+        return (200, {}, {"components": []})
+
     #
     # Global Properties
     #
-    def get_properties(self):
-        return (200, {}, {"properties": {
+    def get_properties(self, **kw):
+        return (200, {'ETag': '"fake-etag"'}, {"properties": {
             'sample-property1': 1234,
             'sample-property2': 5678}
         })
@@ -827,10 +855,12 @@ class FakeHTTPClient(base_client.HTTPClient):
     def get_zones_1234_nodes_1234(self):
         return (200, {}, {'node': _stub_node(id='1234')})
 
-    def get_zones_1234_nodes_1234_tasks(self):
+    def get_zones_1234_nodes_1234_tasks(self, **kw):
         return (200, {}, {"tasks": [
-            {'id': 1234, 'name': 'sample-tasks1'},
-            {'id': 5678, 'name': 'sample-tasks2'}
+            {'id': 1234, 'name': 'sample-tasks1', 'uuid': '1234',
+             'state': 'SUCCESS'},
+            {'id': 5678, 'name': 'sample-tasks2', 'uuid': '5678',
+             'state': 'SUCCESS'}
         ]})
 
     def get_zones_1234_nodes_1234_tasks_1234(self):
@@ -839,6 +869,9 @@ class FakeHTTPClient(base_client.HTTPClient):
     def delete_zones_1234_nodes_1234_tasks_1234(self):
         return (204, {}, {})
 
+    def delete_zones_1234_nodes_1234_tasks_5678(self):
+        raise exceptions.NotFound(404, 'Task 5678 not found')
+
     def post_zones_1234_nodes_1234_tasks_1234_cancel(self):
         return (200, {}, {'task': _stub_task(id='1234')})
 
@@ -858,7 +891,11 @@ class FakeHTTPClient(base_client.HTTPClient):
         return (200, {}, {'datastore': _stub_datastore(id='1234')})
 
     def get_datastores_1234_space(self, **kw):
-        return (200, {}, {'datastore': _stub_datastore(id='1234')})
+        return (200, {}, {'datastore': _stub_datastore(id='1234', total=1000,
+                                                       used=250, free=750)})
+
+    def get_datastores_5678_space(self, **kw):
+        raise exceptions.NotFound(404, 'Datastore 5678 not found')
 
     def get_datastores_1234_content(self, **kw):
         return (200, {}, {'datastore': _stub_datastore(id='1234')})
@@ -872,11 +909,20 @@ class FakeHTTPClient(base_client.HTTPClient):
         return (204, {}, {})
 
     def post_datastores_discovery(self, **kw):
+        if kw['body']['endpoint'] == 'unreachable':
+            raise exceptions.BadRequest(400, 'Endpoint not reachable')
         return (200, {}, {"datastores": [
             {'store': 1234, 'allowed': '127.0.*'},
             {'store': 5678, 'allowed': '127.0.*'}
         ]})
 
+    def post_datastores_validate(self, body, **kw):
+        if body['endpoint'] == 'unreachable':
+            raise exceptions.BadRequest(400, 'Endpoint not reachable')
+        datastore = _stub_datastore(id='1234')
+        datastore.update(body)
+        return (200, {}, {'datastore': datastore})
+
     def put_datastores_1234_attach(self, **kw):
         datastore = _stub_datastore(id='1234')
         datastore.update(kw)
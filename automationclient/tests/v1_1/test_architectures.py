@@ -12,8 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
+import fixtures
+
+from automationclient import exceptions
 from automationclient.tests import utils
 from automationclient.tests.v1_1 import fakes
+from automationclient.v1_1 import architectures
 from automationclient.v1_1.architectures import Architecture
 from automationclient.v1_1.profiles import Profile
 
@@ -70,3 +76,51 @@ class ArchitecturesTest(utils.TestCase):
         profile = cs.profiles.template(architecture)
         cs.assert_called('GET', '/archs/1234/get_template')
         self.assertIsInstance(profile, Profile)
+
+    def test_architecture_export(self):
+        bundle = cs.architectures.export(1234)
+        cs.assert_called_anytime('GET', '/archs/1234/get_template')
+        self.assertEqual(bundle['format'], architectures.BUNDLE_FORMAT)
+        self.assertEqual(bundle['architecture']['name'],
+                         'sample-architecture1')
+        self.assertEqual(sorted(p['name'] for p in bundle['profiles']),
+                         ['fake_profile', 'sample-profile2'])
+        for profile in bundle['profiles']:
+            self.assertNotIn('id', profile)
+            self.assertNotIn('_links', profile)
+
+    def test_architecture_bundle_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'bundle.gz')
+        bundle = cs.architectures.export(1234)
+        architectures.write_bundle(bundle, path)
+        self.assertEqual(architectures.read_bundle(path), bundle)
+
+    def test_architecture_bundle_file_invalid(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'bundle.gz')
+        with open(path, 'w') as f:
+            f.write('not a bundle')
+        self.assertRaises(exceptions.CommandError,
+                          architectures.read_bundle, path)
+
+    def test_architecture_import_bundle(self):
+        bundle = cs.architectures.export(1234)
+        bundle['profiles'][1]['properties'] = {'changed': True}
+        bundle['profiles'].append({'name': 'new-profile'})
+        architecture, report = cs.architectures.import_bundle(bundle)
+        cs.assert_called_anytime('POST', '/archs')
+        self.assertIsInstance(architecture, Architecture)
+        self.assertEqual(report, {'created': ['new-profile'],
+                                  'updated': [bundle['profiles'][1]['name']],
+                                  'skipped': [bundle['profiles'][0]['name']]})
+
+    def test_architecture_import_bundle_identical(self):
+        bundle = cs.architectures.export(1234)
+        architecture = cs.architectures.get(1234)
+        cs.clear_callstack()
+        architecture, report = cs.architectures.import_bundle(
+            bundle, architecture=architecture)
+        self.assertEqual(len(report['skipped']), 2)
+        self.assertFalse([call for call in cs.client.callstack
+                          if call[0] != 'GET'])
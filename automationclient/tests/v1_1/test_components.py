@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+
+from automationclient import exceptions
 from automationclient.tests import utils
 from automationclient.tests.v1_1 import fakes
 from automationclient.v1_1.components import Component
@@ -41,3 +44,54 @@ class ComponentsTest(utils.TestCase):
         cs.assert_called('GET', '/components/1234/services')
         self.assertEqual(len(services), 11)
         [self.assertTrue(isinstance(ser, Service)) for ser in services]
+
+    def test_component_get_zone_configs(self):
+        roles, configs = cs.components.get_zone_configs(1234)
+        cs.assert_called_anytime('GET',
+                                 '/zones/1234/roles/1234/components/rabbitmq')
+        self.assertEqual(len(roles), 2)
+        self.assertEqual(sorted(configs), ['1234', '5678'])
+        self.assertEqual(sorted(configs['1234']), ['1234', 'rabbitmq'])
+        self.assertEqual(configs['5678'], {})
+        self.assertNotIn('_links', configs['1234']['rabbitmq'])
+
+    def test_component_sync_zone_unchanged(self):
+        current = cs.components.get_zone_role(1234, 1234, 'rabbitmq')
+        cs.clear_callstack()
+        report = cs.components.sync_zone(
+            1234, {1234: {'rabbitmq': {'component': current._info}}})
+        self.assertEqual(report, {'updated': [],
+                                  'unchanged': ['1234/rabbitmq']})
+        self.assertFalse([call for call in cs.client.callstack
+                          if call[0] != 'GET'])
+
+    def test_component_sync_zone_partial_unchanged(self):
+        cs.clear_callstack()
+        config = {'properties': {'install': {'root_pass': 'stackops'}}}
+        report = cs.components.sync_zone(
+            1234, {1234: {'rabbitmq': config}})
+        self.assertEqual(report, {'updated': [],
+                                  'unchanged': ['1234/rabbitmq']})
+        self.assertFalse([call for call in cs.client.callstack
+                          if call[0] != 'GET'])
+
+    def test_component_sync_zone_changed(self):
+        current = cs.components.get_zone_role(1234, 1234, 'rabbitmq')
+        config = {'properties': {'install': {'root_pass': 'secret'}}}
+        report = cs.components.sync_zone(
+            1234, {'sample-role1': {'rabbitmq': config}}, dry_run=True)
+        cs.assert_called('GET', '/zones/1234/roles/1234/components/rabbitmq')
+        self.assertEqual(report['updated'][0]['changes'],
+                         [('properties.install.root_pass', 'stackops',
+                           'secret')])
+
+        cs.components.sync_zone(1234, {'sample-role1': {'rabbitmq': config}})
+        expected = copy.deepcopy(current._info)
+        del expected['_links']
+        expected['properties']['install']['root_pass'] = 'secret'
+        cs.assert_called('PUT', '/zones/1234/roles/1234/components/rabbitmq',
+                         {'component': expected})
+
+    def test_component_sync_zone_unknown_role(self):
+        self.assertRaises(exceptions.CommandError, cs.components.sync_zone,
+                          1234, {'missing-role': {'rabbitmq': {}}})
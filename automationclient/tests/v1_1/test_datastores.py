@@ -122,3 +122,45 @@ class DatastoreTest(utils.TestCase):
         datastore = cs.datastores.detach(datastore, **options)
         cs.assert_called('PUT', '/datastores/1234/detach', options)
         self.assertIsInstance(datastore, dict)
+
+    def test_datastore_survey(self):
+        survey = cs.datastores.survey()
+        cs.assert_called_anytime('GET', '/datastores/1234/space')
+        ok, failed = sorted(survey['datastores'], key=lambda e: e['id'])
+        self.assertEqual(ok['free_percent'], 75.0)
+        self.assertEqual(ok['identifier'], 'nfs1')
+        self.assertEqual(ok['error'], None)
+        self.assertIn('not found', failed['error'])
+        self.assertEqual(survey['totals'],
+                         {'count': 2, 'errors': 1, 'total': 1000.0,
+                          'used': 250.0, 'free': 750.0,
+                          'free_percent': 75.0})
+
+    def test_datastore_survey_content(self):
+        survey = cs.datastores.survey([1234], content=True)
+        cs.assert_called_anytime('GET', '/datastores/1234/content')
+        self.assertEqual(survey['datastores'][0]['content']['store'],
+                         '/mnt/ada42')
+
+    def test_datastore_discovery_many(self):
+        cs.clear_callstack()
+        result = cs.datastores.discovery_many(
+            ['127.0.0.1', '127.0.0.2', ' 127.0.0.1', 'unreachable'],
+            timeout=5)
+        calls = [call for call in cs.client.callstack
+                 if call[1] == '/datastores/discovery']
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len(result['datastores']), 4)
+        self.assertEqual(sorted(set(d['endpoint']
+                                    for d in result['datastores'])),
+                         ['127.0.0.1', '127.0.0.2'])
+        self.assertEqual(list(result['errors']), ['unreachable'])
+
+    def test_datastore_validate_many(self):
+        datastore = {'storage_type': 'NFS', 'endpoint': '127.0.0.1',
+                     'store': '/mnt/ada42', 'identifier': 'nfs1'}
+        unreachable = dict(datastore, endpoint='unreachable')
+        result = cs.datastores.validate_many(
+            [datastore, dict(datastore), unreachable])
+        self.assertEqual(len(result['datastores']), 1)
+        self.assertEqual(list(result['errors']), ['unreachable:/mnt/ada42'])
@@ -12,6 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import os
+
+import fixtures
+import mock
+
+from automationclient import completion
+from automationclient import exceptions
 from automationclient.tests import utils
 from automationclient.tests.v1_1 import fakes
 from automationclient.v1_1.devices import Device
@@ -28,6 +36,28 @@ class DevicesTest(utils.TestCase):
         self.assertEqual(len(devices), 2)
         [self.assertTrue(isinstance(dev, Device)) for dev in devices]
 
+    def test_device_list_fields(self):
+        listing = {'devices': [{'id': 1234, 'mac': '00:00', 'status': 'OK',
+                                'connection_data': {'ip': '10.0.0.1'},
+                                '_links': [{'rel': 'self'}]}]}
+        with mock.patch.object(cs.client, 'get_pool_devices',
+                               lambda **kw: (200, {}, listing)):
+            devices = cs.devices.list(fields=['mac'])
+        cs.assert_called('GET', '/pool/devices?fields=id%2Cmac%2Cname%2Cuuid')
+        self.assertEqual(devices[0]._info, {'id': 1234, 'mac': '00:00'})
+        self.assertFalse(hasattr(devices[0], 'connection_data'))
+
+    def test_device_list_fields_keep_mac(self):
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('CLIENT_UUID_CACHE_DIR',
+                                                     cache_dir))
+        devices = cs.devices.list(fields=['status'])
+        cs.assert_called('GET', '/pool/devices?fields='
+                         'id%2Cmac%2Cname%2Cstatus%2Cuuid')
+        self.assertEqual([device.mac for device in devices], [1234, 5678])
+        # The completion index of the devices is not emptied.
+        self.assertEqual(completion.cached_ids('device'), ['1234', '5678'])
+
     def test_device_show(self):
         device = cs.devices.get(1234)
         cs.assert_called('GET', '/pool/devices/1234')
@@ -96,3 +126,87 @@ class DevicesTest(utils.TestCase):
                    "zone_id": 1}
         cs.devices.activate(device, **options)
         cs.assert_called('POST', '/pool/devices/1234/activate', body=options)
+
+    def _onboard(self, **kwargs):
+        device = cs.devices.get(1234)
+        with mock.patch('time.sleep'):
+            return cs.devices.onboard([device], 1234, 1234, **kwargs)
+
+    def test_device_onboard(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'checkpoint.json')
+        result = self._onboard(checkpoint=path)
+        cs.assert_called_anytime('POST', '/zones/1234/roles/1234/deploy')
+        expected = {'1234': {'stage': 'done', 'node': '1234',
+                             'tasks': ['1234'], 'error': None}}
+        self.assertEqual(result, expected)
+        with open(path) as f:
+            self.assertEqual(json.load(f), expected)
+
+    def test_device_onboard_resume(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'checkpoint.json')
+        with open(path, 'w') as f:
+            json.dump({'1234': {'stage': 'deploying', 'node': '1234',
+                                'tasks': ['1234'], 'error': None}}, f)
+        cs.clear_callstack()
+        result = self._onboard(checkpoint=path)
+        self.assertEqual(result['1234']['stage'], 'done')
+        self.assertEqual([call[1] for call in cs.client.callstack
+                          if call[0] != 'GET'], [])
+
+    def test_device_onboard_resume_by_mac(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'checkpoint.json')
+        with open(path, 'w') as f:
+            json.dump({'1234': {'stage': 'deploying', 'node': '1234',
+                                'tasks': ['1234'], 'error': None}}, f)
+        cs.clear_callstack()
+        with mock.patch('time.sleep'):
+            result = cs.devices.onboard(['1234'], 1234, 1234,
+                                        checkpoint=path)
+        self.assertEqual(result['1234']['stage'], 'done')
+        # The device left the pool when it was activated.
+        self.assertNotIn('/pool/devices/1234',
+                         [call[1] for call in cs.client.callstack])
+
+    def test_device_onboard_retry_failed_node(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'checkpoint.json')
+        with open(path, 'w') as f:
+            json.dump({'1234': {'stage': 'failed', 'node': '1234',
+                                'tasks': ['1234'], 'error': 'tasks failed'}},
+                      f)
+        node = mock.Mock(id='1234', status='ERROR')
+        with mock.patch.object(cs.nodes, 'get', return_value=node):
+            result = self._onboard(checkpoint=path, retry_failed=True)
+        self.assertEqual(result['1234']['stage'], 'failed')
+        self.assertEqual(result['1234']['error'], 'node 1234 is ERROR')
+
+    def test_device_onboard_timeout(self):
+        node = mock.Mock(id='1234', status='INSTALLING')
+        with mock.patch.object(cs.nodes, 'get', return_value=node):
+            result = self._onboard(timeout=0)
+        self.assertEqual(result['1234']['stage'], 'failed')
+        self.assertIn('timed out', result['1234']['error'])
+
+    def test_device_onboard_needs_room(self):
+        self.assertRaises(exceptions.CommandError, self._onboard,
+                          max_activating=0)
+        self.assertRaises(exceptions.CommandError, self._onboard,
+                          max_deploying=0)
+
+    def test_device_onboard_retry_failed(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'checkpoint.json')
+        error = mock.Mock(side_effect=exceptions.BadRequest(400))
+        with mock.patch.object(cs.client, 'post_pool_devices_1234_activate',
+                               error):
+            result = self._onboard(checkpoint=path)
+        self.assertEqual(result['1234']['stage'], 'failed')
+
+        result = self._onboard(checkpoint=path)
+        self.assertEqual(result['1234']['stage'], 'failed')
+
+        result = self._onboard(checkpoint=path, retry_failed=True)
+        self.assertEqual(result['1234']['stage'], 'done')
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+
 from automationclient.tests import utils
 from automationclient.tests.v1_1 import fakes
 from automationclient.v1_1.architectures import Architecture
@@ -235,3 +237,17 @@ class ProfilesTest(utils.TestCase):
                                               'fake_property_key')
         cs.assert_called('PUT', '/archs/1234/profiles/1234')
         self.assertIsInstance(profile, dict)
+
+    def test_profile_properties_patch(self):
+        architecture = cs.architectures.get(1234)
+        profile = cs.profiles.get(architecture, 1234)
+        info = copy.deepcopy(profile._info)
+        cs.profiles.properties_patch(architecture, profile,
+                                     set={'new_fake_property_key': 'value'},
+                                     delete=['fake_property_key'])
+        body = cs.client.callstack[-1][2]
+        cs.assert_called('PUT', '/archs/1234/profiles/1234')
+        self.assertEqual(body['profile']['properties'],
+                         {'new_fake_property_key': 'value'})
+        self.assertNotIn('_links', body['profile'])
+        self.assertEqual(profile._info, info)
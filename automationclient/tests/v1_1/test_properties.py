@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
+
+from automationclient import exceptions
 from automationclient.tests import utils
 from automationclient.tests.v1_1 import fakes
 
@@ -55,3 +58,32 @@ class PropertiesTest(utils.TestCase):
         #}}
         cs.assert_called('PUT', '/properties')
         self.assertIsInstance(properties, dict)
+
+    def test_global_property_apply(self):
+        put = mock.Mock(return_value=(200, {}, {"properties": {}}))
+        with mock.patch.object(cs.client, 'put_properties', put, create=True):
+            cs.properties.apply(set={'sample-property2': 9870,
+                                     'sample-property3': 'new'},
+                                delete=['sample-property1'])
+        expected = {
+            'sample-property2': 9870,
+            'sample-property3': 'new'
+        }
+        cs.assert_called('PUT', '/properties', expected)
+        self.assertEqual(put.call_args[1]['headers'],
+                         {'If-Match': '"fake-etag"'})
+
+    def test_global_property_apply_missing_key(self):
+        self.assertRaises(exceptions.CommandError, cs.properties.apply,
+                          delete=['missing-property'])
+
+    def test_global_property_apply_set_and_delete(self):
+        self.assertRaises(exceptions.CommandError, cs.properties.apply,
+                          set={'sample-property1': 1},
+                          delete=['sample-property1'])
+
+    def test_global_property_apply_concurrent_change(self):
+        put = mock.Mock(side_effect=exceptions.PreconditionFailed(412))
+        with mock.patch.object(cs.client, 'put_properties', put, create=True):
+            self.assertRaises(exceptions.CommandError, cs.properties.apply,
+                              set={'sample-property1': 1})
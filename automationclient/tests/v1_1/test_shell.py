@@ -17,12 +17,18 @@
 #    under the License.
 
 import fixtures
+import json
+import mock
 import os
+import six
 
 from automationclient import client
+from automationclient import exceptions
 from automationclient import shell
+from automationclient import utils as client_utils
 from automationclient.tests.v1_1 import fakes
 from automationclient.tests import utils
+from automationclient.v1_1 import task_index
 
 
 def _profile():
@@ -447,6 +453,16 @@ class ShellTest(utils.TestCase):
         self.run_command('device-soft-reboot 1234')
         self.assert_called('POST', '/pool/devices/1234/soft_reboot')
 
+    def test_device_onboard(self):
+        self.run_command('device-onboard 1234 1234 1234 --interval 0')
+        self.assert_called('GET', '/zones/1234/nodes/1234/tasks')
+        self.assert_called_anytime('POST', '/pool/devices/1234/activate',
+                                   {'zone_id': 1234})
+
+    def test_device_onboard_max_activating(self):
+        self.assertRaises(exceptions.CommandError, self.run_command,
+                          'device-onboard 1234 1234 1234 --max-activating 0')
+
     def test_device_activate(self):
         self.run_command('device-activate 1234 1')
         self.assert_called('POST', '/pool/devices/1234/activate')
@@ -467,6 +483,18 @@ class ShellTest(utils.TestCase):
         self.run_command('architecture-list')
         self.assert_called('GET', '/archs')
 
+    def test_cache_from_env(self):
+        self.useFixture(fixtures.EnvironmentVariable('AUTOMATIONCLIENT_CACHE',
+                                                     'yes'))
+        self.useFixture(fixtures.EnvironmentVariable(
+            'AUTOMATIONCLIENT_OFFLINE', '0'))
+        client_class = mock.Mock(return_value=fakes.FakeClient())
+        client.get_client_class = lambda *_: client_class
+        self.run_command('architecture-list')
+        kwargs = client_class.call_args[1]
+        self.assertIs(kwargs['cache'], True)
+        self.assertIs(kwargs['offline'], False)
+
     def test_architecture_show(self):
         self.run_command('architecture-show 1234')
         self.assert_called('GET', '/archs/1234')
@@ -506,6 +534,14 @@ class ShellTest(utils.TestCase):
         self.run_command('architecture-delete 1234')
         self.assert_called('DELETE', '/archs/1234')
 
+    def test_architecture_export_import(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'bundle.gz')
+        self.run_command('architecture-export 1234 %s' % path)
+        self.assert_called_anytime('GET', '/archs/1234/profiles/5678')
+        self.run_command('architecture-import %s' % path)
+        self.assert_called_anytime('POST', '/archs')
+
     def test_architecture_template(self):
         self.run_command('architecture-template 1234')
         self.assert_called('GET', '/archs/1234/get_template')
@@ -569,6 +605,13 @@ class ShellTest(utils.TestCase):
         #TODO(jvalderrama) Check options as body expected
         self.assert_called('PUT', '/archs/1234/profiles/1234')
 
+    def test_profile_property_apply(self):
+        file = os.path.join(os.getcwd(),
+                            "automationclient/tests/v1_1/"
+                            "fake_files/fake_property_apply.json")
+        self.run_command('profile-property-apply 1234 1234 --file %s' % file)
+        self.assert_called('PUT', '/archs/1234/profiles/1234')
+
     #
     # Zones
     #
@@ -576,6 +619,35 @@ class ShellTest(utils.TestCase):
         self.run_command('zone-list')
         self.assert_called('GET', '/zones')
 
+    def test_zone_list_ndjson(self):
+        self.addCleanup(client_utils.set_output_format, 'table')
+        stdout = six.StringIO()
+        with mock.patch('sys.stdout', stdout):
+            self.run_command('--format ndjson zone-list')
+        rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [1234, 5678])
+
+    def test_zone_list_profile(self):
+        stats_dir = self.useFixture(fixtures.TempDir()).path
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(stats_dir)
+        stderr = six.StringIO()
+        with mock.patch('sys.stderr', stderr):
+            self.run_command('--profile cpu zone-list')
+        self.assert_called('GET', '/zones')
+        self.assertEqual(len(os.listdir(stats_dir)), 1)
+        self.assertIn('CPU profile written to', stderr.getvalue())
+
+    def test_device_list_fields(self):
+        self.addCleanup(client_utils.set_output_fields, None)
+        self.addCleanup(client_utils.set_output_format, 'table')
+        stdout = six.StringIO()
+        with mock.patch('sys.stdout', stdout):
+            self.run_command('--format value --fields mac,id device-list')
+        self.assert_called('GET',
+                           '/pool/devices?fields=id%2Cmac%2Cname%2Cuuid')
+        self.assertEqual(stdout.getvalue(), '1234 1234\n5678 5678\n')
+
     def test_zone_show(self):
         self.run_command('zone-show 1234')
         self.assert_called('GET', '/zones/1234')
@@ -600,6 +672,29 @@ class ShellTest(utils.TestCase):
         self.run_command('zone-tasks-list 1234')
         self.assert_called('GET', '/zones/1234/tasks')
 
+    def test_task_query(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'tasks.sqlite')
+        with mock.patch('automationclient.v1_1.tasks.TaskManager.index',
+                        lambda manager: task_index.TaskIndex(path)):
+            self.run_command('task-query 1234 --running --last 5')
+        self.assert_called('GET', '/zones/1234/tasks')
+
+    def test_zone_watch(self):
+        self.run_command('zone-watch 1234 --kinds nodes,roles --iterations 1')
+        self.assert_called('GET', '/zones/1234/roles')
+        self.assert_called_anytime('GET', '/zones/1234/nodes')
+
+    def test_zone_snapshot_restore(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'snapshot.json')
+        self.run_command('zone-snapshot 1234 %s' % path)
+        self.assert_called_anytime('GET',
+                                   '/zones/1234/roles/1234/components/1234')
+        self.run_command('zone-restore 1234 %s --dry-run' % path)
+        self.assert_called_anytime('GET',
+                                   '/zones/1234/roles/1234/components/1234')
+
     def test_zone_property_create(self):
         self.run_command('zone-property-create '
                          '1234 new_fake_property_key new_fake_property_value')
@@ -621,6 +716,16 @@ class ShellTest(utils.TestCase):
         #TODO(jvalderrama) Check options as body expected
         self.assert_called('PUT', '/zones/1234')
 
+    def test_zone_property_apply(self):
+        file = os.path.join(os.getcwd(),
+                            "automationclient/tests/v1_1/"
+                            "fake_files/fake_property_apply.json")
+        self.run_command('zone-property-apply 1234 --file %s' % file)
+        body = self.shell.cs.client.callstack[-1][2]
+        self.assert_called('PUT', '/zones/1234')
+        self.assertEqual(body['zone']['properties'],
+                         {'new_fake_property_key': 'new_fake_property_value'})
+
     #
     # Roles
     #
@@ -637,6 +742,25 @@ class ShellTest(utils.TestCase):
         self.run_command('role-deploy 1234 1234 1234')
         self.assert_called('GET', '/zones/1234/roles/1234/deploy')'''
 
+    def test_role_deploy_rolling(self):
+        self.run_command('role-deploy-rolling 1234 1234 1234 --interval 0')
+        self.assert_called('GET', '/zones/1234/nodes/1234/tasks')
+        self.assert_called_anytime('POST', '/zones/1234/roles/1234/deploy')
+
+    def test_task_cancel_bulk(self):
+        self.run_command('task-cancel-bulk 1234 --node 1234')
+        self.assert_called('POST',
+                           '/zones/1234/nodes/1234/tasks/1234/cancel')
+
+    def test_task_delete_bulk_dry_run(self):
+        self.run_command('task-delete-bulk 1234 --dry-run '
+                         '--older-than 2013-09-22')
+        self.assert_called('GET', '/zones/1234/tasks')
+
+    def test_task_delete_bulk_failure(self):
+        self.assertRaises(exceptions.CommandError, self.run_command,
+                          'task-delete-bulk 1234 --state SUCCESS')
+
     def test_role_component_list(self):
         self.run_command('role-component-list 1234 1234')
         self.assert_called('GET', '/zones/1234/roles/1234/components')
@@ -693,6 +817,29 @@ class ShellTest(utils.TestCase):
         #}}
         self.assert_called('PUT', '/properties')
 
+    def test_global_property_apply(self):
+        file = os.path.join(os.getcwd(),
+                            "automationclient/tests/v1_1/"
+                            "fake_files/fake_global_property_apply.json")
+        self.run_command('global-property-apply --file %s' % file)
+        expected = {
+            "sample-property2": 9870,
+            "sample-property3": "new"
+        }
+        self.assert_called('PUT', '/properties', expected)
+
+    def test_zone_component_sync(self):
+        file = os.path.join(os.getcwd(),
+                            "automationclient/tests/v1_1/"
+                            "fake_files/fake_zone_component_sync.json")
+        self.run_command('zone-component-sync 1234 %s' % file)
+        method, url, body = self.shell.cs.client.callstack[-1]
+        self.assertEqual((method, url),
+                         ('PUT', '/zones/1234/roles/1234/components/rabbitmq'))
+        properties = body['component']['properties']
+        self.assertEqual(properties['install']['root_pass'], 'secret')
+        self.assertEqual(properties['set_nova']['root_pass'], 'stackops')
+
     #
     # Services
     #
@@ -720,6 +867,43 @@ class ShellTest(utils.TestCase):
         self.run_command('node-list 1234')
         self.assert_called('GET', '/zones/1234/nodes')
 
+    def test_node_list_zones(self):
+        self.addCleanup(client_utils.set_output_format, 'table')
+        stdout = six.StringIO()
+        with mock.patch('sys.stdout', stdout):
+            self.run_command('--format ndjson --zones 1234 node-list')
+        self.assert_called('GET', '/zones/1234/nodes')
+        rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([(row['zone'], row['id']) for row in rows],
+                         [(1234, 1234), (1234, 5678)])
+
+    def test_node_list_all_zones_isolates_errors(self):
+        def get_zones_5678_nodes(self, **kw):
+            raise exceptions.NotFound(404, 'Zone 5678 not found')
+
+        self.addCleanup(client_utils.set_output_format, 'table')
+        stdout = six.StringIO()
+        with mock.patch.object(fakes.FakeHTTPClient, 'get_zones_5678_nodes',
+                               get_zones_5678_nodes, create=True):
+            with mock.patch('sys.stdout', stdout):
+                e = self.assertRaises(exceptions.CommandError,
+                                      self.run_command,
+                                      '--format ndjson --zones all node-list')
+        self.assertIn('5678 (Zone 5678 not found', str(e))
+        self.assert_called_anytime('GET', '/zones')
+        rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([row['zone'] for row in rows], [1234, 1234])
+
+    def test_node_list_zones_and_zone(self):
+        self.assertRaises(exceptions.CommandError, self.run_command,
+                          '--zones 1234 node-list 1234')
+        self.assertRaises(exceptions.CommandError, self.run_command,
+                          'node-list')
+
+    def test_zones_unsupported_command(self):
+        self.assertRaises(exceptions.CommandError, self.run_command,
+                          '--zones 1234 node-show 1234 1234')
+
     def test_node_show(self):
         self.run_command('node-show 1234 1234')
         self.assert_called('GET', '/zones/1234/nodes/1234')
@@ -780,6 +964,16 @@ class ShellTest(utils.TestCase):
         self.run_command('datastore-space 1234')
         self.assert_called('GET', '/datastores/1234/space')
 
+    def test_datastore_space_all(self):
+        self.run_command('datastore-space-all --sort-by free --reverse')
+        self.assert_called_anytime('GET', '/datastores/1234/space')
+
+    def test_datastore_space_all_json(self):
+        with mock.patch('sys.stdout', new=six.StringIO()) as stdout:
+            self.run_command('datastore-space-all --json')
+        survey = json.loads(stdout.getvalue())
+        self.assertEqual(survey['totals']['errors'], 1)
+
     def test_datastore_content(self):
         self.run_command('datastore-content 1234')
         self.assert_called('GET', '/datastores/1234/content')
@@ -798,6 +992,28 @@ class ShellTest(utils.TestCase):
         self.assert_called('POST' '/datastores/discovery', body={
             'storage_type': 'NFS', 'endpoint': '127.0.0.1'})
 
+    def test_datastore_discovery_batch(self):
+        file = os.path.join(os.getcwd(),
+                            "automationclient/tests/v1_1/"
+                            "fake_files/fake_datastore_endpoints.txt")
+        self.run_command('datastore-discovery-batch %s --timeout 10' % file)
+        endpoints = [call[2]['endpoint']
+                     for call in self.shell.cs.client.callstack
+                     if call[1] == '/datastores/discovery']
+        self.assertEqual(sorted(endpoints),
+                         ['127.0.0.1', '127.0.0.2', 'unreachable'])
+
+    def test_datastore_validate_batch(self):
+        file = os.path.join(os.getcwd(),
+                            "automationclient/tests/v1_1/"
+                            "fake_files/fake_datastore_validate.txt")
+        self.run_command('datastore-validate-batch %s' % file)
+        self.assert_called_anytime('POST', '/datastores/validate',
+                                   {'storage_type': 'NFS',
+                                    'endpoint': '127.0.0.1',
+                                    'store': '/mnt/ada42',
+                                    'identifier': 'nfs1'})
+
     def test_datastore_1234_attach(self):
         self.run_command('datastore-attach 1234 1234 1234 1234 images')
         self.assert_called('PUT', '/datastores/1234/attach', body={
@@ -808,3 +1024,77 @@ class ShellTest(utils.TestCase):
         self.run_command('datastore-detach 1234 1234')
         self.assert_called('PUT', '/datastores/1234/attach', body={
             'force': None, 'id_role': 4, 'component_name': 1234})
+
+    #
+    # Session and batch
+    #
+    def _batch_file(self):
+        return os.path.join(os.getcwd(),
+                            "automationclient/tests/v1_1/"
+                            "fake_files/fake_batch.txt")
+
+    def _batch_urls(self):
+        return [url for method, url, body in self.shell.cs.client.callstack]
+
+    def test_batch(self):
+        self.run_command('batch %s' % self._batch_file())
+        self.assertEqual(self._batch_urls(),
+                         ['/zones', '/zones/1234',
+                          '/zones/1234', '/zones/1234/tasks',
+                          '/zones/1234', '/zones/1234',
+                          '/zones/1234/nodes/1234',
+                          '/zones/1234/nodes/1234/tasks'])
+        self.assertNotEqual(self.shell.cs.client.session, None)
+
+    def test_batch_parallel(self):
+        self.run_command('batch --parallel 4 %s' % self._batch_file())
+        self.assertEqual(sorted(self._batch_urls()),
+                         ['/zones', '/zones/1234', '/zones/1234',
+                          '/zones/1234', '/zones/1234',
+                          '/zones/1234/nodes/1234',
+                          '/zones/1234/nodes/1234/tasks',
+                          '/zones/1234/tasks'])
+
+    def test_batch_failure(self):
+        with mock.patch('sys.stdin', six.StringIO('foo-list\nzone-list\n')):
+            self.assertRaises(exceptions.CommandError, self.run_command,
+                              'batch -')
+        self.assertEqual(self._batch_urls(), [])
+
+    def test_batch_keep_going(self):
+        with mock.patch('sys.stdin', six.StringIO('foo-list\nzone-list\n')):
+            self.assertRaises(exceptions.CommandError, self.run_command,
+                              'batch --keep-going -')
+        self.assertEqual(self._batch_urls(), ['/zones'])
+
+    def test_batch_line_options(self):
+        self.addCleanup(client_utils.set_output_format, 'table')
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'batch.txt')
+        with open(path, 'w') as f:
+            f.write('--format ndjson zone-list\n--fields id zone-list\n')
+        stdout = six.StringIO()
+        with mock.patch('sys.stdout', stdout):
+            self.run_command('--format csv batch %s' % path)
+        self.assertEqual(stdout.getvalue().splitlines(),
+                         ['{"id": 1234, "name": "sample-zone1"}',
+                          '{"id": 5678, "name": "sample-zone2"}',
+                          'id', '1234', '5678'])
+        self.assertEqual(client_utils.get_output_format(), 'csv')
+        self.assertEqual(client_utils.get_output_fields(), None)
+
+    def test_batch_line_zones(self):
+        with mock.patch('sys.stdin', six.StringIO('--zones 1234 zone-list\n'
+                                                  'zone-list\n')):
+            self.assertRaises(exceptions.CommandError, self.run_command,
+                              'batch --keep-going -')
+        self.assertEqual(self._batch_urls(), ['/zones'])
+
+    def test_session(self):
+        lines = iter(['zone-list', '', 'batch -', 'zone-show 1234', 'exit',
+                      'zone-list'])
+        with mock.patch.object(six.moves, 'input',
+                               lambda prompt: next(lines)):
+            self.run_command('session')
+        self.assertEqual(self._batch_urls(), ['/zones', '/zones/1234'])
+        self.assertEqual(next(lines), 'zone-list')
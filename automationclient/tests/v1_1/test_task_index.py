@@ -0,0 +1,133 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from automationclient import exceptions
+from automationclient.tests import utils
+from automationclient.tests.v1_1 import fakes
+from automationclient.v1_1 import task_index
+
+
+cs = fakes.FakeClient()
+
+
+def _task(uuid, state, updated, node=1234):
+    return {'id': uuid, 'uuid': uuid, 'name': 'task-%s' % uuid,
+            'state': state, 'result': None, 'updated': updated,
+            'node_id': node}
+
+
+class TaskIndexTest(utils.TestCase):
+
+    def setUp(self):
+        super(TaskIndexTest, self).setUp()
+        self.index = task_index.TaskIndex(':memory:')
+        self.addCleanup(self.index.close)
+        self.server_tasks = [
+            _task('a', 'SUCCESS', '2013-09-23 08:00:00'),
+            _task('b', 'FAILURE', '2013-09-23 09:00:00', node=5678),
+            _task('c', 'STARTED', '2013-09-23 10:00:00'),
+        ]
+        self.requests = []
+
+        def list_tasks(**kw):
+            self.requests.append(kw)
+            since = kw.get('since') if self.honour_since else None
+            return (200, {}, {'tasks': [t for t in self.server_tasks
+                                        if not since or
+                                        task_index._stamp(t) > since]})
+
+        self.honour_since = True
+        patcher = mock.patch.object(cs.client, 'get_zones_1234_tasks',
+                                    list_tasks, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refresh_and_query(self):
+        self.assertEqual(self.index.refresh(cs.tasks, 1234), 3)
+        self.assertEqual(self.index.high_water(1234), '2013-09-23 10:00:00')
+        self.assertEqual([t['uuid'] for t in self.index.query(1234)],
+                         ['c', 'b', 'a'])
+        self.assertEqual([t['uuid'] for t in self.index.running(1234)],
+                         ['c'])
+        self.assertEqual([t['uuid'] for t in self.index.failed(1234)],
+                         ['b'])
+        self.assertEqual([t['uuid'] for t in
+                          self.index.query(1234, node=5678)], ['b'])
+        self.assertEqual([t['uuid'] for t in
+                          self.index.query(1234, limit=1)], ['c'])
+
+    def test_refresh_uses_high_water_mark(self):
+        self.index.refresh(cs.tasks, 1234)
+        self.server_tasks[2] = _task('c', 'SUCCESS', '2013-09-23 11:00:00')
+        self.assertEqual(self.index.refresh(cs.tasks, 1234), 1)
+        self.assertEqual(self.requests[-1], {'since': '2013-09-23 10:00:00'})
+        self.assertEqual(self.index.running(1234), [])
+
+    def test_refresh_without_server_filter(self):
+        self.honour_since = False
+        self.index.refresh(cs.tasks, 1234)
+        self.server_tasks.append(_task('d', 'PENDING', '2013-09-23 12:00:00'))
+        # Only 'd' changed, the tasks already indexed are not stored again.
+        self.assertEqual(self.index.refresh(cs.tasks, 1234), 1)
+
+        # The server ignored the filter, it is not sent anymore.
+        self.index.refresh(cs.tasks, 1234)
+        self.assertEqual(self.requests[-1], {})
+        self.assertEqual(len(self.index.query(1234)), 4)
+
+    def test_refresh_deletes_tasks_missing_from_full_listing(self):
+        self.honour_since = False
+        self.index.refresh(cs.tasks, 1234)
+        self.index.refresh(cs.tasks, 1234)
+        del self.server_tasks[1]
+        self.index.refresh(cs.tasks, 1234)
+        self.assertEqual([t['uuid'] for t in self.index.query(1234)],
+                         ['c', 'a'])
+
+    def _patch_task(self, uuid, get_task):
+        patcher = mock.patch.object(cs.client,
+                                    'get_zones_1234_nodes_1234_tasks_%s'
+                                    % uuid, get_task, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refresh_fetches_unfinished_tasks(self):
+        # The state changes, but the API only sends the creation time.
+        for task in self.server_tasks:
+            task['created'] = task.pop('updated')
+        self.index.refresh(cs.tasks, 1234)
+        self.server_tasks[2]['state'] = 'SUCCESS'
+        task = dict(self.server_tasks[2])
+        del task['node_id']
+        self._patch_task('c', lambda **kw: (200, {}, {'task': task}))
+
+        self.assertEqual(self.index.refresh(cs.tasks, 1234), 1)
+        self.assertEqual(self.requests[-1], {'since': '2013-09-23 10:00:00'})
+        self.assertEqual(self.index.running(1234), [])
+        self.assertEqual([t['node'] for t in self.index.query(1234)],
+                         ['1234', '5678', '1234'])
+
+    def test_refresh_deletes_unfinished_tasks_gone(self):
+        self.index.refresh(cs.tasks, 1234)
+        del self.server_tasks[2]
+
+        def get_task(**kw):
+            raise exceptions.NotFound(404, 'Task c not found')
+
+        self._patch_task('c', get_task)
+        self.index.refresh(cs.tasks, 1234)
+        self.assertEqual([t['uuid'] for t in self.index.query(1234)],
+                         ['b', 'a'])
@@ -0,0 +1,177 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import fixtures
+import mock
+
+from automationclient import exceptions
+from automationclient.tests import utils
+from automationclient.tests.v1_1 import fakes
+from automationclient.v1_1 import tasks
+
+
+cs = fakes.FakeClient()
+
+
+class TaskTest(utils.TestCase):
+
+    def test_hydrate_by_uuid(self):
+        task = tasks.Task(cs.tasks, {'id': 99, 'uuid': '1234',
+                                     'zone': 1234, 'node': 1234})
+        cs.clear_callstack()
+        cs.tasks.hydrate([task])
+        self.assertEqual(cs.client.callstack,
+                         [('GET', '/zones/1234/nodes/1234/tasks/1234', None)])
+        self.assertTrue(task.is_loaded())
+        self.assertEqual(task.state, 'PENDING')
+
+
+class RollingDeployTest(utils.TestCase):
+
+    def setUp(self):
+        super(RollingDeployTest, self).setUp()
+        self.useFixture(fixtures.MonkeyPatch('time.sleep',
+                                             lambda seconds: None))
+        # Every node gets one deploy task, that finishes with the state
+        # given in self.states on the first poll.
+        self.states = {}
+        self.deployed = []
+
+        def deploy(body, **kw):
+            node_id = body['node']['href'].rsplit('/', 1)[-1]
+            self.deployed.append(int(node_id))
+            return (200, {}, {'tasks': [{'id': node_id,
+                                         'uuid': 'task-%s' % node_id,
+                                         'state': 'PENDING'}]})
+
+        cs.client.post_zones_1234_roles_1234_deploy = deploy
+        for node_id in range(1, 6):
+            setattr(cs.client, 'get_zones_1234_nodes_%d_tasks' % node_id,
+                    self._tasks(node_id))
+
+    def tearDown(self):
+        super(RollingDeployTest, self).tearDown()
+        del cs.client.post_zones_1234_roles_1234_deploy
+        for node_id in range(1, 6):
+            delattr(cs.client, 'get_zones_1234_nodes_%d_tasks' % node_id)
+
+    def _tasks(self, node_id):
+        def tasks(**kw):
+            state = self.states.get(node_id, 'SUCCESS')
+            return (200, {}, {'tasks': [{'id': node_id,
+                                         'uuid': 'task-%s' % node_id,
+                                         'state': state}]})
+        return tasks
+
+    def test_rolling_deploy(self):
+        callback = mock.Mock()
+        report = cs.tasks.rolling_deploy(1234, 1234, [1, 2, 3, 4, 5],
+                                         max_in_flight=2, callback=callback)
+        self.assertEqual(report, {'succeeded': [1, 2, 3, 4, 5],
+                                  'failed': {}, 'skipped': []})
+        self.assertEqual(self.deployed, [1, 2, 3, 4, 5])
+        callback.assert_any_call(5, 'succeeded', None)
+
+    def test_rolling_deploy_failure_budget(self):
+        self.states = {1: 'FAILURE', 2: 'FAILURE'}
+        report = cs.tasks.rolling_deploy(1234, 1234, [1, 2, 3, 4, 5],
+                                         max_in_flight=2, max_failures=1)
+        self.assertEqual(sorted(report['failed']), [1, 2])
+        self.assertEqual(report['succeeded'], [])
+        self.assertEqual(report['skipped'], [3, 4, 5])
+        self.assertEqual(self.deployed, [1, 2])
+
+    def test_rolling_deploy_waits_for_tasks(self):
+        self.states = {1: 'STARTED'}
+        polls = []
+
+        def sleep(seconds):
+            polls.append(seconds)
+            if len(polls) == 3:
+                self.states[1] = 'SUCCESS'
+
+        with mock.patch('time.sleep', sleep):
+            report = cs.tasks.rolling_deploy(1234, 1234, [1], interval=2)
+        self.assertEqual(report['succeeded'], [1])
+        self.assertEqual(polls, [2, 2, 2])
+
+    def test_rolling_deploy_timeout(self):
+        self.states = {1: 'STARTED', 2: 'STARTED'}
+        clock = [1000.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with mock.patch('time.sleep', sleep):
+            with mock.patch('time.time', lambda: clock[0]):
+                e = self.assertRaises(exceptions.CommandError,
+                                      cs.tasks.rolling_deploy, 1234, 1234,
+                                      [1, 2, 3], max_in_flight=2, interval=2,
+                                      timeout=5)
+        self.assertIn('1, 2', str(e))
+        self.assertEqual(clock[0], 1006.0)
+        self.assertEqual(self.deployed, [1, 2])
+
+
+class BulkTest(utils.TestCase):
+
+    def setUp(self):
+        super(BulkTest, self).setUp()
+        cs.clear_callstack()
+
+    def _calls(self, method):
+        return sorted(url for call_method, url, body in cs.client.callstack
+                      if call_method == method)
+
+    def test_bulk_cancel(self):
+        report = cs.tasks.bulk_cancel(1234)
+        self.assertEqual(report['matched'], ['1234'])
+        self.assertEqual(report['succeeded'], ['1234'])
+        self.assertEqual(self._calls('POST'),
+                         ['/zones/1234/nodes/1234/tasks/1234/cancel'])
+
+    def test_bulk_cancel_filter(self):
+        report = cs.tasks.bulk_cancel(1234, filter={'node': [5678]})
+        self.assertEqual(report['matched'], [])
+        self.assertEqual(self._calls('POST'), [])
+
+    def test_bulk_cancel_dry_run(self):
+        report = cs.tasks.bulk_cancel(1234, dry_run=True)
+        self.assertEqual(report['matched'], ['1234'])
+        self.assertEqual(report['succeeded'], [])
+        self.assertEqual(self._calls('POST'), [])
+
+    def test_bulk_delete(self):
+        # The second task is not found when it is deleted.
+        report = cs.tasks.bulk_delete(1234, states=None)
+        self.assertEqual(sorted(report['matched']), ['1234', '5678'])
+        self.assertEqual(report['succeeded'], ['1234'])
+        self.assertEqual(list(report['failed']), ['5678'])
+        self.assertEqual(self._calls('GET'), ['/zones/1234/tasks'])
+
+    def test_bulk_delete_older_than(self):
+        report = cs.tasks.bulk_delete(1234, older_than='2013-09-22 00:00:00',
+                                      dry_run=True)
+        self.assertEqual(report['matched'], ['5678'])
+        report = cs.tasks.bulk_delete(1234, older_than='2013-09-01 00:00:00',
+                                      dry_run=True)
+        self.assertEqual(report['matched'], [])
+
+    def test_bulk_skips_tasks_without_node(self):
+        tasks = {'tasks': [{'id': 1, 'uuid': 'a', 'state': 'PENDING'}]}
+        with mock.patch.object(cs.client, 'get_zones_1234_tasks',
+                               lambda **kw: (200, {}, tasks)):
+            report = cs.tasks.bulk_cancel(1234)
+        self.assertEqual(report['skipped'], {'a': 'no node'})
+        self.assertEqual(self._calls('POST'), [])
@@ -12,10 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+import json
+import os
+
+import fixtures
+import mock
+
+from automationclient import exceptions
 from automationclient.tests import utils
+from automationclient.utils import content_hash
 from automationclient.tests.v1_1 import fakes
 from automationclient.v1_1.architectures import Architecture
+from automationclient.v1_1 import zones
 from automationclient.v1_1.zones import Zone
+from automationclient.v1_1.zones import ZoneEvent
 from automationclient.v1_1.tasks import Task
 
 
@@ -208,3 +219,101 @@ class ZonesTest(utils.TestCase):
         zone = cs.zones.property_delete(zone, 'fake_property_key')
         cs.assert_called('PUT', '/zones/1234')
         self.assertIsInstance(zone, dict)
+
+    def test_zone_properties_patch(self):
+        zone = cs.zones.get(1234)
+        info = copy.deepcopy(zone._info)
+        cs.zones.properties_patch(zone,
+                                  set={'new_fake_property_key': 'value'},
+                                  delete=['fake_property_key'])
+        body = cs.client.callstack[-1][2]
+        cs.assert_called('PUT', '/zones/1234')
+        self.assertEqual(body['zone']['properties'],
+                         {'new_fake_property_key': 'value'})
+        self.assertNotIn('_links', body['zone'])
+        self.assertEqual(zone._info, info)
+
+    def test_zone_properties_patch_missing_key(self):
+        zone = cs.zones.get(1234)
+        self.assertRaises(exceptions.CommandError,
+                          cs.zones.properties_patch, zone,
+                          delete=['missing_property_key'])
+
+    def test_zone_snapshot(self):
+        snapshot = cs.zones.snapshot(1234)
+        self.assertEqual(snapshot['zone'], 1234)
+        self.assertEqual(sorted(snapshot['roles']['1234']['components']),
+                         ['1234', 'rabbitmq'])
+        content = dict(snapshot)
+        self.assertEqual(content.pop('hash'), content_hash(content))
+
+    def test_zone_snapshot_file(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'snapshot.json')
+        snapshot = cs.zones.snapshot(1234)
+        zones.write_snapshot(snapshot, path)
+        self.assertEqual(zones.read_snapshot(path), snapshot)
+
+        snapshot['properties']['tampered'] = True
+        with open(path, 'w') as f:
+            json.dump(snapshot, f)
+        self.assertRaises(exceptions.CommandError, zones.read_snapshot, path)
+
+    def test_zone_restore_unchanged(self):
+        snapshot = cs.zones.snapshot(1234)
+        cs.clear_callstack()
+        plan = cs.zones.restore(1234, snapshot)
+        self.assertEqual(plan['calls'], [])
+        self.assertEqual(plan['unchanged'], 2)
+        self.assertFalse([call for call in cs.client.callstack
+                          if call[0] != 'GET'])
+
+    def test_zone_restore_changed(self):
+        snapshot = cs.zones.snapshot(1234)
+        rabbitmq = snapshot['roles']['1234']['components']['rabbitmq']
+        rabbitmq['config']['properties'] = {}
+        rabbitmq['hash'] = 'changed'
+        snapshot['roles']['1234']['components']['gone'] = rabbitmq
+
+        cs.clear_callstack()
+        plan = cs.zones.restore(1234, snapshot, dry_run=True)
+        url = '/zones/1234/roles/1234/components/rabbitmq'
+        self.assertEqual([call['url'] for call in plan['calls']], [url])
+        self.assertEqual(plan['missing'],
+                         ['/zones/1234/roles/1234/components/gone'])
+        self.assertFalse([call for call in cs.client.callstack
+                          if call[0] != 'GET'])
+
+        cs.zones.restore(1234, snapshot)
+        cs.assert_called('PUT', url,
+                         {'component': rabbitmq['config']})
+
+    def test_zone_watch(self):
+        watch_cs = fakes.FakeClient()
+        polls = [
+            [{'id': 1, 'status': 'ACTIVATED'}, {'id': 2, 'status': 'NEW'}],
+            [{'id': 1, 'status': 'ACTIVATED'}, {'id': 2, 'status': 'READY'},
+             {'id': 3, 'status': 'NEW'}],
+            [{'id': 2, 'status': 'READY'}, {'id': 3, 'status': 'NEW'}],
+        ]
+
+        def get_zones_1234_nodes(**kw):
+            return (200, {}, {'nodes': polls.pop(0)})
+
+        watch_cs.client.get_zones_1234_nodes = get_zones_1234_nodes
+        with mock.patch('time.sleep') as sleep:
+            events = list(watch_cs.zones.watch(1234, interval=7,
+                                               kinds=['nodes'],
+                                               iterations=3))
+        sleep.assert_called_with(7)
+        self.assertEqual(sleep.call_count, 2)
+        watch_cs.assert_called('GET', '/zones/1234/nodes')
+        self.assertEqual([(e.type, e.id) for e in events],
+                         [(ZoneEvent.CHANGED, 2), (ZoneEvent.ADDED, 3),
+                          (ZoneEvent.REMOVED, 1)])
+        self.assertEqual(events[0].changes,
+                         {'status': {'old': 'NEW', 'new': 'READY'}})
+
+    def test_zone_watch_invalid_kind(self):
+        self.assertRaises(exceptions.CommandError, list,
+                          cs.zones.watch(1234, kinds=['devices']))
@@ -17,18 +17,105 @@
 
 from __future__ import print_function
 
+import collections
+import contextlib
+import csv
+import hashlib
 import os
 import re
 import sys
+import threading
 import uuid
 
 import six
-import prettytable
 import json
 
 from automationclient import exceptions
 from automationclient.openstack.common import strutils
 
+# Number of worker threads used by the batch helpers when the caller does
+# not ask for a specific concurrency.
+DEFAULT_CONCURRENCY = 8
+
+# Formats print_list and print_dict can write. Every format but 'table' is
+# written row by row as the rows are produced.
+OUTPUT_FORMATS = ('table', 'json', 'ndjson', 'csv', 'value')
+
+_output_format = 'table'
+_output_fields = None
+
+# Output options of the subcommand running in the current thread, see
+# output_options(), taking precedence over the ones of the process.
+_thread_output = threading.local()
+
+
+def _check_format(output_format):
+    if output_format not in OUTPUT_FORMATS:
+        raise exceptions.CommandError("Unknown output format '%s', use one "
+                                      "of: %s" % (output_format,
+                                                  ', '.join(OUTPUT_FORMATS)))
+    return output_format
+
+
+def _clean_fields(fields):
+    fields = [field.strip() for field in fields or [] if field.strip()]
+    return fields or None
+
+
+def set_output_format(output_format):
+    """Set the format of print_list and print_dict, one of OUTPUT_FORMATS."""
+    global _output_format
+    _output_format = _check_format(output_format)
+
+
+def get_output_format():
+    return getattr(_thread_output, 'format', _output_format)
+
+
+def set_output_fields(fields):
+    """Restrict print_list and print_dict to ``fields``, None for all."""
+    global _output_fields
+    _output_fields = _clean_fields(fields)
+
+
+def _fields():
+    return getattr(_thread_output, 'fields', _output_fields)
+
+
+def get_output_fields():
+    """Return the attribute names of the fields to print, or None."""
+    if not _fields():
+        return None
+    return [field.lower().replace(' ', '_') for field in _fields()]
+
+
+@contextlib.contextmanager
+def output_options(output_format, fields):
+    """Print with ``output_format`` and ``fields`` in the current thread
+    only, as the subcommands of a batch running at once do.
+    """
+    _thread_output.format = _check_format(output_format)
+    _thread_output.fields = _clean_fields(fields)
+    try:
+        yield
+    finally:
+        del _thread_output.format
+        del _thread_output.fields
+
+
+def _project(fields):
+    """Return the fields to print among the default ``fields``.
+
+    Fields given with set_output_fields that are not among the defaults
+    are printed as well, from the attribute with their name.
+    """
+    if not _fields():
+        return fields
+    by_name = dict((field.lower().replace(' ', '_'), field)
+                   for field in fields)
+    return [by_name.get(field.lower().replace(' ', '_'), field)
+            for field in _fields()]
+
 
 def arg(*args, **kwargs):
     """Decorator for CLI args."""
@@ -126,6 +213,28 @@ def isunauthenticated(f):
     return getattr(f, 'unauthenticated', False)
 
 
+def fan_out_zones(f):
+    """
+    Adds 'fan_out_zones' attribute to decorated function, which marks the
+    commands accepting --zones.
+    Usage:
+        @fan_out_zones
+        def mymethod(f):
+            ...
+    """
+    f.fan_out_zones = True
+    return f
+
+
+def fans_out_zones(f):
+    """
+    Checks to see if the function is marked as accepting --zones with the
+    @fan_out_zones decorator. Returns True if decorator is set to True,
+    False otherwise.
+    """
+    return getattr(f, 'fan_out_zones', False)
+
+
 def service_type(stype):
     """
     Adds 'service_type' attribute to decorated function.
@@ -154,38 +263,99 @@ def pretty_choice_list(l):
 
 
 def _print(pt, order):
+    # A false ``order`` keeps the rows in the order they were added.
+    options = {'sortby': order} if order else {}
     if sys.version_info >= (3, 0):
-        print(pt.get_string(sortby=order))
+        print(pt.get_string(**options))
     else:
-        print(strutils.safe_encode(pt.get_string(sortby=order)))
+        print(strutils.safe_encode(pt.get_string(**options)))
+
+
+def _field_value(o, field, formatters):
+    if field in formatters:
+        return formatters[field](o)
+    field_name = field.lower().replace(' ', '_')
+    return getattr(o, field_name, '')
+
+
+def _text(value):
+    """Return ``value`` as a single line of text, for csv and value."""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    if isinstance(value, six.binary_type):
+        return strutils.safe_decode(value)
+    return six.text_type(value)
+
+
+def _write_line(line):
+    if sys.version_info >= (3, 0):
+        print(line)
+    else:
+        print(strutils.safe_encode(line))
+
+
+def _stream(fields, rows):
+    """Write ``rows``, lists of values of ``fields``, in the output format
+    as they are produced.
+    """
+    output_format = get_output_format()
+    if output_format == 'csv':
+        def encode(value):
+            if sys.version_info >= (3, 0):
+                return _text(value)
+            # The csv module of Python 2 only writes bytes.
+            return strutils.safe_encode(_text(value))
+
+        writer = csv.writer(sys.stdout, lineterminator='\n')
+        writer.writerow([encode(field) for field in fields])
+        for row in rows:
+            writer.writerow([encode(value) for value in row])
+    elif output_format == 'value':
+        for row in rows:
+            _write_line(' '.join(_text(value) for value in row))
+    elif output_format == 'ndjson':
+        for row in rows:
+            _write_line(json.dumps(collections.OrderedDict(zip(fields, row)),
+                                   default=six.text_type))
+    else:
+        separator = '['
+        for row in rows:
+            _write_line(separator + json.dumps(
+                collections.OrderedDict(zip(fields, row)),
+                default=six.text_type))
+            separator = ','
+        _write_line('[]' if separator == '[' else ']')
 
 
 def print_list(objs, fields, formatters={}, order_by=None, pretty=None):
+    projected = _project(fields)
+    if order_by not in projected and order_by:
+        order_by = None
+    fields = projected
+
+    if get_output_format() != 'table':
+        _stream(fields, ([_field_value(o, field, formatters)
+                          for field in fields] for o in objs))
+        return
+
+    # Only the commands printing tables pay for importing prettytable.
+    import prettytable
     pt = prettytable.PrettyTable([f for f in fields], caching=False)
     pt.aligns = ['l' for f in fields]
 
     for o in objs:
         row = []
         for field in fields:
-            if field in formatters:
-                row.append(formatters[field](o))
-            else:
-                field_name = field.lower().replace(' ', '_')
-                data = getattr(o, field_name, '')
-                if isinstance(data, dict):
-                    if pretty:
-                        row.append(json.dumps(data, sort_keys=True, indent=4,
-                                              separators=(',', ': ')))
-                    else:
-                        row.append(json.dumps(data))
-                if isinstance(data, list):
-                    if pretty:
-                        row.append(json.dumps(data, sort_keys=True, indent=4,
-                                              separators=(',', ': ')))
-                    else:
-                        row.append(json.dumps(data))
+            data = _field_value(o, field, formatters)
+            if field not in formatters and isinstance(data, (dict, list)):
+                if pretty:
+                    data = json.dumps(data, sort_keys=True, indent=4,
+                                      separators=(',', ': '))
                 else:
-                    row.append(data)
+                    data = json.dumps(data)
+            row.append(data)
         pt.add_row(row)
 
     if order_by is None:
@@ -199,6 +369,18 @@ def print_dict(d, property="Property"):
     :param d:
     :param property:
     """
+    if _fields():
+        d = dict((key, value) for key, value in six.iteritems(d)
+                 if key in get_output_fields())
+    output_format = get_output_format()
+    if output_format in ('json', 'ndjson'):
+        _write_line(json.dumps(d, sort_keys=True, default=six.text_type))
+        return
+    if output_format != 'table':
+        _stream([property, 'Value'], ([key, d[key]] for key in sorted(d)))
+        return
+
+    import prettytable
     pt = prettytable.PrettyTable([property, 'Value'], caching=False)
     pt.aligns = ['l', 'l']
     [pt.add_row(list(r)) for r in six.iteritems(d)]
@@ -214,6 +396,9 @@ def remove_values_from_manager_dict(manager, keys):
 
 
 def check_json_value_for_dict(data):
+    if get_output_format() != 'table':
+        # Machine readable formats keep the nested values as they are.
+        return data
     final_dict = {}
     for key, value in data.items():
         if isinstance(value, dict):
@@ -227,6 +412,8 @@ def check_json_value_for_dict(data):
 
 
 def check_json_pretty_value_for_dict(data):
+    if get_output_format() != 'table':
+        return data
     final_dict = {}
     for key, value in data.items():
         if isinstance(value, dict):
@@ -313,6 +500,120 @@ class HookableMixin(object):
             hook_func(*args, **kwargs)
 
 
+def parallel_map(func, items, concurrency=DEFAULT_CONCURRENCY,
+                 return_exceptions=False):
+    """
+    Call ``func`` for every element of ``items`` using up to
+    ``concurrency`` worker threads and return the results in the same order
+    as ``items``.
+
+    By default the first error raised by ``func`` is re-raised once every
+    item has been processed. With ``return_exceptions`` the exception
+    instance is stored in place of the result instead, so callers can report
+    failures per item.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = []
+
+    def _call(index, item):
+        try:
+            results[index] = func(item)
+        except Exception as e:
+            if return_exceptions:
+                results[index] = e
+            else:
+                errors.append((index, sys.exc_info()))
+
+    if concurrency is None or concurrency <= 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            _call(index, item)
+    else:
+        work = six.moves.queue.Queue()
+        for index, item in enumerate(items):
+            work.put((index, item))
+
+        def _worker():
+            while True:
+                try:
+                    index, item = work.get_nowait()
+                except six.moves.queue.Empty:
+                    return
+                _call(index, item)
+
+        workers = [threading.Thread(target=_worker)
+                   for _ in range(min(concurrency, len(items)))]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    if errors:
+        errors.sort(key=lambda error: error[0])
+        six.reraise(*errors[0][1])
+
+    return results
+
+
+def content_hash(data):
+    """Return a stable SHA-256 hex digest of a JSON serializable value."""
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def structural_diff(old, new, path='', partial=False):
+    """
+    Compare two JSON like values and return the list of differences as
+    ``(path, old, new)`` tuples, where ``path`` is a dotted path to the value
+    that differs (list items are addressed by ``[index]``). Missing values
+    are reported as None.
+
+    With ``partial`` the keys of the dictionaries of ``new`` are the only
+    ones compared, ``new`` is a subset of the values ``old`` should hold.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        keys = set(new) if partial else set(old) | set(new)
+        for key in sorted(keys):
+            child = '%s.%s' % (path, key) if path else str(key)
+            if key not in old:
+                changes.append((child, None, new[key]))
+            elif key not in new:
+                changes.append((child, old[key], None))
+            else:
+                changes.extend(structural_diff(old[key], new[key], child,
+                                               partial))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list) and \
+            len(old) == len(new):
+        changes = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            changes.extend(structural_diff(old_item, new_item,
+                                           '%s[%d]' % (path, index),
+                                           partial))
+        return changes
+
+    if old != new:
+        return [(path, old, new)]
+    return []
+
+
+def structural_merge(old, new):
+    """
+    Return a copy of the JSON like value ``old`` with the values of ``new``
+    set on it, the dictionaries of both are merged key by key.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        merged = dict(old)
+        for key, value in new.items():
+            merged[key] = structural_merge(old[key], value) \
+                if key in old else value
+        return merged
+    return new
+
+
 def safe_issubclass(*args):
     """Like issubclass, but will just return False if not a class."""
 
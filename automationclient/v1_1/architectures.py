@@ -16,7 +16,50 @@
 
 """Architecture interface."""
 
+import gzip
+import json
+
 from automationclient import base
+from automationclient import exceptions
+from automationclient import utils
+
+# Version of the bundles written by ArchitectureManager.export().
+BUNDLE_FORMAT = 1
+
+# Keys that identify a document on a given server and are not part of the
+# definition that is replicated elsewhere.
+_SERVER_KEYS = ('id', '_links')
+
+
+def _definition(info):
+    return dict((k, v) for k, v in info.items() if k not in _SERVER_KEYS)
+
+
+def write_bundle(bundle, path):
+    """Write an architecture bundle as gzip compressed JSON."""
+    f = gzip.open(path, 'wb')
+    try:
+        f.write(json.dumps(bundle, sort_keys=True).encode('utf-8'))
+    finally:
+        f.close()
+
+
+def read_bundle(path):
+    """Read a bundle written by :func:`write_bundle`."""
+    f = gzip.open(path, 'rb')
+    try:
+        bundle = json.loads(f.read().decode('utf-8'))
+    except (IOError, ValueError):
+        raise exceptions.CommandError("The file %s is not an architecture "
+                                      "bundle." % path)
+    finally:
+        f.close()
+
+    if not isinstance(bundle, dict) or \
+            bundle.get('format') != BUNDLE_FORMAT:
+        raise exceptions.CommandError("Unsupported architecture bundle "
+                                      "format in %s." % path)
+    return bundle
 
 
 class Architecture(base.Resource):
@@ -30,13 +73,17 @@ class Architecture(base.Resource):
 class ArchitectureManager(base.ManagerWithFind):
     """Manage :class:`Architecture` resources."""
     resource_class = Architecture
+    server_filters = ('name',)
 
-    def list(self):
+    def list(self, search_opts=None):
         """Get a list of all architectures.
 
+        :param search_opts: optional dictionary of ``server_filters`` to
+                            filter the architectures by on the server.
         :rtype: list of :class:`Architectures`.
         """
-        return self._list("/archs", "architectures")
+        return self._list("/archs%s" % base.query_string(search_opts),
+                          "architectures")
 
     def get(self, architecture):
         """Get a specific architecture.
@@ -65,3 +112,86 @@ class ArchitectureManager(base.ManagerWithFind):
         :param architecture: The :class:`Architecture` to delete.
         """
         self._delete("/archs/%s" % base.getid(architecture))
+
+    def export(self, architecture, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Export an architecture, its template and all its profiles.
+
+        The architecture, the template and the profile listing are fetched
+        at the same time, then every profile is fetched with up to
+        ``concurrency`` requests in flight.
+
+        :param architecture: The :class:`Architecture` to export.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: dictionary that can be saved with :func:`write_bundle`.
+        """
+        profiles = self.api.profiles
+        architecture, template, summaries = utils.parallel_map(
+            lambda fetch: fetch(),
+            [lambda: self.get(architecture),
+             lambda: profiles.template(architecture),
+             lambda: profiles.list(architecture)],
+            concurrency)
+
+        full = utils.parallel_map(
+            lambda p: profiles.get(architecture, p.id), summaries,
+            concurrency)
+
+        return {
+            'format': BUNDLE_FORMAT,
+            'architecture': _definition(architecture._info),
+            'template': _definition(template._info),
+            'profiles': [_definition(p._info) for p in full],
+        }
+
+    def import_bundle(self, bundle, architecture=None,
+                      concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Import a bundle written by :meth:`export`.
+
+        The architecture is created unless an existing one is given. Each
+        profile of the bundle is then created, updated when a profile with
+        the same name differs, or skipped when it is already identical,
+        with up to ``concurrency`` requests in flight.
+
+        :param bundle: dictionary returned by :meth:`export`.
+        :param architecture: optional existing :class:`Architecture` to
+                             import the profiles into.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: tuple of the :class:`Architecture` and a dictionary with
+                the names of the 'created', 'updated' and 'skipped'
+                profiles.
+        """
+        profiles = self.api.profiles
+        if architecture is None:
+            architecture = self.create(
+                {'architecture': bundle['architecture']})
+
+        existing = utils.parallel_map(
+            lambda p: profiles.get(architecture, p.id),
+            profiles.list(architecture), concurrency)
+        existing = dict((p.name, p) for p in existing)
+
+        report = {'created': [], 'updated': [], 'skipped': []}
+        uploads = []
+        for definition in bundle['profiles']:
+            name = definition.get('name')
+            current = existing.get(name)
+            if current is None:
+                report['created'].append(name)
+                uploads.append((None, definition))
+            elif _definition(current._info) != definition:
+                report['updated'].append(name)
+                uploads.append((current, definition))
+            else:
+                report['skipped'].append(name)
+
+        def upload(item):
+            current, definition = item
+            body = {'profile': definition}
+            if current is None:
+                return profiles.create(architecture, body)
+            return profiles.update(architecture, current, body)
+
+        utils.parallel_map(upload, uploads, concurrency)
+        return architecture, report
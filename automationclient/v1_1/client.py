@@ -15,6 +15,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from automationclient import cache as response_cache
 from automationclient import client
 from automationclient.v1_1 import devices
 from automationclient.v1_1 import components
@@ -50,11 +51,16 @@ class Client(object):
                  endpoint_type='publicURL', extensions=None,
                  service_type='automation', service_name=None,
                  retries=None, http_log_debug=False,
-                 cacert=None):
+                 cacert=None, strict_loading=False, cache=False,
+                 cache_ttls=None, offline=False):
         # FIXME(comstud): Rename the api_key argument above when we
         # know it's not being used as keyword argument
         password = api_key
 
+        # Raise instead of lazy-loading missing resource attributes, so N+1
+        # request patterns show up in tests (see Manager.hydrate).
+        self.strict_loading = strict_loading
+
         # extensions
         self.devices = devices.DeviceManager(self)
         self.components = components.ComponentManager(self)
@@ -75,6 +81,18 @@ class Client(object):
                     setattr(self, extension.name,
                             extension.manager_class(self))
 
+        # Optional persistent cache of GET responses, see
+        # automationclient.cache.
+        if cache is True:
+            cache = response_cache.ResponseCache.for_credentials(
+                username, auth_url, ttls=cache_ttls, offline=offline)
+        elif not cache:
+            cache = None
+        elif not all(hasattr(cache, method)
+                     for method in ('get', 'set', 'invalidate')):
+            raise TypeError("cache must be True, False or a response cache, "
+                            "not %r" % (cache,))
+
         self.client = client.HTTPClient(
             username,
             password,
@@ -91,7 +109,8 @@ class Client(object):
             service_name=service_name,
             retries=retries,
             http_log_debug=http_log_debug,
-            cacert=cacert)
+            cacert=cacert,
+            cache=cache)
 
     def authenticate(self):
         """
@@ -17,6 +17,8 @@
 """Component interface."""
 
 from automationclient import base
+from automationclient import exceptions
+from automationclient import utils
 
 
 class Component(base.Resource):
@@ -28,13 +30,17 @@ class Component(base.Resource):
 class ComponentManager(base.ManagerWithFind):
     """Manage :class:`Component` resources."""
     resource_class = Component
+    server_filters = ('name',)
 
-    def list(self):
+    def list(self, search_opts=None):
         """Get a list of all component.
 
+        :param search_opts: optional dictionary of ``server_filters`` to
+                            filter the components by on the server.
         :rtype: list of :class:`Component`.
         """
-        return self._list("/components", "components")
+        return self._list("/components%s" % base.query_string(search_opts),
+                          "components")
 
     def get(self, component):
         """Get a specific component.
@@ -100,3 +106,96 @@ class ComponentManager(base.ManagerWithFind):
                                base.getid(role),
                                component_id),
                             component_file)
+
+    def get_zone_configs(self, zone, concurrency=utils.DEFAULT_CONCURRENCY):
+        """Get the configuration of every component of every role of a zone.
+
+        The components of all the roles are listed and then fetched with up
+        to ``concurrency`` requests in flight.
+
+        :param zone: The ID of the :class: `Zone` to get.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: tuple of a list of :class:`Role` and a dictionary of role ID
+                to a dictionary of component name to its document, without
+                ``_links``.
+        """
+        roles = self.api.roles.list(zone)
+        listings = utils.parallel_map(
+            lambda role: self.list_zone_role(zone, role), roles, concurrency)
+
+        pairs = [(role, component.name)
+                 for role, components in zip(roles, listings)
+                 for component in components]
+        components = utils.parallel_map(
+            lambda pair: self.get_zone_role(zone, pair[0], pair[1]), pairs,
+            concurrency)
+
+        configs = dict((str(role.id), {}) for role in roles)
+        for (role, name), component in zip(pairs, components):
+            info = dict(component._info)
+            info.pop('_links', None)
+            configs[str(role.id)][name] = info
+        return roles, configs
+
+    def sync_zone(self, zone, desired, dry_run=False,
+                  concurrency=utils.DEFAULT_CONCURRENCY):
+        """Converge the components of a zone to the desired configuration.
+
+        The current configuration of every component in ``desired`` is
+        fetched with up to ``concurrency`` requests in flight and only the
+        components that really differ are updated. The desired
+        configurations may be partial: only the keys they hold are compared
+        and set, the others keep their current values.
+
+        :param zone: The ID of the :class: `Zone` to converge.
+        :param desired: dictionary of role (ID or name) to a dictionary of
+                        component name to its configuration, as given by
+                        role-component-json (with or without the
+                        ``component`` wrapper).
+        :param dry_run: only compute the report, do not update anything.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: dictionary with the 'updated' components (role, component
+                and the list of (path, old, new) changes) and the names of
+                the 'unchanged' ones.
+        """
+        roles = self.api.roles.list(zone)
+        by_key = dict((str(role.id), role) for role in roles)
+        by_key.update((role.name, role) for role in roles
+                      if role.name not in by_key)
+
+        wanted = []
+        for role_key, components in sorted(desired.items()):
+            role = by_key.get(str(role_key))
+            if role is None:
+                msg = "No role '%s' exists in zone %s." % \
+                      (role_key, base.getid(zone))
+                raise exceptions.CommandError(msg)
+            for name, config in sorted(components.items()):
+                config = dict(config.get('component', config))
+                config.pop('_links', None)
+                wanted.append((role, name, config))
+
+        current = utils.parallel_map(
+            lambda item: self.get_zone_role(zone, item[0], item[1]), wanted,
+            concurrency)
+
+        report = {'updated': [], 'unchanged': []}
+        updates = []
+        for (role, name, config), component in zip(wanted, current):
+            info = dict(component._info)
+            info.pop('_links', None)
+            changes = utils.structural_diff(info, config, partial=True)
+            if changes:
+                report['updated'].append({'role': role.id, 'component': name,
+                                          'changes': changes})
+                updates.append((role, name,
+                                utils.structural_merge(info, config)))
+            else:
+                report['unchanged'].append('%s/%s' % (role.id, name))
+
+        if not dry_run:
+            utils.parallel_map(
+                lambda item: self.update_zone_role(
+                    zone, item[0], item[1], {'component': item[2]}),
+                updates, concurrency)
+        return report
@@ -16,7 +16,69 @@
 
 """Datastores interface."""
 
+import requests
+
 from automationclient import base
+from automationclient import exceptions
+from automationclient import utils
+
+# Keys of the space figures in a datastore space document. The free space is
+# reported as 'free' or 'available' depending on the storage type.
+SPACE_KEYS = {
+    'total': ('total', 'size'),
+    'used': ('used',),
+    'free': ('free', 'available'),
+}
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _space_figures(info):
+    """Return the total, used and free space of a space document."""
+    space = info.get('space')
+    if not isinstance(space, dict):
+        space = info
+
+    figures = {}
+    for figure, keys in SPACE_KEYS.items():
+        figures[figure] = None
+        for key in keys:
+            if key in space:
+                figures[figure] = _number(space[key])
+                break
+
+    if figures['free'] is None and None not in (figures['total'],
+                                                figures['used']):
+        figures['free'] = figures['total'] - figures['used']
+    if figures['used'] is None and None not in (figures['total'],
+                                                figures['free']):
+        figures['used'] = figures['total'] - figures['free']
+    return figures
+
+
+def _unique(items, key):
+    seen = set()
+    unique = []
+    for item in items:
+        if key(item) not in seen:
+            seen.add(key(item))
+            unique.append(item)
+    return unique
+
+
+def _error_message(e):
+    return str(e) or e.__class__.__name__
+
+
+def _free_percent(total, free):
+    if not total or free is None:
+        return None
+    return round(100.0 * free / total, 2)
 
 
 class Datastore(base.Resource):
@@ -30,14 +92,18 @@ class Datastore(base.Resource):
 class DatastoreManager(base.ManagerWithFind):
     """Manage :class:`Datastore` resources."""
     resource_class = Datastore
+    server_filters = ('identifier', 'status', 'endpoint', 'store')
 
-    def list(self):
+    def list(self, search_opts=None):
         """Get a list of all pool.
 
+        :param search_opts: optional dictionary of ``server_filters`` to
+                            filter the datastores by on the server.
         :rtype: list of :class:`Datastore`.
         """
 
-        return self._list('/datastores', 'datastores')
+        return self._list('/datastores%s' % base.query_string(search_opts),
+                          'datastores')
 
     def get(self, datastore):
         """Get a specific datastore from pool.
@@ -75,6 +141,135 @@ class DatastoreManager(base.ManagerWithFind):
         return self._get('/datastores/%s/content' % base.getid(datastore),
                          'datastore')
 
+    def survey(self, datastores=None, content=False,
+               concurrency=utils.DEFAULT_CONCURRENCY):
+        """Get the space (and optionally the content) of many datastores.
+
+        The datastores are queried with up to ``concurrency`` requests in
+        flight. A datastore that fails does not stop the survey, its error
+        is reported in its entry instead.
+
+        :param datastores: list of :class:`Datastore` or IDs, all the
+                           datastores of the pool by default.
+        :param content: fetch the top content of every datastore as well.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: dictionary with the list of 'datastores' (identification,
+                'total', 'used', 'free', 'free_percent', 'content' and
+                'error') and the aggregated 'totals'.
+        """
+        if datastores is None:
+            datastores = self.list()
+
+        def _survey(datastore):
+            entry = {'id': base.getid(datastore), 'error': None}
+            try:
+                info = self.space(datastore)._info
+                entry.update((key, info.get(key)) for key in
+                             ('identifier', 'endpoint', 'store', 'status'))
+                entry.update(_space_figures(info))
+                if content:
+                    entry['content'] = self.content(datastore)._info
+            except Exception as e:
+                entry['error'] = _error_message(e)
+            entry['free_percent'] = _free_percent(entry.get('total'),
+                                                  entry.get('free'))
+            return entry
+
+        entries = utils.parallel_map(_survey, datastores, concurrency)
+
+        totals = {'count': len(entries),
+                  'errors': len([e for e in entries if e['error']])}
+        for figure in SPACE_KEYS:
+            totals[figure] = sum(e[figure] for e in entries
+                                 if e.get(figure) is not None)
+        totals['free_percent'] = _free_percent(totals['total'],
+                                               totals['free'])
+        return {'datastores': entries, 'totals': totals}
+
+    def _post_many(self, url, bodies, timeout, concurrency):
+        kwargs = {}
+        if timeout:
+            kwargs['timeout'] = timeout
+
+        def _post(body):
+            try:
+                return self.api.client.post(url, body=body, **kwargs)[1]
+            except (exceptions.ClientException, exceptions.ConnectionError,
+                    requests.exceptions.RequestException) as e:
+                return e
+
+        return utils.parallel_map(_post, bodies, concurrency)
+
+    def discovery_many(self, endpoints, storage_type='NFS', timeout=None,
+                       concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Discovery the datastores of many endpoints.
+
+        Every endpoint is probed once, with up to ``concurrency`` probes in
+        flight and each one limited to ``timeout`` seconds. The stores found
+        are merged, an export reachable through the same endpoint is only
+        reported once.
+
+        :param endpoints: list of NFS or GLUSTER endpoints.
+        :param storage_type: 'NFS' or 'GLUSTER'.
+        :param timeout: seconds to wait for each endpoint.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: dictionary with the discovered 'datastores' (each with its
+                'endpoint') and the 'errors' by endpoint.
+        """
+        endpoints = _unique([e.strip() for e in endpoints if e.strip()],
+                            key=lambda endpoint: endpoint)
+        bodies = [{'storage_type': storage_type, 'endpoint': endpoint}
+                  for endpoint in endpoints]
+        results = self._post_many('/datastores/discovery', bodies, timeout,
+                                  concurrency)
+
+        found = []
+        errors = {}
+        for endpoint, result in zip(endpoints, results):
+            if isinstance(result, Exception):
+                errors[endpoint] = _error_message(result)
+                continue
+            for datastore in result['datastores']:
+                datastore = dict(datastore)
+                datastore.setdefault('endpoint', endpoint)
+                found.append(datastore)
+
+        found = _unique(found, key=lambda d: (d['endpoint'], d.get('store')))
+        return {'datastores': found, 'errors': errors}
+
+    def validate_many(self, datastores, timeout=None,
+                      concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Validate many datastores.
+
+        :param datastores: list of dictionaries with the 'storage_type',
+                           'endpoint', 'store' and 'identifier' to validate,
+                           as given to :meth:`validate`. Repeated
+                           datastores are only validated once.
+        :param timeout: seconds to wait for each datastore.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: dictionary with the validated 'datastores' and the 'errors'
+                by 'endpoint:store'.
+        """
+        datastores = _unique(datastores,
+                             key=lambda d: (d.get('storage_type'),
+                                            d.get('endpoint'),
+                                            d.get('store')))
+        results = self._post_many('/datastores/validate', datastores,
+                                  timeout, concurrency)
+
+        validated = []
+        errors = {}
+        for datastore, result in zip(datastores, results):
+            if isinstance(result, Exception):
+                key = '%s:%s' % (datastore.get('endpoint'),
+                                 datastore.get('store'))
+                errors[key] = _error_message(result)
+            else:
+                validated.append(result['datastore'])
+        return {'datastores': validated, 'errors': errors}
+
     def validate(self, **kwargs):
         """
         Prepare a datastore
@@ -16,12 +16,49 @@
 
 """Device interface."""
 
+import json
+import os
+import time
+
 from automationclient import base
+from automationclient import exceptions
+from automationclient import utils
+from automationclient.v1_1 import tasks
+
+# Status of a node once its device has been activated and it can be
+# deployed, and the status of a node whose activation failed.
+NODE_READY_STATES = ('ACTIVATED',)
+NODE_FAILED_STATES = ('ERROR',)
+
+# Stages a device goes through in DeviceManager.onboard().
+ONBOARD_STAGES = ('pending', 'activating', 'ready', 'deploying', 'done',
+                  'failed')
+
+
+def _read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            raise exceptions.CommandError("The file %s is not an onboarding "
+                                          "checkpoint." % path)
+
+
+def _write_checkpoint(path, progress):
+    tmp_path = '%s.tmp' % path
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f, sort_keys=True, indent=4,
+                  separators=(',', ': '))
+    os.rename(tmp_path, path)
 
 
 class Device(base.Resource):
     """Device is a device in the pool
     """
+    COMPLETION_KEY = 'mac'
+
     def __repr__(self):
         return "<Device: %s>" % self.name
 
@@ -29,14 +66,21 @@ class Device(base.Resource):
 class DeviceManager(base.ManagerWithFind):
     """Manage :class:`Device` resources."""
     resource_class = Device
+    server_filters = ('name', 'mac', 'status')
 
-    def list(self):
+    def list(self, search_opts=None, fields=None):
         """Get a list of all pool.
 
+        :param search_opts: optional dictionary of ``server_filters`` to
+                            filter the devices by on the server.
+        :param fields: optional list of the attributes to return, the
+                       others are not loaded.
         :rtype: list of :class:`Device`.
         """
-
-        return self._list('/pool/devices', 'devices')
+        search_opts = base.fields_opts(search_opts, fields,
+                                       self.resource_class)
+        return self._list('/pool/devices%s' % base.query_string(search_opts),
+                          'devices', fields=fields)
 
     def get(self, device):
         """Get a specific device from pool.
@@ -134,6 +178,174 @@ class DeviceManager(base.ManagerWithFind):
         return self._action('replace', device, body=kwargs,
                             response_key='node')
 
+    def onboard(self, devices, zone, role, checkpoint=None, max_activating=4,
+                max_deploying=4, interval=5, bypass=False, dhcp_reload=True,
+                retry_failed=False, callback=None, timeout=None, **kwargs):
+        """Activate devices into a zone and deploy a role on them.
+
+        Every device moves on its own through the stages activating (the
+        device was activated and its node is not ready yet), ready,
+        deploying (the role deploy tasks are running) and done, so a slow
+        device does not hold back the others. At most ``max_activating`` and
+        ``max_deploying`` devices are in the activating and deploying
+        stages at any time.
+
+        The progress is saved after every change to ``checkpoint`` and,
+        when the file already exists, the onboarding resumes from it:
+        finished devices are not touched again and devices in flight are
+        followed from the stage they were in. Devices given by MAC are only
+        looked up in the pool when they have to be activated, as the
+        activated ones left it.
+
+        :param devices: list of :class:`Device`, or MACs, to onboard.
+        :param zone: The ID of the :class: `Zone` to activate them into.
+        :param role: The ID of the :class: `Role` to deploy on them.
+        :param checkpoint: path of the file to save the progress to.
+        :param max_activating: maximum number of devices activating, at
+                               least 1.
+        :param max_deploying: maximum number of devices deploying, at
+                              least 1.
+        :param interval: seconds between polls of the nodes and tasks.
+        :param bypass: bypass role deployment.
+        :param dhcp_reload: whether the nodes should ask for an IP after
+                            they are deployed.
+        :param retry_failed: start again the devices that failed in a
+                             previous run, from their last good stage.
+        :param callback: called with ``(mac, stage, detail)`` every time a
+                         device changes of stage.
+        :param timeout: seconds after which the devices still activating or
+                        deploying are failed and the onboarding stops, None
+                        to wait for them forever.
+        :param kwargs: options of :meth:`activate` (lom_user...).
+        :rtype: dictionary of device MAC to its progress, a dictionary with
+                its 'stage', 'node', 'tasks' and 'error'.
+        """
+        if max_activating < 1 or max_deploying < 1:
+            raise exceptions.CommandError("At least one device must be "
+                                          "allowed to activate and deploy "
+                                          "at once")
+        task_manager = self.api.tasks
+        node_manager = self.api.nodes
+        by_mac = dict((getattr(device, 'mac', device), device)
+                      for device in devices)
+        deadline = None if timeout is None else time.time() + timeout
+
+        progress = _read_checkpoint(checkpoint)
+        for mac in by_mac:
+            entry = progress.setdefault(mac, {'stage': 'pending',
+                                              'node': None, 'tasks': [],
+                                              'error': None})
+            if entry['stage'] == 'failed' and retry_failed:
+                entry['stage'] = self._retry_stage(node_manager, zone, entry)
+                if entry['stage'] != 'failed':
+                    entry['error'] = None
+
+        def move(mac, stage, error=None, **changes):
+            entry = progress[mac]
+            entry.update(changes, stage=stage, error=error)
+            if checkpoint:
+                _write_checkpoint(checkpoint, progress)
+            if callback:
+                callback(mac, stage, error)
+
+        def in_stage(stage):
+            return [mac for mac in sorted(by_mac)
+                    if progress[mac]['stage'] == stage]
+
+        def activate(mac):
+            device = by_mac[mac]
+            if not isinstance(device, base.Resource):
+                device = self.get(mac)
+            activate_options = dict(kwargs, zone_id=base.getid(zone))
+            return self.activate(device, **activate_options)['id']
+
+        def deploy(mac):
+            deployed = task_manager.deploy(zone, role, progress[mac]['node'],
+                                           bypass, None, dhcp_reload)
+            return [task.uuid for task in deployed]
+
+        def start(stage, func, limit, next_stage, key):
+            free = limit - len(in_stage(next_stage))
+            macs = in_stage(stage)[:max(free, 0)]
+            results = utils.parallel_map(func, macs, limit,
+                                         return_exceptions=True)
+            for mac, result in zip(macs, results):
+                if isinstance(result, Exception):
+                    move(mac, 'failed', str(result))
+                else:
+                    move(mac, next_stage, **{key: result})
+
+        while True:
+            start('pending', activate, max_activating, 'activating', 'node')
+            start('ready', deploy, max_deploying, 'deploying', 'tasks')
+
+            activating = in_stage('activating')
+            deploying = in_stage('deploying')
+            if not activating and not deploying:
+                break
+
+            if deadline is not None and time.time() >= deadline:
+                for mac in activating + deploying:
+                    move(mac, 'failed', 'timed out after %s seconds '
+                         'while %s' % (timeout, progress[mac]['stage']))
+                break
+
+            time.sleep(interval)
+
+            nodes = utils.parallel_map(
+                lambda mac: node_manager.get(zone, progress[mac]['node']),
+                activating, max_activating, return_exceptions=True)
+            for mac, node in zip(activating, nodes):
+                if isinstance(node, Exception):
+                    continue
+                if node.status in NODE_READY_STATES:
+                    move(mac, 'ready')
+                elif node.status in NODE_FAILED_STATES:
+                    move(mac, 'failed', 'node %s is %s' % (node.id,
+                                                           node.status))
+
+            listings = utils.parallel_map(
+                lambda mac: task_manager.list_node(zone,
+                                                   progress[mac]['node']),
+                deploying, max_deploying, return_exceptions=True)
+            for mac, listing in zip(deploying, listings):
+                if isinstance(listing, Exception):
+                    continue
+                states = dict((task.uuid, task.state) for task in listing
+                              if task.uuid in progress[mac]['tasks'])
+                if len(states) < len(progress[mac]['tasks']) or \
+                        [state for state in states.values()
+                         if state not in tasks.DONE_STATES]:
+                    continue
+                failed = sorted(uuid for uuid, state in states.items()
+                                if state in tasks.FAILED_STATES)
+                if failed:
+                    move(mac, 'failed', 'tasks %s failed' % ', '.join(failed))
+                else:
+                    move(mac, 'done')
+
+        return dict((mac, progress[mac]) for mac in by_mac)
+
+    @staticmethod
+    def _retry_stage(node_manager, zone, entry):
+        """Return the stage to retry a failed device from."""
+        if not entry['node']:
+            return 'pending'
+        try:
+            node = node_manager.get(zone, entry['node'])
+        except exceptions.NotFound:
+            # Deactivated, the device is back in the pool.
+            return 'pending'
+        except Exception as e:
+            entry['error'] = str(e)
+            return 'failed'
+        if node.status in NODE_READY_STATES:
+            return 'ready'
+        if node.status in NODE_FAILED_STATES:
+            entry['error'] = 'node %s is %s' % (node.id, node.status)
+            return 'failed'
+        return 'activating'
+
     def _action(self, action, device, body=None, response_key=None):
         """Perform a device action."""
 
@@ -38,7 +38,7 @@ class ProfileManager(base.ManagerWithFind):
         its services.
         :rtype: :class:`Architecture`
         """
-        return self._list("/archs/%s/profiles" % architecture.id,
+        return self._list("/archs/%s/profiles" % base.getid(architecture),
                           "profiles")
 
     def get(self, architecture, profile):
@@ -117,60 +117,43 @@ class ProfileManager(base.ManagerWithFind):
     def property_create(self, architecture, profile, property_key,
                         property_value):
 
-        profile_dict = profile._info
-        props_dict = profile_dict['properties']
-
-        if property_key not in props_dict:
-            props_dict[property_key] = property_value
-        else:
+        if property_key in profile.properties:
             msg = "A profile property with a key: '%s' exists." % \
                   (property_key)
             raise exceptions.CommandError(msg)
 
-        profile_dict['properties'] = props_dict
-        del profile_dict['_links']
-        profile_body = {"profile": profile_dict}
-
-        return self._update("/archs/%s/profiles/%s" %
-                           (base.getid(architecture),
-                            base.getid(profile)), profile_body)
+        return self.properties_patch(architecture, profile,
+                                     set={property_key: property_value})
 
     def property_update(self, architecture, profile, property_key,
                         property_value):
 
-        profile_dict = profile._info
-        props_dict = profile_dict['properties']
-
-        if property_key in props_dict:
-            props_dict[property_key] = property_value
-        else:
+        if property_key not in profile.properties:
             msg = "No profile property with a key: '%s' exists." % \
                   (property_key)
             raise exceptions.CommandError(msg)
 
-        profile_dict['properties'] = props_dict
-        del profile_dict['_links']
-        profile_body = {"profile": profile_dict}
-
-        return self._update("/archs/%s/profiles/%s" %
-                           (base.getid(architecture),
-                            base.getid(profile)), profile_body)
+        return self.properties_patch(architecture, profile,
+                                     set={property_key: property_value})
 
     def property_delete(self, architecture, profile, property_key):
 
-        profile_dict = profile._info
-        props_dict = profile_dict['properties']
-
-        if property_key in props_dict:
-            del props_dict[property_key]
-        else:
-            msg = "No profile property with a key: '%s' exists." % \
-                  (property_key)
-            raise exceptions.CommandError(msg)
+        return self.properties_patch(architecture, profile,
+                                     delete=[property_key])
 
-        profile_dict['properties'] = props_dict
-        del profile_dict['_links']
-        profile_body = {"profile": profile_dict}
+    def properties_patch(self, architecture, profile, set=None, delete=None):
+        """
+        Change several profile properties with a single update.
+
+        :param architecture: The ID of the :class: `Architecture` of the
+                             profile.
+        :param profile: The :class:`Profile` to update, it is not modified.
+        :param set: dictionary of property keys to create or update
+        :param delete: list of property keys to remove
+        :rtype: dictionary with the updated profile, as returned by the API.
+        """
+        profile_body = self._properties_body(profile, 'profile', set=set,
+                                             delete=delete)
 
         return self._update("/archs/%s/profiles/%s" %
                            (base.getid(architecture),
@@ -44,15 +44,14 @@ class PropertyManager(base.ManagerWithFind):
         :param property_key: the key of the property
         :param property_value: the value the tue property
         """
-        properties = self.list()
-        if property_key not in properties:
+        def change(properties):
+            if property_key in properties:
+                msg = "A %s with a key: '%s' exists." % \
+                      (self.resource_class.__name__.lower(), property_key)
+                raise exceptions.CommandError(msg)
             properties[property_key] = property_value
-        else:
-            msg = "A %s with a key: '%s' exists." % \
-                  (self.resource_class.__name__.lower(), property_key)
-            raise exceptions.CommandError(msg)
 
-        return self._update("/properties", properties)
+        return self._read_modify_write(change)
 
     def update(self, property_key, property_value):
         """
@@ -61,14 +60,11 @@ class PropertyManager(base.ManagerWithFind):
         :param property_key: the key of the property
         :param property_value: the value the tue property
         """
-        properties = self.list()
-        if property_key in properties:
+        def change(properties):
+            self._check_exists(properties, property_key)
             properties[property_key] = property_value
-            return self._update("/properties", properties)
-        else:
-            msg = "No %s with a key '%s' exists." % \
-                  (self.resource_class.__name__.lower(), property_key)
-            raise exceptions.CommandError(msg)
+
+        return self._read_modify_write(change)
 
     def delete(self, property_key):
         """
@@ -77,15 +73,69 @@ class PropertyManager(base.ManagerWithFind):
         :param property_key: the key of the property
         :param property_value: the value the tue property
         """
-        properties = self.list()
-        if property_key in properties:
+        def change(properties):
+            self._check_exists(properties, property_key)
             del properties[property_key]
-            return self._update("/properties", properties)
-        else:
+
+        return self._read_modify_write(change)
+
+    def apply(self, set=None, delete=None):
+        """
+        Apply several changes to the properties in a single round trip.
+
+        The properties are read once and written back once. When the API
+        returns an ETag the write is conditional on it, so changes made by
+        someone else in between are reported instead of overwritten.
+
+        :param set: dictionary of keys to create or update
+        :param delete: list of keys to remove
+        """
+        set = set or {}
+        delete = delete or []
+
+        overlap = sorted(k for k in delete if k in set)
+        if overlap:
+            msg = "Keys can not be set and deleted at once: %s" % \
+                  ', '.join(overlap)
+            raise exceptions.CommandError(msg)
+
+        def change(properties):
+            for property_key in delete:
+                self._check_exists(properties, property_key)
+            for property_key in delete:
+                del properties[property_key]
+            properties.update(set)
+
+        return self._read_modify_write(change)
+
+    def _check_exists(self, properties, property_key):
+        if property_key not in properties:
             msg = "No %s with a key '%s' exists." % \
                   (self.resource_class.__name__.lower(), property_key)
             raise exceptions.CommandError(msg)
 
+    def _read_modify_write(self, change):
+        # Always read the current properties from the API, a cached copy
+        # would make the conditional write fail or overwrite fresh data.
+        resp, body = self.api.client.get("/properties",
+                                         headers={'Cache-Control': 'no-cache'})
+        properties = body["properties"]
+        etag = (resp.headers or {}).get('ETag')
+
+        change(properties)
+
+        kwargs = {}
+        if etag:
+            kwargs['headers'] = {'If-Match': etag}
+        try:
+            resp, body = self.api.client.put("/properties", body=properties,
+                                             **kwargs)
+        except exceptions.PreconditionFailed:
+            msg = "The properties were modified by someone else, " \
+                  "please retry."
+            raise exceptions.CommandError(msg)
+        return body
+
     def _list(self, url, response_key, obj_class=None, body=None):
         resp = None
         if body:
@@ -39,7 +39,7 @@ class RoleManager(base.ManagerWithFind):
         its roles.
         :rtype: :class:`Zone`
         """
-        return self._list("/zones/%s/roles" % zone.id, "roles")
+        return self._list("/zones/%s/roles" % base.getid(zone), "roles")
 
     def get(self, zone, role):
         """Get a specific role by zone.
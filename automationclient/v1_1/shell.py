@@ -19,8 +19,13 @@
 from __future__ import print_function
 import os
 import json
+import sys
 
+from automationclient import exceptions
 from automationclient import utils
+from automationclient.v1_1 import architectures
+from automationclient.v1_1 import tasks
+from automationclient.v1_1 import zones
 
 
 def _validate_json_format_file(file):
@@ -34,6 +39,28 @@ def _validate_json_format_file(file):
             raise SystemExit
 
 
+def _validate_property_changes_file(file):
+    changes = _validate_json_format_file(file)
+    if not isinstance(changes, dict) or \
+            not set(changes) <= set(['set', 'delete']):
+        print('\nError: The JSON file %s must contain an object with '
+              '"set" and/or "delete" keys' % file)
+        raise SystemExit
+    return changes
+
+
+def _read_lines_file(file):
+    """Read the non empty lines of a file, skipping '#' comments."""
+    with open(file) as f:
+        lines = [line.split('#', 1)[0].strip() for line in f]
+    return [line for line in lines if line]
+
+
+def _print_batch_errors(errors):
+    for key, error in sorted(errors.items()):
+        print("Error: %s: %s" % (key, error))
+
+
 def _validate_extension_file(file, extension):
     ext = os.path.splitext(file)[-1].lower()
     if ext == ".%s" % extension:
@@ -71,6 +98,55 @@ def _find_zone(cs, zone):
     return utils.find_resource(cs.zones, zone)
 
 
+def _print_zone_list(cs, args, manager, list_zone, fields):
+    """
+    Print the resources returned by ``list_zone(zone)`` for the zone of the
+    command or, with --zones, for every zone of the option at once with a
+    zone column. The zones failing do not prevent printing the others.
+
+    ``manager`` is the one listing the resources, its completion cache is
+    written once for all the zones.
+    """
+    if not args.zones:
+        if args.zone is None:
+            raise exceptions.CommandError("You must provide a zone ID or "
+                                          "--zones")
+        utils.print_list(list_zone(_find_zone(cs, args.zone)), fields)
+        return
+    if args.zone is not None:
+        raise exceptions.CommandError("Use either a zone ID or --zones")
+
+    if args.zones == 'all':
+        zone_ids = [zone.id for zone in cs.zones.list()]
+    else:
+        try:
+            zone_ids = [int(zone) for zone in args.zones.split(',')]
+        except ValueError:
+            raise exceptions.CommandError("--zones must be 'all' or a comma "
+                                          "separated list of zone IDs")
+
+    with manager.merged_completion_cache():
+        results = utils.parallel_map(list_zone, zone_ids,
+                                     return_exceptions=True)
+    zone_of = {}
+    errors = {}
+    resources = []
+    for zone_id, result in zip(zone_ids, results):
+        if isinstance(result, Exception):
+            errors[zone_id] = result
+            continue
+        for resource in result:
+            zone_of[id(resource)] = zone_id
+            resources.append(resource)
+
+    utils.print_list(resources, ['zone'] + fields,
+                     formatters={'zone': lambda r: zone_of[id(r)]})
+    if errors:
+        raise exceptions.CommandError("Could not list zones: %s" % ', '.join(
+            "%s (%s)" % (zone_id, errors[zone_id])
+            for zone_id in sorted(errors)))
+
+
 def _find_role(cs, zone, role):
     """Get a role by zone."""
     zone = _find_zone(cs, zone)
@@ -105,7 +181,7 @@ def _find_datastore(cs, datastore):
 @utils.service_type('automation')
 def do_device_list(cs, args):
     """List all the devices in the pool."""
-    devices = cs.devices.list()
+    devices = cs.devices.list(fields=utils.get_output_fields())
     utils.print_list(devices, ['id', 'name', 'mac', 'status'])
 
 
@@ -186,6 +262,83 @@ def do_device_delete(cs, args):
     cs.devices.delete(device, **options)
 
 
+@utils.arg('zone_id', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone to activate the devices')
+@utils.arg('role', metavar='<role-id>',
+           type=int,
+           help='ID of the role to deploy on the devices.')
+@utils.arg('macs', metavar='<mac>', nargs='+',
+           help='Macs of the devices to onboard.')
+@utils.arg('--checkpoint', metavar='<checkpoint-file>',
+           default=None,
+           help='File to save the progress to and resume from.')
+@utils.arg('--retry-failed',
+           default=False,
+           action='store_true',
+           help='Start again the devices that failed in the checkpoint.')
+@utils.arg('--max-activating', metavar='<count>',
+           type=int, default=4,
+           help='Maximum number of devices activating at once (Default=4).')
+@utils.arg('--max-deploying', metavar='<count>',
+           type=int, default=4,
+           help='Maximum number of devices deploying at once (Default=4).')
+@utils.arg('--interval', metavar='<seconds>',
+           type=float, default=5,
+           help='Seconds between polls of the nodes and tasks (Default=5).')
+@utils.arg('--timeout', metavar='<seconds>',
+           type=float, default=3600,
+           help='Seconds after which the devices still activating or '
+                'deploying are failed, 0 to wait forever (Default=3600).')
+@utils.arg('--lom-user', metavar='<lom-user>',
+           help='Out-of-band user')
+@utils.arg('--lom-password', metavar='<lom-password>',
+           help='Out-of-Band user password')
+@utils.service_type('automation')
+def do_device_onboard(cs, args):
+    """Activate devices in a zone and deploy a role on them."""
+    for option in ('max_activating', 'max_deploying'):
+        if getattr(args, option) < 1:
+            raise exceptions.CommandError("--%s must be at least 1"
+                                          % option.replace('_', '-'))
+    kwargs = {}
+
+    if args.lom_user is not None:
+        kwargs['lom_user'] = args.lom_user
+
+    if args.lom_password is not None:
+        kwargs['lom_password'] = args.lom_password
+
+    def progress(mac, stage, error):
+        line = "device %s %s" % (mac, stage)
+        if error:
+            line += ": %s" % error
+        print(line)
+        sys.stdout.flush()
+
+    # The devices are looked up when activated: the ones activated by a
+    # previous run are not in the pool anymore.
+    result = cs.devices.onboard(args.macs, args.zone_id, args.role,
+                                checkpoint=args.checkpoint,
+                                max_activating=args.max_activating,
+                                max_deploying=args.max_deploying,
+                                interval=args.interval,
+                                retry_failed=args.retry_failed,
+                                callback=progress,
+                                timeout=args.timeout or None, **kwargs)
+    utils.print_list(sorted(result.items()), ['Mac', 'Stage', 'Node',
+                                              'Error'],
+                     formatters={'Mac': lambda item: item[0],
+                                 'Stage': lambda item: item[1]['stage'],
+                                 'Node': lambda item: item[1]['node'],
+                                 'Error': lambda item: item[1]['error']})
+    failed = [mac for mac, entry in result.items()
+              if entry['stage'] != 'done']
+    if failed:
+        raise exceptions.CommandError("Onboarding failed for devices: %s"
+                                      % ', '.join(sorted(failed)))
+
+
 @utils.arg('mac', metavar='<mac>',
            help='Mac of the device to activate.')
 @utils.arg('zone_id', metavar='<zone-id>',
@@ -415,6 +568,56 @@ def do_architecture_template(cs, args):
     print(json.dumps({'profile': profile._info}))
 
 
+@utils.arg('architecture', metavar='<architecture-id>',
+           type=int,
+           help='ID of the architecture to export.')
+@utils.arg('bundle', metavar='<bundle-file>',
+           help='File to write the compressed bundle to.')
+@utils.arg('--concurrency', metavar='<concurrency>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of requests in flight (Default=%s).'
+                % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_architecture_export(cs, args):
+    """Export an architecture with its template and profiles to a file."""
+    architecture = _find_architecture(cs, args.architecture)
+    bundle = cs.architectures.export(architecture,
+                                     concurrency=args.concurrency)
+    architectures.write_bundle(bundle, args.bundle)
+    print("Exported architecture %s with %d profiles to %s"
+          % (bundle['architecture'].get('name'), len(bundle['profiles']),
+             args.bundle))
+
+
+@utils.arg('bundle', metavar='<bundle-file>',
+           help='Bundle written by architecture-export.')
+@utils.arg('--architecture', metavar='<architecture-id>',
+           type=int, default=None,
+           help='ID of an existing architecture to import the profiles '
+                'into, instead of creating a new one.')
+@utils.arg('--concurrency', metavar='<concurrency>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of requests in flight (Default=%s).'
+                % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_architecture_import(cs, args):
+    """Import an architecture bundle written by architecture-export."""
+    bundle = architectures.read_bundle(args.bundle)
+    architecture = None
+    if args.architecture is not None:
+        architecture = _find_architecture(cs, args.architecture)
+    architecture, report = cs.architectures.import_bundle(
+        bundle, architecture=architecture, concurrency=args.concurrency)
+
+    rows = []
+    for action in ('created', 'updated', 'skipped'):
+        rows.extend((name, action) for name in report[action])
+    print("Architecture: %s (%s)" % (architecture.name, architecture.id))
+    utils.print_list(rows, ['Profile', 'Action'],
+                     formatters={'Profile': lambda row: row[0],
+                                 'Action': lambda row: row[1]})
+
+
 @utils.arg('architecture', metavar='<architecture-id>',
            type=int,
            help='ID of the architecture.')
@@ -595,6 +798,30 @@ def do_profile_property_delete(cs, args):
     utils.print_dict(final_dict)
 
 
+@utils.arg('architecture', metavar='<architecture-id>',
+           type=int,
+           help='ID of the architecture of the profile.')
+@utils.arg('profile', metavar='<profile-id>',
+           type=int,
+           help='ID of the profile to change its properties.')
+@utils.arg('--file', metavar='<file>', required=True,
+           help='JSON file with a "set" dictionary of properties to create '
+                'or update and/or a "delete" list of property keys.')
+@utils.service_type('automation')
+def do_profile_property_apply(cs, args):
+    """Apply several profile property changes in a single update."""
+    changes = _validate_property_changes_file(args.file)
+    architecture = _find_architecture(cs, args.architecture)
+    profile = _find_profile(cs, args.architecture, args.profile)
+    profile = cs.profiles.properties_patch(architecture, profile,
+                                           set=changes.get('set'),
+                                           delete=changes.get('delete'))
+    profile = profile['profile']
+    profile.pop('_links', None)
+    final_dict = utils.check_json_pretty_value_for_dict(profile)
+    utils.print_dict(final_dict)
+
+
 @utils.service_type('automation')
 def do_global_property_list(cs, args):
     """List all the properties that are available on automation."""
@@ -650,6 +877,22 @@ def do_global_property_delete(cs, args):
     utils.print_dict(property)
 
 
+@utils.arg('--file', metavar='<file>', required=True,
+           help='JSON file with a "set" dictionary of properties to create '
+                'or update and/or a "delete" list of property keys.')
+@utils.service_type('automation')
+def do_global_property_apply(cs, args):
+    """Apply several property changes in a single update.
+    :param cs:
+    :param args:
+    """
+    changes = _validate_property_changes_file(args.file)
+    property = cs.properties.apply(set=changes.get('set'),
+                                   delete=changes.get('delete'))
+    property = property['properties']
+    utils.print_dict(property)
+
+
 @utils.service_type('automation')
 def do_zone_list(cs, args):
     """List all the zones."""
@@ -725,13 +968,144 @@ def do_zone_delete(cs, args):
 
 @utils.arg('zone', metavar='<zone-id>',
            type=int,
-           help='ID of the zone.')
+           nargs='?',
+           help='ID of the zone, see also --zones.')
+@utils.fan_out_zones
 @utils.service_type('automation')
 def do_zone_tasks_list(cs, args):
     """List all the tasks by zone."""
+    fields = utils.get_output_fields()
+    _print_zone_list(cs, args, cs.tasks,
+                     lambda zone: cs.tasks.list(zone, fields=fields),
+                     ['id', 'name', 'uuid', 'state'])
+
+
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone.')
+@utils.arg('--node', metavar='<node-id>',
+           type=int, default=None,
+           help='Only the tasks of this node.')
+@utils.arg('--running',
+           default=False,
+           action='store_true',
+           help='Only the tasks that have not finished.')
+@utils.arg('--failed',
+           default=False,
+           action='store_true',
+           help='Only the tasks that did not succeed.')
+@utils.arg('--state', metavar='<state>',
+           action='append', default=[],
+           help='Only the tasks in this state, can be repeated.')
+@utils.arg('--last', metavar='<count>',
+           type=int, default=None,
+           help='Only the most recent tasks.')
+@utils.arg('--no-refresh',
+           default=False,
+           action='store_true',
+           help='Query the local index without fetching the new tasks.')
+@utils.service_type('automation')
+def do_task_query(cs, args):
+    """Query the tasks of a zone from the local task index."""
+    states = list(args.state)
+    exclude_states = None
+    if args.failed:
+        states.extend(tasks.FAILED_STATES)
+    if args.running:
+        exclude_states = tasks.DONE_STATES
+
+    index = cs.tasks.index()
+    try:
+        if not args.no_refresh:
+            index.refresh(cs.tasks, args.zone)
+        found = index.query(args.zone, node=args.node, states=states,
+                            exclude_states=exclude_states, limit=args.last)
+    finally:
+        index.close()
+
+    fields = ['uuid', 'node', 'name', 'state', 'result', 'stamp']
+    utils.print_list(found, fields,
+                     formatters=dict((field, lambda task, f=field: task[f])
+                                     for field in fields),
+                     order_by=False)
+
+
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone.')
+@utils.arg('--interval', metavar='<seconds>',
+           type=float,
+           default=5,
+           help='Seconds between polls. Default is 5.')
+@utils.arg('--kinds', metavar='<kinds>',
+           default=','.join(zones.WATCH_KINDS),
+           help='Comma separated collections to watch. '
+                'Default is nodes,tasks,roles.')
+@utils.arg('--iterations', metavar='<iterations>',
+           type=int,
+           default=None,
+           help='Stop after this number of polls. Default is forever.')
+@utils.service_type('automation')
+def do_zone_watch(cs, args):
+    """Stream the changes of the nodes, tasks and roles of a zone as NDJSON.
+    """
     zone = _find_zone(cs, args.zone)
-    tasks = cs.tasks.list(zone)
-    utils.print_list(tasks, ['id', 'name', 'uuid', 'state'])
+    kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    for event in cs.zones.watch(zone, interval=args.interval, kinds=kinds,
+                                iterations=args.iterations):
+        print(json.dumps(event.to_dict(), sort_keys=True))
+        sys.stdout.flush()
+
+
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone.')
+@utils.arg('snapshot', metavar='<snapshot-file>',
+           help='File to write the snapshot to.')
+@utils.arg('--concurrency', metavar='<concurrency>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of requests in flight (Default=%s).'
+                % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_zone_snapshot(cs, args):
+    """Save the properties and component configuration of a zone."""
+    zone = _find_zone(cs, args.zone)
+    snapshot = cs.zones.snapshot(zone, concurrency=args.concurrency)
+    zones.write_snapshot(snapshot, args.snapshot)
+    count = sum(len(role['components'])
+                for role in snapshot['roles'].values())
+    print("Saved %d components of zone %s to %s (sha256 %s)"
+          % (count, snapshot['name'], args.snapshot, snapshot['hash']))
+
+
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone.')
+@utils.arg('snapshot', metavar='<snapshot-file>',
+           help='Snapshot written by zone-snapshot.')
+@utils.arg('--dry-run',
+           default=False,
+           action='store_true',
+           help='Only show the calls needed to restore the snapshot.')
+@utils.arg('--concurrency', metavar='<concurrency>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of requests in flight (Default=%s).'
+                % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_zone_restore(cs, args):
+    """Restore a zone snapshot updating only what changed."""
+    snapshot = zones.read_snapshot(args.snapshot)
+    zone = _find_zone(cs, args.zone)
+    plan = cs.zones.restore(zone, snapshot, dry_run=args.dry_run,
+                            concurrency=args.concurrency)
+    for url in plan['missing']:
+        print("Warning: %s no longer exists, skipped" % url)
+    utils.print_list(plan['calls'], ['Method', 'URL'],
+                     formatters={'Method': lambda call: call['method'],
+                                 'URL': lambda call: call['url']})
+    print("%d calls %s, %d components unchanged"
+          % (len(plan['calls']), 'planned' if args.dry_run else 'done',
+             plan['unchanged']))
 
 
 @utils.arg('zone', metavar='<zone-id>',
@@ -793,13 +1167,33 @@ def do_zone_property_delete(cs, args):
 
 @utils.arg('zone', metavar='<zone-id>',
            type=int,
-           help='ID of the zone.')
+           help='ID of the zone to change its properties.')
+@utils.arg('--file', metavar='<file>', required=True,
+           help='JSON file with a "set" dictionary of properties to create '
+                'or update and/or a "delete" list of property keys.')
+@utils.service_type('automation')
+def do_zone_property_apply(cs, args):
+    """Apply several zone property changes in a single update."""
+    changes = _validate_property_changes_file(args.file)
+    zone = _find_zone(cs, args.zone)
+    zone = cs.zones.properties_patch(zone, set=changes.get('set'),
+                                     delete=changes.get('delete'))
+    zone = zone['zone']
+    zone.pop('_links', None)
+    final_dict = utils.check_json_pretty_value_for_dict(zone)
+    utils.print_dict(final_dict)
+
+
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           nargs='?',
+           help='ID of the zone, see also --zones.')
+@utils.fan_out_zones
 @utils.service_type('automation')
 def do_node_list(cs, args):
     """List all activate devices in a zone."""
-    zone = _find_zone(cs, args.zone)
-    nodes = cs.nodes.list(zone)
-    utils.print_list(nodes, ['id', 'name', 'mac', 'status'])
+    _print_zone_list(cs, args, cs.nodes, cs.nodes.list,
+                     ['id', 'name', 'mac', 'status'])
 
 
 @utils.arg('zone', metavar='<zone-id>',
@@ -890,6 +1284,85 @@ def do_node_task_cancel(cs, args):
     utils.print_dict(dict)
 
 
+def _print_bulk_report(report, verb, dry_run):
+    if dry_run:
+        for uuid in report['matched']:
+            if uuid not in report['skipped']:
+                print("Would %s task %s" % (verb, uuid))
+    _print_batch_errors(report['skipped'])
+    _print_batch_errors(report['failed'])
+    print("%d matched, %d succeeded, %d failed, %d skipped"
+          % (len(report['matched']), len(report['succeeded']),
+             len(report['failed']), len(report['skipped'])))
+    if report['failed']:
+        raise exceptions.CommandError("Could not %s tasks: %s"
+                                      % (verb, ', '.join(
+                                          sorted(report['failed']))))
+
+
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone.')
+@utils.arg('--node', metavar='<node-id>',
+           action='append', default=[],
+           help='Only the tasks of this node, can be repeated.')
+@utils.arg('--name', metavar='<name>',
+           action='append', default=[],
+           help='Only the tasks with this name, can be repeated.')
+@utils.arg('--state', metavar='<state>',
+           action='append', default=[],
+           help='Only the tasks in this state, can be repeated.')
+@utils.arg('--dry-run',
+           default=False,
+           action='store_true',
+           help='Show the tasks that would be cancelled.')
+@utils.arg('--concurrency', metavar='<count>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of cancellations sent at once '
+                '(Default=%d).' % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_task_cancel_bulk(cs, args):
+    """Cancel the unfinished tasks of a zone matching the filters."""
+    zone = _find_zone(cs, args.zone)
+    filter = {}
+    for key in ('node', 'name', 'state'):
+        if getattr(args, key):
+            filter[key] = getattr(args, key)
+    report = cs.tasks.bulk_cancel(zone, filter=filter, dry_run=args.dry_run,
+                                  concurrency=args.concurrency)
+    _print_bulk_report(report, 'cancel', args.dry_run)
+
+
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone.')
+@utils.arg('--older-than', metavar='<timestamp>',
+           default=None,
+           help='Only the tasks last updated before this timestamp '
+                '(YYYY-MM-DD or YYYY-MM-DD HH:MM:SS).')
+@utils.arg('--state', metavar='<state>',
+           action='append', default=[],
+           help='Only the tasks in this state, can be repeated '
+                '(Default=%s).' % ', '.join(tasks.DONE_STATES))
+@utils.arg('--dry-run',
+           default=False,
+           action='store_true',
+           help='Show the tasks that would be deleted.')
+@utils.arg('--concurrency', metavar='<count>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of deletions sent at once '
+                '(Default=%d).' % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_task_delete_bulk(cs, args):
+    """Remove the finished tasks of a zone from automation DB."""
+    zone = _find_zone(cs, args.zone)
+    report = cs.tasks.bulk_delete(zone, older_than=args.older_than,
+                                  states=args.state or tasks.DONE_STATES,
+                                  dry_run=args.dry_run,
+                                  concurrency=args.concurrency)
+    _print_bulk_report(report, 'delete', args.dry_run)
+
+
 @utils.arg('zone', metavar='<zone-id>',
            type=int,
            help='ID of the zone.')
@@ -931,13 +1404,13 @@ def do_node_deactivate(cs, args):
 
 @utils.arg('zone', metavar='<zone-id>',
            type=int,
-           help='ID of the zone.')
+           nargs='?',
+           help='ID of the zone, see also --zones.')
+@utils.fan_out_zones
 @utils.service_type('automation')
 def do_role_list(cs, args):
     """List all the roles by zone."""
-    zone = _find_zone(cs, args.zone)
-    roles = cs.roles.list(zone)
-    utils.print_list(roles, ['id', 'name'])
+    _print_zone_list(cs, args, cs.roles, cs.roles.list, ['id', 'name'])
 
 
 @utils.arg('zone', metavar='<zone-id>',
@@ -992,6 +1465,74 @@ def do_role_deploy(cs, args):
     utils.print_list(tasks, ['id', 'name', 'uuid', 'state', 'result'])
 
 
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone.')
+@utils.arg('role', metavar='<role-id>',
+           type=int,
+           help='ID of the role.')
+@utils.arg('nodes', metavar='<node-id>',
+           type=int, nargs='+',
+           help='IDs of the nodes to deploy the role to, in order.')
+@utils.arg('--max-in-flight', metavar='<count>',
+           type=int, default=1,
+           help='Maximum number of nodes deploying at once (Default=1).')
+@utils.arg('--max-failures', metavar='<count>',
+           type=int, default=0,
+           help='Number of failed nodes tolerated before no more nodes are '
+                'started (Default=0).')
+@utils.arg('--interval', metavar='<seconds>',
+           type=float, default=5,
+           help='Seconds between polls of the task states (Default=5).')
+@utils.arg('--timeout', metavar='<seconds>',
+           type=float, default=3600,
+           help='Seconds after which the deployment fails if some nodes are '
+                'still deploying, 0 to wait forever (Default=3600).')
+@utils.arg('--no-dhcp-reload',
+           dest='no_dhcp_reload',
+           action="store_true",
+           default=False,
+           help='Specifies dhcp request in target node should ask for an IP')
+@utils.arg('--bypass',
+           dest='bypass',
+           action="store_true",
+           default=False,
+           help=('Specifies if role should apply should be skipped.'
+                 'Default is False'))
+@utils.service_type('automation')
+def do_role_deploy_rolling(cs, args):
+    """Deploy a role to many nodes a few at a time."""
+    zone = _find_zone(cs, args.zone)
+    role = _find_role(cs, args.zone, args.role)
+    total = len(args.nodes)
+    finished = []
+
+    def progress(node_id, status, detail):
+        if status != 'started':
+            finished.append(node_id)
+        line = "[%d/%d] node %s %s" % (len(finished), total, node_id, status)
+        if detail and status != 'started':
+            line += ": %s" % detail
+        print(line)
+        sys.stdout.flush()
+
+    report = cs.tasks.rolling_deploy(zone, role, args.nodes,
+                                     max_in_flight=args.max_in_flight,
+                                     max_failures=args.max_failures,
+                                     bypass=args.bypass,
+                                     dhcp_reload=not args.no_dhcp_reload,
+                                     interval=args.interval,
+                                     callback=progress,
+                                     timeout=args.timeout or None)
+    print("%d succeeded, %d failed, %d skipped"
+          % (len(report['succeeded']), len(report['failed']),
+             len(report['skipped'])))
+    if report['failed']:
+        raise exceptions.CommandError("Role deployment failed on nodes: %s"
+                                      % ', '.join(str(node_id) for node_id
+                                                  in sorted(report['failed'])))
+
+
 @utils.arg('zone', metavar='<zone-id>',
            type=int,
            help='ID of the zone.')
@@ -1077,6 +1618,44 @@ def do_role_component_update(cs, args):
     utils.print_dict(final_dict)
 
 
+@utils.arg('zone', metavar='<zone-id>',
+           type=int,
+           help='ID of the zone.')
+@utils.arg('desired_file', metavar='<desired-file>',
+           help='File with extension *.json mapping each role (ID or name) '
+                'to the components to converge and their configuration, as '
+                'given by role-component-json. Only the keys given are '
+                'compared and updated.')
+@utils.arg('--dry-run',
+           default=False,
+           action='store_true',
+           help='Only report the differences, do not update anything.')
+@utils.arg('--concurrency', metavar='<concurrency>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of requests in flight (Default=%s).'
+                % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_zone_component_sync(cs, args):
+    """Update only the components of a zone whose configuration differs."""
+    _validate_extension_file(args.desired_file, 'json')
+    desired = _validate_json_format_file(args.desired_file)
+    zone = _find_zone(cs, args.zone)
+    report = cs.components.sync_zone(zone, desired, dry_run=args.dry_run,
+                                     concurrency=args.concurrency)
+
+    rows = [(update['role'], update['component'], path, old, new)
+            for update in report['updated']
+            for path, old, new in update['changes']]
+    fields = ['Role', 'Component', 'Path', 'Old', 'New']
+    utils.print_list(rows, fields,
+                     formatters=dict((field, lambda row, i=i: row[i])
+                                     for i, field in enumerate(fields)))
+    print("%d components %s, %d unchanged"
+          % (len(report['updated']),
+             'differ' if args.dry_run else 'updated',
+             len(report['unchanged'])))
+
+
 @utils.arg('zone', metavar='<zone-id>',
            type=int,
            help='ID of the zone.')
@@ -1180,6 +1759,68 @@ def do_datastore_validate(cs, args):
     utils.print_dict(final_dict)
 
 
+@utils.arg('endpoints_file', metavar='<endpoints-file>',
+           help='File with one NFS or GLUSTER endpoint per line.')
+@utils.arg('--storage-type', metavar='<storage-type>',
+           default='NFS',
+           help='Can be NFS or GLUSTER (Default=NFS).')
+@utils.arg('--timeout', metavar='<seconds>',
+           type=float, default=None,
+           help='Seconds to wait for each endpoint.')
+@utils.arg('--concurrency', metavar='<concurrency>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of requests in flight (Default=%s).'
+                % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_datastore_discovery_batch(cs, args):
+    """Discovery the endpoints listed in a file."""
+    endpoints = _read_lines_file(args.endpoints_file)
+    result = cs.datastores.discovery_many(endpoints,
+                                          storage_type=args.storage_type,
+                                          timeout=args.timeout,
+                                          concurrency=args.concurrency)
+    fields = ['endpoint', 'store', 'allowed']
+    utils.print_list(result['datastores'], fields,
+                     formatters=dict((field, lambda d, f=field: d.get(f))
+                                     for field in fields))
+    _print_batch_errors(result['errors'])
+
+
+@utils.arg('datastores_file', metavar='<datastores-file>',
+           help='File with one datastore per line as '
+                '"<storage_type> <endpoint> <datastore> <identifier>", the '
+                'arguments of datastore-validate.')
+@utils.arg('--timeout', metavar='<seconds>',
+           type=float, default=None,
+           help='Seconds to wait for each datastore.')
+@utils.arg('--concurrency', metavar='<concurrency>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of requests in flight (Default=%s).'
+                % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_datastore_validate_batch(cs, args):
+    """Validate the datastores listed in a file."""
+    datastores = []
+    for line in _read_lines_file(args.datastores_file):
+        fields = line.split()
+        if len(fields) != 4:
+            print('\nError: The line "%s" of %s must have the storage type, '
+                  'endpoint, datastore and identifier'
+                  % (line, args.datastores_file))
+            raise SystemExit
+        datastores.append(dict(zip(('storage_type', 'endpoint', 'store',
+                                    'identifier'), fields)))
+
+    result = cs.datastores.validate_many(datastores, timeout=args.timeout,
+                                         concurrency=args.concurrency)
+    fields = ['identifier', 'id_storage_types', 'endpoint', 'store',
+              'status']
+    utils.print_list(result['datastores'], fields,
+                     formatters=dict((field, lambda d, f=field: d.get(f))
+                                     for field in fields))
+    _print_batch_errors(result['errors'])
+
+
 @utils.service_type('automation')
 def do_datastore_list(cs, args):
     """List a pool of datastores."""
@@ -1224,6 +1865,57 @@ def do_datastore_space(cs, args):
     utils.print_dict(datastore._info)
 
 
+@utils.arg('--sort-by', metavar='<field>',
+           default='free_percent',
+           choices=['id', 'identifier', 'total', 'used', 'free',
+                    'free_percent'],
+           help='Field to sort the datastores by (Default=free_percent).')
+@utils.arg('--reverse',
+           default=False,
+           action='store_true',
+           help='Sort in descending order.')
+@utils.arg('--content',
+           default=False,
+           action='store_true',
+           help='Fetch the top content of every datastore as well.')
+@utils.arg('--json',
+           default=False,
+           action='store_true',
+           help='Print the survey as JSON.')
+@utils.arg('--concurrency', metavar='<concurrency>',
+           type=int, default=utils.DEFAULT_CONCURRENCY,
+           help='Maximum number of requests in flight (Default=%s).'
+                % utils.DEFAULT_CONCURRENCY)
+@utils.service_type('automation')
+def do_datastore_space_all(cs, args):
+    """Show the space of every datastore of the pool."""
+    survey = cs.datastores.survey(content=args.content,
+                                  concurrency=args.concurrency)
+    # Datastores without a value to sort by (failed ones) always go last.
+    entries = survey['datastores']
+    known = [e for e in entries if e.get(args.sort_by) is not None]
+    unknown = [e for e in entries if e.get(args.sort_by) is None]
+    known.sort(key=lambda entry: entry[args.sort_by], reverse=args.reverse)
+    survey['datastores'] = known + unknown
+
+    if args.json:
+        print(json.dumps(survey, sort_keys=True, indent=4,
+                         separators=(',', ': ')))
+        return
+
+    fields = ['id', 'identifier', 'endpoint', 'store', 'total', 'used',
+              'free', 'free_percent', 'error']
+    utils.print_list(survey['datastores'], fields,
+                     formatters=dict((field, lambda entry, f=field:
+                                      entry.get(f))
+                                     for field in fields),
+                     order_by=False)
+    totals = survey['totals']
+    print("Total: %s, used: %s, free: %s (%s%%) in %d datastores, %d errors"
+          % (totals['total'], totals['used'], totals['free'],
+             totals['free_percent'], totals['count'], totals['errors']))
+
+
 @utils.arg('datastore', metavar='<datastore-id>',
            type=int,
            help='ID of the datastore/store/volume in the pool')
@@ -0,0 +1,222 @@
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Local index of the tasks of the zones.
+
+The tasks are kept in a sqlite database together with the most recent
+timestamp seen for every zone (its high-water mark), so a refresh only
+stores the tasks that changed since the previous one and asks the API for
+them alone when it supports the ``since`` filter, besides the unfinished
+tasks of the index.
+"""
+
+import json
+import sqlite3
+
+from automationclient import base
+from automationclient import exceptions
+from automationclient import utils
+from automationclient.v1_1 import tasks
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    zone TEXT NOT NULL,
+    node TEXT,
+    uuid TEXT NOT NULL,
+    name TEXT,
+    state TEXT,
+    result TEXT,
+    stamp TEXT,
+    info TEXT,
+    PRIMARY KEY (zone, uuid)
+);
+CREATE INDEX IF NOT EXISTS tasks_zone_node ON tasks (zone, node);
+CREATE INDEX IF NOT EXISTS tasks_zone_state ON tasks (zone, state);
+CREATE TABLE IF NOT EXISTS marks (
+    zone TEXT PRIMARY KEY,
+    high_water TEXT,
+    since_supported INTEGER
+);
+"""
+
+
+def _stamp(info):
+    return info.get('updated') or info.get('created')
+
+
+def _uuid(info):
+    return str(info.get('uuid', info.get('id')))
+
+
+class TaskIndex(object):
+    """Store the tasks of the zones in a sqlite database.
+
+    :param path: file of the database, ':memory:' for a throwaway index.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _mark(self, zone):
+        row = self.conn.execute("SELECT high_water, since_supported "
+                                "FROM marks WHERE zone = ?",
+                                (zone,)).fetchone()
+        if row is None:
+            return None, None
+        supported = row['since_supported']
+        if supported is not None:
+            supported = bool(supported)
+        return row['high_water'], supported
+
+    def high_water(self, zone):
+        """Return the most recent task timestamp indexed for ``zone``."""
+        return self._mark(str(base.getid(zone)))[0]
+
+    def refresh(self, manager, zone):
+        """Store the tasks of ``zone`` changed since the last refresh.
+
+        The API is asked for the tasks after the high-water mark with the
+        ``since`` filter. Whether it honours it is learnt from the first
+        answer: servers that return older tasks get the filter dropped.
+        Tasks may change state without a newer timestamp, so the indexed
+        tasks that have not finished and were not listed are fetched again
+        one by one. A listing without the filter is complete, the indexed
+        tasks missing from it are deleted.
+
+        :param manager: the :class:`TaskManager` to list the tasks with.
+        :param zone: The ID of the :class: `Zone` to refresh.
+        :rtype: number of tasks stored.
+        """
+        zone_id = str(base.getid(zone))
+        high_water, supported = self._mark(zone_id)
+        indexed = dict((row['uuid'], row) for row in self.conn.execute(
+            "SELECT uuid, node, state, info FROM tasks WHERE zone = ?",
+            (zone_id,)))
+
+        search_opts = None
+        if high_water and supported is not False:
+            search_opts = {'since': high_water}
+        infos = [task._info for task in
+                 manager.list(zone, search_opts=search_opts)]
+
+        if search_opts:
+            ignored = [info for info in infos
+                       if _stamp(info) and _stamp(info) < high_water]
+            if ignored:
+                supported = False
+            elif infos:
+                supported = True
+
+        listed = set(_uuid(info) for info in infos)
+        deleted = []
+        if search_opts:
+            unfinished = [row for uuid, row in indexed.items()
+                          if uuid not in listed and row['node'] and
+                          row['state'] not in tasks.DONE_STATES]
+            fetched = utils.parallel_map(
+                lambda row: manager.get_node(zone, row['node'], row['uuid']),
+                unfinished, return_exceptions=True)
+            for row, task in zip(unfinished, fetched):
+                if isinstance(task, exceptions.NotFound):
+                    deleted.append(row['uuid'])
+                elif not isinstance(task, Exception):
+                    info = dict(task._info)
+                    if tasks.task_node_id(info) is None:
+                        # The task alone may not tell its node.
+                        info['node_id'] = row['node']
+                    infos.append(info)
+        else:
+            deleted = [uuid for uuid in indexed if uuid not in listed]
+
+        # Only the tasks that are new or changed are written.
+        infos = [info for info in infos
+                 if _uuid(info) not in indexed or
+                 json.loads(indexed[_uuid(info)]['info']) != info]
+
+        stamps = [_stamp(info) for info in infos if _stamp(info)]
+        if stamps:
+            high_water = max([high_water or ''] + stamps)
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO tasks (zone, node, uuid, name, "
+                "state, result, stamp, info) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(zone_id, tasks.task_node_id(info), _uuid(info),
+                  info.get('name'), info.get('state'), info.get('result'),
+                  _stamp(info), json.dumps(info))
+                 for info in infos])
+            self.conn.executemany(
+                "DELETE FROM tasks WHERE zone = ? AND uuid = ?",
+                [(zone_id, uuid) for uuid in deleted])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO marks (zone, high_water, "
+                "since_supported) VALUES (?, ?, ?)",
+                (zone_id, high_water,
+                 None if supported is None else int(supported)))
+        return len(infos)
+
+    def query(self, zone=None, node=None, states=None, exclude_states=None,
+              limit=None):
+        """Return the indexed tasks, most recent first.
+
+        :param zone: only the tasks of this zone.
+        :param node: only the tasks of this node.
+        :param states: only the tasks in one of these states.
+        :param exclude_states: skip the tasks in one of these states.
+        :param limit: return at most this number of tasks.
+        :rtype: list of dictionaries with the 'zone', 'node', 'uuid',
+                'name', 'state', 'result' and 'stamp' of the tasks.
+        """
+        where = []
+        params = []
+        if zone is not None:
+            where.append("zone = ?")
+            params.append(str(base.getid(zone)))
+        if node is not None:
+            where.append("node = ?")
+            params.append(str(base.getid(node)))
+        if states:
+            where.append("state IN (%s)" % ', '.join('?' * len(states)))
+            params.extend(states)
+        if exclude_states:
+            where.append("(state IS NULL OR state NOT IN (%s))"
+                         % ', '.join('?' * len(exclude_states)))
+            params.extend(exclude_states)
+
+        sql = ("SELECT zone, node, uuid, name, state, result, stamp "
+               "FROM tasks")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY stamp DESC, uuid DESC"
+        if limit:
+            sql += " LIMIT %d" % int(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def running(self, zone=None, limit=None):
+        """Return the tasks that have not finished yet."""
+        return self.query(zone, exclude_states=tasks.DONE_STATES,
+                          limit=limit)
+
+    def failed(self, zone=None, limit=None):
+        """Return the tasks that did not succeed."""
+        return self.query(zone, states=tasks.FAILED_STATES, limit=limit)
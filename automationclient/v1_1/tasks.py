@@ -16,7 +16,41 @@
 
 """Tasks interface."""
 
+import collections
+import os
+import time
+
 from automationclient import base
+from automationclient import exceptions
+from automationclient import utils
+
+# States of a task that will not change anymore, and those among them that
+# mean the task did not succeed.
+DONE_STATES = ('SUCCESS', 'FAILURE', 'REVOKED')
+FAILED_STATES = ('FAILURE', 'REVOKED')
+
+
+def task_node_id(info):
+    """Return the ID of the node of a task as a string, or None.
+
+    :param info: dictionary with the details of the task, as listed by
+                 zone.
+    """
+    node = info.get('node_id', info.get('node'))
+    if isinstance(node, dict):
+        node = node.get('id')
+    return None if node is None else str(node)
+
+
+def _task_matches(info, filter):
+    for key, wanted in filter.items():
+        if not isinstance(wanted, (list, tuple, set)):
+            wanted = [wanted]
+        value = task_node_id(info) if key == 'node' else info.get(key)
+        if value not in wanted and str(value) not in [str(item) for item
+                                                      in wanted]:
+            return False
+    return True
 
 
 class Task(base.Resource):
@@ -33,7 +67,9 @@ class Task(base.Resource):
         if not hasattr(self.manager, 'get'):
             return
 
-        new = self.manager.get(self.zone.id, self.node.id, self.id)
+        # Tasks are addressed by UUID under their node.
+        new = self.manager.get_node(self.zone, self.node,
+                                    getattr(self, 'uuid', self.id))
         if new:
             self._add_details(new._info)
 
@@ -42,14 +78,37 @@ class TaskManager(base.ManagerWithFind):
     """Manage :class:`Zone` resources."""
     resource_class = Task
 
-    def list(self, zone):
+    def list(self, zone, search_opts=None, fields=None):
         """Get a list of tasks by zone.
 
         :param zone: The ID of the :class: `Zone` to get
         its tasks.
         :rtype: :class:`Zone`
+
+        :param search_opts: optional dictionary of filters to send to the
+                            server, e.g. ``since`` or ``state``.
+        :param fields: optional list of the attributes to return, the
+                       others are not loaded.
+        """
+        search_opts = base.fields_opts(search_opts, fields,
+                                       self.resource_class)
+        return self._list("/zones/%s/tasks%s" % (base.getid(zone),
+                                                 base.query_string(
+                                                     search_opts)),
+                          "tasks", fields=fields)
+
+    def index(self, path=None):
+        """Open the local index of the tasks.
+
+        :param path: file of the index, by default kept with the other
+                     local caches of the client.
+        :rtype: :class:`automationclient.v1_1.task_index.TaskIndex`
         """
-        return self._list("/zones/%s/tasks" % zone.id, "tasks")
+        # Imported here as task_index depends on the task states above.
+        from automationclient.v1_1 import task_index
+        if path is None:
+            path = os.path.join(self._cache_dir(), 'tasks.sqlite')
+        return task_index.TaskIndex(path)
 
     def get(self, zone, task):
         """Get a specific task by zone.
@@ -218,3 +277,185 @@ class TaskManager(base.ManagerWithFind):
         self._delete("/zones/%s/nodes/%s/tasks/%s" % (base.getid(zone),
                                                       base.getid(node),
                                                       task.uuid))
+
+    def rolling_deploy(self, zone, role, nodes, max_in_flight=1,
+                       max_failures=0, bypass=False, dhcp_reload=True,
+                       interval=5, callback=None, timeout=None):
+        """Deploy a role to many nodes keeping a window of deployments.
+
+        Up to ``max_in_flight`` nodes are deployed at the same time and a
+        new node is started as soon as one finishes. The tasks of the nodes
+        in flight are followed with one task listing per node and poll.
+        Once more than ``max_failures`` nodes have failed no new node is
+        started, the ones in flight are still followed until they finish.
+
+        :param zone: The ID of the :class: `Zone` to get.
+        :param role: The ID of the :class: `Role` to deploy.
+        :param nodes: list of :class:`Node` or IDs to deploy the role to.
+        :param max_in_flight: maximum number of nodes deploying at once.
+        :param max_failures: number of failed nodes tolerated.
+        :param bypass: bypass role deployment.
+        :param dhcp_reload: whether the nodes should ask for an IP after
+                            they are deployed.
+        :param interval: seconds between polls of the task states.
+        :param callback: called with ``(node_id, status, detail)`` every
+                         time a node is 'started', 'succeeded', 'failed' or
+                         'skipped'.
+        :param timeout: seconds after which, if some nodes are still
+                        deploying, a :class:`CommandError` naming them is
+                        raised. None waits forever.
+        :rtype: dictionary with the IDs of the 'succeeded' and 'skipped'
+                nodes and the 'failed' ones mapped to the reason.
+        """
+        def notify(node_id, status, detail=None):
+            if callback:
+                callback(node_id, status, detail)
+
+        pending = collections.deque(base.getid(node) for node in nodes)
+        in_flight = collections.OrderedDict()
+        report = {'succeeded': [], 'failed': {}, 'skipped': []}
+        deadline = None if timeout is None else time.time() + timeout
+
+        while pending or in_flight:
+            while pending and len(in_flight) < max_in_flight and \
+                    len(report['failed']) <= max_failures:
+                node_id = pending.popleft()
+                try:
+                    tasks = self.deploy(zone, role, node_id, bypass, None,
+                                        dhcp_reload)
+                except Exception as e:
+                    report['failed'][node_id] = str(e)
+                    notify(node_id, 'failed', str(e))
+                    continue
+                in_flight[node_id] = set(task.uuid for task in tasks)
+                notify(node_id, 'started', len(tasks))
+
+            if len(report['failed']) > max_failures:
+                while pending:
+                    node_id = pending.popleft()
+                    report['skipped'].append(node_id)
+                    notify(node_id, 'skipped')
+
+            if not in_flight:
+                continue
+
+            if deadline is not None and time.time() >= deadline:
+                raise exceptions.CommandError(
+                    "Role deployment timed out after %s seconds, nodes still "
+                    "deploying: %s" % (timeout, ', '.join(
+                        str(node_id) for node_id in in_flight)))
+
+            time.sleep(interval)
+            node_ids = list(in_flight)
+            listings = utils.parallel_map(
+                lambda node_id: self.list_node(zone, node_id), node_ids,
+                max_in_flight, return_exceptions=True)
+
+            for node_id, listing in zip(node_ids, listings):
+                if isinstance(listing, Exception):
+                    # Polling errors are transient, try again next time.
+                    continue
+                states = dict((task.uuid, task.state) for task in listing
+                              if task.uuid in in_flight[node_id])
+                if len(states) < len(in_flight[node_id]) or \
+                        [state for state in states.values()
+                         if state not in DONE_STATES]:
+                    continue
+
+                del in_flight[node_id]
+                failed = sorted(uuid for uuid, state in states.items()
+                                if state in FAILED_STATES)
+                if failed:
+                    detail = 'tasks %s failed' % ', '.join(failed)
+                    report['failed'][node_id] = detail
+                    notify(node_id, 'failed', detail)
+                else:
+                    report['succeeded'].append(node_id)
+                    notify(node_id, 'succeeded')
+
+        return report
+
+    def _bulk(self, zone, action, select, dry_run, concurrency):
+        """List the tasks of ``zone`` once and run ``action`` on those
+        accepted by ``select``.
+
+        :rtype: dictionary with the UUIDs of the 'matched' tasks, of those
+                the action 'succeeded' on, the 'failed' ones mapped to the
+                error and the 'skipped' ones mapped to the reason.
+        """
+        report = {'matched': [], 'succeeded': [], 'failed': {},
+                  'skipped': {}}
+        targets = []
+        for task in self.list(zone):
+            if not select(task._info):
+                continue
+            uuid = str(getattr(task, 'uuid', task.id))
+            report['matched'].append(uuid)
+            node_id = task_node_id(task._info)
+            if node_id is None:
+                # Tasks are only addressable through their node.
+                report['skipped'][uuid] = 'no node'
+                continue
+            targets.append((uuid, node_id, task))
+
+        if dry_run or not targets:
+            return report
+
+        results = utils.parallel_map(
+            lambda target: action(zone, target[1], target[2]), targets,
+            concurrency, return_exceptions=True)
+        for (uuid, node_id, task), result in zip(targets, results):
+            if isinstance(result, Exception):
+                report['failed'][uuid] = str(result)
+            else:
+                report['succeeded'].append(uuid)
+        return report
+
+    def bulk_cancel(self, zone, filter=None, dry_run=False,
+                    concurrency=utils.DEFAULT_CONCURRENCY):
+        """Cancel many tasks of a zone with a single task listing.
+
+        :param zone: The ID of the :class: `Zone` to get.
+        :param filter: dictionary of task attributes to match, with a value
+                       or a list of accepted values each, e.g.
+                       ``{'node': 1234, 'name': [...]}``. The tasks that
+                       already finished are never cancelled.
+        :param dry_run: only report the tasks that would be cancelled.
+        :param concurrency: maximum number of cancellations sent at once.
+        :rtype: dictionary as returned by :meth:`_bulk`.
+        """
+        filter = filter or {}
+
+        def select(info):
+            return info.get('state') not in DONE_STATES and \
+                _task_matches(info, filter)
+
+        return self._bulk(zone, self.cancel, select, dry_run, concurrency)
+
+    def bulk_delete(self, zone, older_than=None, states=DONE_STATES,
+                    dry_run=False, concurrency=utils.DEFAULT_CONCURRENCY):
+        """Delete many tasks of a zone with a single task listing.
+
+        :param zone: The ID of the :class: `Zone` to get.
+        :param older_than: only the tasks last updated before this
+                           timestamp, in the format of the API
+                           (``YYYY-MM-DD HH:MM:SS``).
+        :param states: only the tasks in one of these states, by default
+                       the finished ones.
+        :param dry_run: only report the tasks that would be deleted.
+        :param concurrency: maximum number of deletions sent at once.
+        :rtype: dictionary as returned by :meth:`_bulk`.
+        """
+        def select(info):
+            if states and info.get('state') not in states:
+                return False
+            if older_than:
+                stamp = info.get('updated') or info.get('created')
+                if not stamp or stamp >= older_than:
+                    return False
+            return True
+
+        return self._bulk(zone,
+                          lambda zone, node, task: self.delete(zone, task,
+                                                               node),
+                          select, dry_run, concurrency)
@@ -16,8 +16,51 @@
 
 """Zones interface."""
 
+import json
+import time
+
 from automationclient import base
 from automationclient import exceptions
+from automationclient import utils
+
+# Zone collections that can be followed with ZoneManager.watch().
+WATCH_KINDS = ('nodes', 'tasks', 'roles')
+
+
+# Version of the files written by ZoneManager.snapshot().
+SNAPSHOT_FORMAT = 1
+
+
+def write_snapshot(snapshot, path):
+    """Write a zone snapshot as JSON."""
+    with open(path, 'w') as f:
+        json.dump(snapshot, f, sort_keys=True, indent=4,
+                  separators=(',', ': '))
+
+
+def read_snapshot(path):
+    """Read a snapshot written by :func:`write_snapshot` and check that its
+    content matches its hash.
+    """
+    with open(path) as f:
+        try:
+            snapshot = json.load(f)
+        except ValueError:
+            raise exceptions.CommandError("The file %s is not a zone "
+                                          "snapshot." % path)
+
+    if not isinstance(snapshot, dict) or \
+            snapshot.get('format') != SNAPSHOT_FORMAT:
+        raise exceptions.CommandError("Unsupported zone snapshot format in "
+                                      "%s." % path)
+
+    content = dict(snapshot)
+    expected = content.pop('hash', None)
+    if utils.content_hash(content) != expected:
+        raise exceptions.CommandError("The zone snapshot %s is corrupted, "
+                                      "its content does not match its "
+                                      "hash." % path)
+    return snapshot
 
 
 class Zone(base.Resource):
@@ -27,16 +70,64 @@ class Zone(base.Resource):
         return "<Zone: %s>" % self.name
 
 
+class ZoneEvent(object):
+    """A change seen on one of the collections of a zone.
+
+    :param type: 'added', 'changed' or 'removed'.
+    :param kind: the collection of the zone, one of :data:`WATCH_KINDS`.
+    :param zone: the ID of the :class:`Zone`.
+    :param id: the ID of the resource that changed.
+    :param resource: the current representation of the resource, or the last
+                     one seen for removed resources.
+    :param changes: for 'changed' events, a dictionary of field name to
+                    ``{'old': ..., 'new': ...}``.
+    """
+
+    ADDED = 'added'
+    CHANGED = 'changed'
+    REMOVED = 'removed'
+
+    def __init__(self, type, kind, zone, id, resource, changes=None):
+        self.type = type
+        self.kind = kind
+        self.zone = zone
+        self.id = id
+        self.resource = resource
+        self.changes = changes or {}
+
+    def to_dict(self):
+        event = {'event': self.type, 'kind': self.kind, 'zone': self.zone,
+                 'id': self.id, 'resource': self.resource}
+        if self.type == self.CHANGED:
+            event['changes'] = self.changes
+        return event
+
+    def __repr__(self):
+        return "<ZoneEvent: %s %s %s>" % (self.type, self.kind, self.id)
+
+
+def _diff_fields(old, new):
+    changes = {}
+    for key in set(old) | set(new):
+        if old.get(key) != new.get(key):
+            changes[key] = {'old': old.get(key), 'new': new.get(key)}
+    return changes
+
+
 class ZoneManager(base.ManagerWithFind):
     """Manage :class:`Zone` resources."""
     resource_class = Zone
+    server_filters = ('name',)
 
-    def list(self):
+    def list(self, search_opts=None):
         """Get a list of all zones.
 
+        :param search_opts: optional dictionary of ``server_filters`` to
+                            filter the zones by on the server.
         :rtype: :class:`Zone`
         """
-        return self._list("/zones", "zones")
+        return self._list("/zones%s" % base.query_string(search_opts),
+                          "zones")
 
     def get(self, zone):
         """Get a specific zone .
@@ -72,54 +163,199 @@ class ZoneManager(base.ManagerWithFind):
 
         self._delete("/zones/%s" % base.getid(zone))
 
+    def watch(self, zone, interval=5, kinds=WATCH_KINDS, iterations=None):
+        """Follow the nodes, tasks and roles of a zone.
+
+        Polls every collection in ``kinds`` each ``interval`` seconds and
+        yields a :class:`ZoneEvent` for every resource added, changed or
+        removed since the previous poll. The first poll only records the
+        baseline. When the server returns an ETag the next poll is a
+        conditional request and an unchanged collection costs a 304.
+
+        :param zone: The ID of the :class: `Zone` to watch.
+        :param interval: seconds to wait between polls.
+        :param kinds: collections to follow, a subset of :data:`WATCH_KINDS`.
+        :param iterations: stop after this number of polls, forever if None.
+        :rtype: generator of :class:`ZoneEvent`
+        """
+        for kind in kinds:
+            if kind not in WATCH_KINDS:
+                msg = ("Cannot watch '%s', must be one of: %s"
+                       % (kind, ', '.join(WATCH_KINDS)))
+                raise exceptions.CommandError(msg)
+
+        zone_id = base.getid(zone)
+        snapshots = {}
+        etags = {}
+        polls = 0
+        while iterations is None or polls < iterations:
+            if polls:
+                time.sleep(interval)
+            polls += 1
+
+            for kind in kinds:
+                kwargs = {}
+                if kind in etags:
+                    kwargs['headers'] = {'If-None-Match': etags[kind]}
+                resp, body = self.api.client.get(
+                    "/zones/%s/%s" % (zone_id, kind), **kwargs)
+                if resp.status_code == 304:
+                    continue
+
+                etag = (resp.headers or {}).get('ETag')
+                if etag:
+                    etags[kind] = etag
+
+                current = {}
+                for info in body[kind]:
+                    if not info:
+                        continue
+                    info = dict((k, v) for k, v in info.items()
+                                if k != '_links')
+                    current[info.get('id', info.get('uuid'))] = info
+
+                previous = snapshots.get(kind)
+                snapshots[kind] = current
+                if previous is None:
+                    continue
+
+                for id, info in current.items():
+                    if id not in previous:
+                        yield ZoneEvent(ZoneEvent.ADDED, kind, zone_id, id,
+                                        info)
+                    elif info != previous[id]:
+                        yield ZoneEvent(ZoneEvent.CHANGED, kind, zone_id, id,
+                                        info, _diff_fields(previous[id],
+                                                           info))
+                for id, info in previous.items():
+                    if id not in current:
+                        yield ZoneEvent(ZoneEvent.REMOVED, kind, zone_id, id,
+                                        info)
+
     def property_create(self, zone, property_key,
                         property_value):
 
-        zone_dict = zone._info
-        props_dict = zone_dict['properties']
-
-        if property_key not in props_dict:
-            props_dict[property_key] = property_value
-        else:
+        if property_key in zone.properties:
             msg = "A zone property with a key: '%s' exists." % property_key
             raise exceptions.CommandError(msg)
 
-        zone_dict['properties'] = props_dict
-        del zone_dict['_links']
-        zone_body = {"zone": zone_dict}
-
-        return self._update("/zones/%s" % base.getid(zone), zone_body)
+        return self.properties_patch(zone, set={property_key: property_value})
 
     def property_update(self, zone, property_key,
                         property_value):
 
-        zone_dict = zone._info
-        props_dict = zone_dict['properties']
-        if property_key in props_dict:
-            props_dict[property_key] = property_value
-        else:
+        if property_key not in zone.properties:
             msg = "No zone property with a key: '%s' exists." % property_key
             raise exceptions.CommandError(msg)
 
-        zone_dict['properties'] = props_dict
-        del zone_dict['_links']
-        zone_body = {"zone": zone_dict}
-
-        return self._update("/zones/%s" % base.getid(zone), zone_body)
+        return self.properties_patch(zone, set={property_key: property_value})
 
     def property_delete(self, zone, property_key):
 
-        zone_dict = zone._info
-        props_dict = zone_dict['properties']
+        return self.properties_patch(zone, delete=[property_key])
 
-        if property_key in props_dict:
-            del props_dict[property_key]
-        else:
-            msg = "No zone property with a key: '%s' exists." % property_key
-            raise exceptions.CommandError(msg)
+    def properties_patch(self, zone, set=None, delete=None):
+        """
+        Change several zone properties with a single update.
 
-        zone_dict['properties'] = props_dict
-        del zone_dict['_links']
-        zone_body = {"zone": zone_dict}
+        :param zone: The :class:`Zone` to update, it is not modified.
+        :param set: dictionary of property keys to create or update
+        :param delete: list of property keys to remove
+        :rtype: dictionary with the updated zone, as returned by the API.
+        """
+        zone_body = self._properties_body(zone, 'zone', set=set,
+                                          delete=delete)
 
         return self._update("/zones/%s" % base.getid(zone), zone_body)
+
+    def snapshot(self, zone, concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Take a snapshot of the configuration of a zone: its properties and
+        the configuration of every component of every role.
+
+        The components are fetched with up to ``concurrency`` requests in
+        flight. Every component and the whole snapshot carry the SHA-256
+        hash of their content.
+
+        :param zone: The :class:`Zone` to snapshot.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: dictionary that can be saved with :func:`write_snapshot`.
+        """
+        zone, (roles, configs) = utils.parallel_map(
+            lambda fetch: fetch(),
+            [lambda: self.get(zone),
+             lambda: self.api.components.get_zone_configs(zone,
+                                                          concurrency)],
+            concurrency)
+
+        snapshot = {
+            'format': SNAPSHOT_FORMAT,
+            'zone': zone.id,
+            'name': zone.name,
+            'properties': zone._info.get('properties', {}),
+            'roles': {},
+        }
+        for role in roles:
+            components = configs[str(role.id)]
+            snapshot['roles'][str(role.id)] = {
+                'name': role.name,
+                'components': dict(
+                    (name, {'hash': utils.content_hash(config),
+                            'config': config})
+                    for name, config in components.items()),
+            }
+        snapshot['hash'] = utils.content_hash(snapshot)
+        return snapshot
+
+    def restore(self, zone, snapshot, dry_run=False,
+                concurrency=utils.DEFAULT_CONCURRENCY):
+        """
+        Restore a snapshot taken with :meth:`snapshot` on a zone.
+
+        The live configuration is compared with the snapshot and only the
+        zone properties and the components whose content hash differs are
+        updated, with up to ``concurrency`` requests in flight.
+
+        :param zone: The :class:`Zone` to restore.
+        :param snapshot: dictionary returned by :meth:`snapshot`.
+        :param dry_run: only compute the calls, do not update anything.
+        :param concurrency: maximum number of requests in flight.
+        :rtype: dictionary with the planned 'calls' (method, url and body),
+                the 'missing' components of the snapshot that no longer
+                exist in the zone and the number of 'unchanged' components.
+        """
+        live = self.snapshot(zone, concurrency)
+        zone_id = live['zone']
+        plan = {'calls': [], 'missing': [], 'unchanged': 0}
+
+        if snapshot['properties'] != live['properties']:
+            current = self.get(zone_id)
+            delete = [key for key in live['properties']
+                      if key not in snapshot['properties']]
+            body = self._properties_body(current, 'zone',
+                                         set=snapshot['properties'],
+                                         delete=delete)
+            plan['calls'].append({'method': 'PUT',
+                                  'url': '/zones/%s' % zone_id,
+                                  'body': body})
+
+        for role_id, role in sorted(snapshot['roles'].items()):
+            live_components = live['roles'].get(role_id, {}).get(
+                'components', {})
+            for name, component in sorted(role['components'].items()):
+                url = '/zones/%s/roles/%s/components/%s' % (zone_id, role_id,
+                                                            name)
+                if name not in live_components:
+                    plan['missing'].append(url)
+                elif live_components[name]['hash'] != component['hash']:
+                    plan['calls'].append(
+                        {'method': 'PUT', 'url': url,
+                         'body': {'component': component['config']}})
+                else:
+                    plan['unchanged'] += 1
+
+        if not dry_run:
+            utils.parallel_map(
+                lambda call: self._update(call['url'], call['body']),
+                plan['calls'], concurrency)
+        return plan
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# Copyright 2012-2013 STACKOPS TECHNOLOGIES S.L.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measure the time the shell takes to build its parser and parse a command.
+
+Usage: tools/bench_startup.py [-n <repeat>] [command args...]
+
+The full parser, with a subparser for every command, is compared with the
+parser built for the invoked command alone.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from automationclient import shell  # noqa
+
+
+def parse(argv, lazy):
+    automation = shell.StackopsAutomationShell()
+    automation.extensions = []
+    parser = automation.get_base_parser()
+    options, args = parser.parse_known_args(argv)
+    command = automation._get_command(args) if lazy else None
+    parser = automation.get_subcommand_parser(
+        options.os_automation_api_version, command=command)
+    return parser.parse_args(argv)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('-n', '--repeat', type=int, default=50)
+    parser.add_argument('argv', nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    argv = args.argv or ['zone-list']
+
+    results = {}
+    for lazy in (False, True):
+        timer = timeit.Timer(lambda: parse(argv, lazy))
+        results[lazy] = min(timer.repeat(3, args.repeat)) / args.repeat
+
+    print("command: %s" % ' '.join(argv))
+    print("full parser: %8.2f ms" % (results[False] * 1000))
+    print("lazy parser: %8.2f ms" % (results[True] * 1000))
+    print("speedup:     %8.1fx" % (results[False] / results[True]))
+
+
+if __name__ == '__main__':
+    main()